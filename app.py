@@ -1,17 +1,20 @@
+import html
+import os
+import time
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import base64
-from io import StringIO
-import PyPDF2
-import io
-import docx
-
-from preprocessing import preprocess_text
-from skill_extractor import extract_skills
-from skill_categorizer import categorize_skills
+
+from extraction_jobs import PROGRESS_MIN_CHARS, ExtractionJobs
+from instrumentation import tracing
+from knowledge_base import get_knowledge_base
+from pipeline import analyze_text, warm_up
+from result_cache import default_cache
 from utils import get_file_text
 
+# Markup of one skill badge
+SKILL_CHIP = ('<span style="display: inline-block; background-color: {background}; border: 1px solid {color}; '
+              'border-radius: 16px; padding: 4px 12px; margin: 4px; font-size: 14px; color: {color};">{skill}</span>')
+
 # Set page configuration
 st.set_page_config(
     page_title="JD Skill Extractor",
@@ -19,6 +22,101 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def load_corpus_matrix(path, mtime):
+    """Load a corpus matrix once per version of the file"""
+    from corpus_analytics import SkillMatrix
+    
+    # Related skills are counted per selected skill, so the co-occurrence
+    # matrix of a large vocabulary is never built here
+    return SkillMatrix.load(path)
+
+@st.cache_resource
+def open_results_store(path):
+    """Open the results store once per process"""
+    from results_store import ResultsStore
+    
+    return ResultsStore(path)
+
+@st.cache_resource(show_spinner="Loading the language model and skill dictionary...")
+def load_pipeline():
+    """
+    Load the spaCy model and build the knowledge base once per server process
+    
+    Every session shares them; get_knowledge_base() still picks up edits of
+    the dictionary files.
+    """
+    warm_up()
+
+@st.cache_resource
+def extraction_jobs():
+    """Background extraction pool shared by every session"""
+    return ExtractionJobs(cache=default_cache)
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def analyze_memoized(text, knowledge_base_version):
+    """Analyze a text once per knowledge base version, for every session"""
+    return analyze_text(text, cache=default_cache)
+
+@st.cache_data(show_spinner=False)
+def skill_chips(skills, color, background):
+    """HTML of a row of skill badges, built once per list of skills"""
+    return " ".join(
+        SKILL_CHIP.format(color=color, background=background, skill=html.escape(skill))
+        for skill in skills
+    )
+
+@st.cache_data(show_spinner=False)
+def category_chart(categorized_skills):
+    """Plotly bar chart of the skills per category, built once per result"""
+    import pandas as pd
+    import plotly.express as px
+    
+    # Count the skills of every category at once
+    skill_counts = pd.Series(categorized_skills, dtype=object).str.len()
+    chart_data = (skill_counts[skill_counts > 0]
+                  .rename_axis('Category')
+                  .reset_index(name='Count'))
+    if chart_data.empty:
+        return None
+    
+    fig = px.bar(
+        chart_data, 
+        x='Category', 
+        y='Count',
+        title='Skills by Category',
+        color='Count',
+        color_continuous_scale=['#86888A', '#00A0DC', '#0077B5'],
+        labels={'Count': 'Number of Skills', 'Category': 'Skill Category'}
+    )
+    
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
+        yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
+        height=400
+    )
+    return fig
+
+def show_categorized_skills(categorized_skills):
+    """Skill badges grouped by category"""
+    for category, skills in categorized_skills.items():
+        if skills:  # Only show categories with at least one skill
+            st.markdown(f"**{category}**")
+            st.markdown(skill_chips(tuple(skills), '#0077B5', 'rgba(0, 119, 181, 0.1)'), unsafe_allow_html=True)
+            st.markdown("---")
+
+def keep_result(result, trace):
+    """Show a finished analysis and store it if a results store is configured"""
+    st.session_state.trace = trace
+    st.session_state.extracted_skills = result["skills"]
+    st.session_state.categorized_skills = result["categories"]
+    
+    # Keep the result beyond this session for querying with results_store.py
+    results_store_path = os.environ.get("JD_RESULTS_STORE")
+    if results_store_path:
+        open_results_store(results_store_path).add([(st.session_state.jd_source, result, None, time.time())])
+
 # App title
 st.title("Job Description Skill Extractor")
 st.markdown("""
@@ -33,6 +131,23 @@ if 'categorized_skills' not in st.session_state:
     st.session_state.categorized_skills = None
 if 'jd_text' not in st.session_state:
     st.session_state.jd_text = ""
+if 'trace' not in st.session_state:
+    st.session_state.trace = None
+if 'jd_source' not in st.session_state:
+    st.session_state.jd_source = "pasted text"
+if 'job' not in st.session_state:
+    st.session_state.job = None
+
+# Performance mode shares the loaded model, memoized results and a pool of
+# background workers between sessions, so users never wait for each other
+performance_mode = st.sidebar.toggle(
+    "Performance mode",
+    value=os.environ.get("JD_APP_PERFORMANCE", "0") == "1",
+    help="Load the model once for all users, remember results per text and "
+         "analyze long job descriptions in the background with progress updates"
+)
+if performance_mode:
+    load_pipeline()
 
 # Input section
 st.header("Job Description Input")
@@ -45,6 +160,7 @@ if input_option == "Paste text":
     
     if jd_text:
         st.session_state.jd_text = jd_text
+        st.session_state.jd_source = "pasted text"
 
 else:  # Upload file option
     uploaded_file = st.file_uploader("Upload a job description file", 
@@ -54,6 +170,7 @@ else:  # Upload file option
         try:
             jd_text = get_file_text(uploaded_file)
             st.session_state.jd_text = jd_text
+            st.session_state.jd_source = uploaded_file.name
             st.success(f"Successfully loaded file: {uploaded_file.name}")
             
             # Show a preview of the extracted text
@@ -64,17 +181,46 @@ else:  # Upload file option
 
 # Process button
 if st.button("Extract Skills") and st.session_state.jd_text:
-    with st.spinner("Analyzing job description..."):
-        # Preprocess the text
-        processed_text = preprocess_text(st.session_state.jd_text)
-        
-        # Extract skills
-        extracted_skills = extract_skills(processed_text)
-        st.session_state.extracted_skills = extracted_skills
-        
-        # Categorize skills
-        categorized_skills = categorize_skills(extracted_skills)
-        st.session_state.categorized_skills = categorized_skills
+    text = st.session_state.jd_text
+    if performance_mode and len(text) >= PROGRESS_MIN_CHARS:
+        # Long texts run in the background; the progress section below
+        # follows the job and shows the skills found so far
+        st.session_state.job = extraction_jobs().submit(text)
+        st.session_state.extracted_skills = None
+        st.session_state.categorized_skills = None
+    else:
+        with st.spinner("Analyzing job description..."):
+            # Preprocess, extract and categorize with a single spaCy parse,
+            # reusing the result if this text was analyzed before
+            with tracing() as trace:
+                if performance_mode:
+                    result = analyze_memoized(text, get_knowledge_base().version)
+                else:
+                    result = analyze_text(text, cache=default_cache)
+            keep_result(result, trace.as_dict())
+
+@st.fragment(run_every=0.5)
+def show_job_progress():
+    """Progress and skills found so far of the running background job"""
+    job = st.session_state.job
+    if job.done:
+        st.session_state.job = None
+        if job.error is not None:
+            st.session_state.job_error = str(job.error)
+        else:
+            keep_result(job.result, job.trace)
+        st.rerun()
+    
+    st.progress(job.progress, text=f"Analyzing job description... {job.progress:.0%}")
+    partial = job.partial_result()
+    if partial["skills"]:
+        st.subheader(f"Skills found so far: {len(partial['skills'])}")
+        show_categorized_skills(partial["categories"])
+
+if st.session_state.job is not None:
+    show_job_progress()
+if st.session_state.get('job_error'):
+    st.error(f"Error analyzing job description: {st.session_state.pop('job_error')}")
 
 # Results display
 if st.session_state.extracted_skills and st.session_state.categorized_skills:
@@ -85,66 +231,14 @@ if st.session_state.extracted_skills and st.session_state.categorized_skills:
     
     with col1:
         st.subheader("Extracted Skills by Category")
-        
-        for category, skills in st.session_state.categorized_skills.items():
-            if skills:  # Only show categories with at least one skill
-                st.markdown(f"**{category}**")
-                
-                # Display skills as chips/badges
-                html_skills = ""
-                for skill in skills:
-                    # Create a styled badge for each skill
-                    html_skills += f"""
-                    <span style="display: inline-block; 
-                                 background-color: rgba(0, 119, 181, 0.1); 
-                                 border: 1px solid #0077B5; 
-                                 border-radius: 16px; 
-                                 padding: 4px 12px; 
-                                 margin: 4px; 
-                                 font-size: 14px;
-                                 color: #0077B5;">
-                        {skill}
-                    </span>
-                    """
-                st.markdown(html_skills, unsafe_allow_html=True)
-                st.markdown("---")
+        show_categorized_skills(st.session_state.categorized_skills)
     
     with col2:
         st.subheader("Skill Distribution")
         
-        # Prepare data for chart
-        categories = []
-        skill_counts = []
-        
-        for category, skills in st.session_state.categorized_skills.items():
-            if skills:  # Only include categories with at least one skill
-                categories.append(category)
-                skill_counts.append(len(skills))
-        
-        chart_data = pd.DataFrame({
-            'Category': categories,
-            'Count': skill_counts
-        })
-        
-        # Create bar chart using Plotly
-        if not chart_data.empty:
-            fig = px.bar(
-                chart_data, 
-                x='Category', 
-                y='Count',
-                title='Skills by Category',
-                color='Count',
-                color_continuous_scale=['#86888A', '#00A0DC', '#0077B5'],
-                labels={'Count': 'Number of Skills', 'Category': 'Skill Category'}
-            )
-            
-            fig.update_layout(
-                plot_bgcolor='rgba(0,0,0,0)',
-                xaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
-                yaxis=dict(gridcolor='rgba(0,0,0,0.1)'),
-                height=400
-            )
-            
+        # Built once per result rather than on every rerun
+        fig = category_chart(st.session_state.categorized_skills)
+        if fig is not None:
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("Not enough data to generate visualization.")
@@ -155,24 +249,72 @@ if st.session_state.extracted_skills and st.session_state.categorized_skills:
             all_skills = sorted(st.session_state.extracted_skills)
             
             # Display as chips
-            html_all_skills = ""
-            for skill in all_skills:
-                html_all_skills += f"""
-                <span style="display: inline-block; 
-                             background-color: rgba(0, 160, 220, 0.1); 
-                             border: 1px solid #00A0DC; 
-                             border-radius: 16px; 
-                             padding: 4px 12px; 
-                             margin: 4px; 
-                             font-size: 14px;
-                             color: #00A0DC;">
-                    {skill}
-                </span>
-                """
-            st.markdown(html_all_skills, unsafe_allow_html=True)
+            st.markdown(skill_chips(tuple(all_skills), '#00A0DC', 'rgba(0, 160, 220, 0.1)'),
+                        unsafe_allow_html=True)
         else:
             st.info("No skills were extracted. Try another job description.")
 
+# Timing breakdown of the last extraction
+if st.session_state.extracted_skills and st.session_state.trace:
+    with st.expander("Timing breakdown"):
+        trace = st.session_state.trace
+        import pandas as pd
+        
+        st.markdown(f"**Total:** {trace['total_ms']:.1f} ms")
+        
+        timing_data = pd.DataFrame({
+            'Stage': list(trace['stages_ms'].keys()),
+            'Time (ms)': list(trace['stages_ms'].values())
+        })
+        st.dataframe(timing_data, hide_index=True, use_container_width=True)
+        
+        if trace['counters']:
+            st.json(trace['counters'])
+
+# Aggregate views of a corpus matrix built with `python corpus_analytics.py build`
+corpus_matrix_path = os.environ.get("JD_CORPUS_MATRIX")
+if corpus_matrix_path and os.path.exists(corpus_matrix_path):
+    import pandas as pd
+    import plotly.express as px
+    
+    matrix = load_corpus_matrix(corpus_matrix_path, os.path.getmtime(corpus_matrix_path))
+    
+    st.header("Corpus Analytics")
+    st.markdown(f"**{matrix.n_documents:,}** job descriptions, **{matrix.n_skills}** skills")
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        top_skills = pd.DataFrame(matrix.top_skills(20), columns=['Skill', 'Job Descriptions'])
+        top_skills['Share'] = top_skills['Job Descriptions'] / max(matrix.n_documents, 1)
+        fig = px.bar(
+            top_skills,
+            x='Skill',
+            y='Share',
+            title='Most Requested Skills',
+            labels={'Share': 'Share of Job Descriptions'}
+        )
+        fig.update_layout(yaxis_tickformat='.0%', height=400)
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with col2:
+        category_data = pd.DataFrame({
+            'Category': matrix.category_names,
+            'Job Descriptions': matrix.category_frequency(),
+            'Share of Skills': matrix.category_shares()
+        }).sort_values('Share of Skills', ascending=False)
+        category_data = category_data[category_data['Job Descriptions'] > 0]
+        st.subheader("Categories")
+        st.dataframe(category_data, hide_index=True, use_container_width=True,
+                     column_config={'Share of Skills': st.column_config.NumberColumn(format="%.3f")})
+    
+    ranked_skills = [skill for skill, _ in matrix.top_skills(matrix.n_skills)]
+    if ranked_skills:
+        skill = st.selectbox("Skills most often requested together with:", ranked_skills)
+        related = pd.DataFrame(matrix.top_related(skill, k=15, min_count=1),
+                               columns=['Skill', 'PMI', 'Job Descriptions Together'])
+        st.dataframe(related, hide_index=True, use_container_width=True)
+
 # Information section at the bottom
 with st.expander("About this app"):
     st.markdown("""
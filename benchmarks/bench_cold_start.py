@@ -0,0 +1,136 @@
+"""
+Benchmark cold start: importing the modules and analyzing the first document.
+
+Every measurement runs in a fresh interpreter started from an empty working
+directory. For each module it reports the import time, the whole process
+time and which heavy libraries the import pulled in; for each NLP mode it
+also times pipeline.warm_up() and the first analyze_text call after it.
+Fails if importing a module loads spaCy, pandas, plotly, PyPDF2 or docx or
+creates files, since all of those must wait until first use.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cold_start --modes blank fast
+    python -m benchmarks.bench_cold_start --repeat 5 -o cold_start.json
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+
+MODULES = ("preprocessing", "skill_extractor", "skill_categorizer", "pipeline", "utils", "cli", "service")
+
+# Same as nlp_model.NLP_MODES; importing nlp_model here would read
+# JD_NLP_MODE before the workers set it
+NLP_MODES = ("full", "lean", "blank", "fast")
+
+# Libraries that must only be imported on first use
+HEAVY_MODULES = ("spacy", "pandas", "plotly", "PyPDF2", "docx")
+
+SAMPLE_TEXT = "Senior Python developer with AWS, Docker and machine learning experience."
+
+
+def run_worker(module, warm):
+    """Measure one cold start inside the current process and print JSON"""
+    start = time.perf_counter()
+    importlib.import_module(module)
+    result = {"import_ms": round((time.perf_counter() - start) * 1000, 1)}
+    result["heavy_modules"] = [name for name in HEAVY_MODULES if name in sys.modules]
+    result["files_created"] = sorted(os.listdir("."))
+
+    if warm:
+        from pipeline import analyze_text, warm_up
+
+        start = time.perf_counter()
+        warm_up()
+        result["warm_up_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        start = time.perf_counter()
+        analyze_text(SAMPLE_TEXT)
+        result["first_doc_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    print(json.dumps(result))
+
+
+def measure(module, mode, warm, repeat):
+    """Median of repeated cold starts, each in a new process"""
+    env = dict(os.environ, JD_NLP_MODE=mode)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(repo_root), env.get("PYTHONPATH")]))
+    command = [sys.executable, "-m", "benchmarks.bench_cold_start", "--worker", module]
+    if warm:
+        command.append("--warm")
+
+    runs = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as cwd:
+            start = time.perf_counter()
+            output = subprocess.run(command, cwd=cwd, env=env, check=True,
+                                    capture_output=True, text=True).stdout
+            process_ms = (time.perf_counter() - start) * 1000
+        run = json.loads(output.strip().splitlines()[-1])
+        run["process_ms"] = process_ms
+        runs.append(run)
+
+    result = {"module": module, "mode": mode}
+    for key in ("import_ms", "warm_up_ms", "first_doc_ms", "process_ms"):
+        if key in runs[0]:
+            result[key] = round(statistics.median(run[key] for run in runs), 1)
+    result["heavy_modules"] = runs[0]["heavy_modules"]
+    result["files_created"] = runs[0]["files_created"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modules", nargs="+", default=list(MODULES), choices=MODULES)
+    parser.add_argument("--modes", nargs="+", default=["blank", "fast"], choices=NLP_MODES,
+                        help="modes timed for warm-up and the first document")
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts per measurement")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    parser.add_argument("--worker", choices=MODULES, help=argparse.SUPPRESS)
+    parser.add_argument("--warm", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.warm)
+        return
+
+    results = [measure(module, args.modes[0], False, args.repeat) for module in args.modules]
+    results += [measure("pipeline", mode, True, args.repeat) for mode in args.modes]
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(json.dumps(results, indent=2) + "\n")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'module':>18} {'mode':>6} {'import ms':>10} {'warm-up ms':>11} "
+              f"{'first doc ms':>13} {'process ms':>11}  heavy imports")
+        for r in results:
+            print(f"{r['module']:>18} {r['mode']:>6} {r['import_ms']:>10} "
+                  f"{r.get('warm_up_ms', '-'):>11} {r.get('first_doc_ms', '-'):>13} "
+                  f"{r['process_ms']:>11}  {', '.join(r['heavy_modules']) or '-'}")
+
+    failures = [
+        f"importing {r['module']} loaded {', '.join(r['heavy_modules'])}"
+        for r in results if r["heavy_modules"]
+    ] + [
+        f"importing {r['module']} created {', '.join(r['files_created'])}"
+        for r in results if r["files_created"]
+    ]
+    if failures:
+        raise SystemExit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
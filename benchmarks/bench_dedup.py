@@ -0,0 +1,118 @@
+"""
+Benchmark near-duplicate skipping on a feed of cross-posted job descriptions.
+
+Builds a feed where each synthetic job description from benchmarks.corpus is
+posted several times with the edits scraped feeds show (location, posting
+date, recruiter footer), some copies also gaining a skill mention. The feed
+is analyzed once with plain analyze_batch and once per threshold through
+NearDuplicateFilter, reporting the skip ratio, the false-merge rate against
+the plain results, the filter's own audited estimate and the speedup.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dedup --docs 200 --copies 4
+    python -m benchmarks.bench_dedup --thresholds 0.7 0.8 0.9 -o dedup.json
+"""
+import argparse
+import json
+import random
+import time
+
+from benchmarks.corpus import make_corpus
+from near_duplicates import NearDuplicateFilter
+from pipeline import analyze_batch, warm_up
+
+CITIES = ("Berlin", "Austin, TX", "Remote (EU)", "Bangalore", "London", "Toronto")
+RECRUITERS = ("Jane Doe", "Talent Team", "A. Smith", "Hiring Partners Ltd")
+ADDED_SKILLS = ("kubernetes", "terraform", "graphql", "tableau")
+
+
+def make_feed(base_documents, copies, added_skill_rate, seed=0):
+    """
+    Cross-posted feed: every document followed closely by edited copies
+
+    Returns:
+        list: Texts in feed order
+    """
+    rng = random.Random(seed)
+    feed = []
+    for text in base_documents:
+        feed.append(text)
+        for _ in range(copies):
+            copy = (f"Location: {rng.choice(CITIES)}. Posted {rng.randint(1, 28)}.{rng.randint(1, 12)}.2024.\n"
+                    f"{text}\nContact {rng.choice(RECRUITERS)} for details.")
+            if rng.random() < added_skill_rate:
+                copy += f" Experience with {rng.choice(ADDED_SKILLS)} is a plus."
+            feed.append(copy)
+    # Interleave nearby posts like a scraped feed, keeping copies close
+    for i in range(len(feed) - 1):
+        if rng.random() < 0.3:
+            j = min(len(feed) - 1, i + rng.randint(1, copies + 1))
+            feed[i], feed[j] = feed[j], feed[i]
+    return feed
+
+
+def run(feed, threshold, audit_fraction, batch_size):
+    """Analyze the feed through a NearDuplicateFilter"""
+    dedup = NearDuplicateFilter(threshold, audit_fraction=audit_fraction)
+    start = time.perf_counter()
+    results = list(dedup.analyze_batch(feed, batch_size=batch_size))
+    return results, time.perf_counter() - start, dedup.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=200, help="distinct job descriptions")
+    parser.add_argument("--copies", type=int, default=4, help="edited cross-posts of each")
+    parser.add_argument("--words", type=int, default=300, help="words per job description")
+    parser.add_argument("--added-skill-rate", type=float, default=0.1,
+                        help="share of copies that also mention an extra skill")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.8, 0.9])
+    parser.add_argument("--audit", type=float, default=0.05, help="audit fraction of the filter")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    feed = make_feed(make_corpus(args.docs, words_per_doc=args.words), args.copies, args.added_skill_rate)
+    warm_up()
+
+    start = time.perf_counter()
+    expected = list(analyze_batch(feed, batch_size=args.batch_size))
+    baseline_seconds = time.perf_counter() - start
+
+    results = []
+    for threshold in args.thresholds:
+        output, seconds, stats = run(feed, threshold, args.audit, args.batch_size)
+        wrong = sum(result != reference for result, reference in zip(output, expected))
+        merged = stats["skipped"] + stats["audited"]
+        results.append({
+            "threshold": threshold,
+            "documents": len(feed),
+            "skip_ratio": stats["skip_ratio"],
+            # Skipped documents whose reused result differs from their own;
+            # audited ones return their own result and are never wrong
+            "false_merge_rate": round(wrong / stats["skipped"], 4) if stats["skipped"] else 0.0,
+            "audited_false_merge_rate": stats["false_merge_rate"],
+            "merged": merged,
+            "seconds": round(seconds, 2),
+            "speedup": round(baseline_seconds / seconds, 2),
+        })
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(json.dumps(results, indent=2) + "\n")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{len(feed)} documents, plain analyze_batch {baseline_seconds:.2f} s")
+        print(f"{'threshold':>9} {'skip ratio':>10} {'false merges':>12} {'audited est.':>12} "
+              f"{'seconds':>8} {'speedup':>8}")
+        for r in results:
+            print(f"{r['threshold']:>9} {r['skip_ratio']:>10.1%} {r['false_merge_rate']:>12.1%} "
+                  f"{r['audited_false_merge_rate']:>12.1%} {r['seconds']:>8} {r['speedup']:>7}x")
+
+
+if __name__ == "__main__":
+    main()
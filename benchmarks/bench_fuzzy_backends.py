@@ -0,0 +1,85 @@
+"""
+Benchmark the fuzzy matching backends against each other.
+
+Scores the distinct n-grams of every document with FuzzyIndex.best_matches
+once per backend: "fuzzywuzzy", the reference scoring one n-gram at a time,
+and "rapidfuzz", scoring each document's n-grams in batched score matrices.
+Checks that both return the same match for every n-gram and reports the
+speedup. Needs rapidfuzz (pip install rapidfuzz).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fuzzy_backends --docs 50 --extra-aliases 2000
+    python -m benchmarks.bench_fuzzy_backends --workers 4 --json
+"""
+import argparse
+import json
+import time
+
+import fuzzy_index
+from benchmarks.bench_fuzzy_index import document_ngrams
+from benchmarks.corpus import make_aliases, make_documents
+from fuzzy_index import FuzzyIndex
+from skill_extractor import load_skill_dictionary
+
+
+def run(index, ngrams, backend):
+    """Match every document's n-grams in one batch with a backend"""
+    start = time.perf_counter()
+    matches = [index.best_matches(doc, score_cutoff=90, backend=backend) for doc in ngrams]
+    return matches, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=20, help="number of documents")
+    parser.add_argument("--words", type=int, default=300, help="words per document")
+    parser.add_argument("--extra-aliases", type=int, default=0,
+                        help="synthetic aliases added to the dictionary")
+    parser.add_argument("--workers", type=int, default=fuzzy_index.fuzzy_workers,
+                        help="threads per score matrix, -1 for all cores")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    fuzzy_index.fuzzy_workers = args.workers
+
+    keywords = list(load_skill_dictionary().keys())
+    keywords += make_aliases(load_skill_dictionary(), args.extra_aliases, args.seed)
+    documents = make_documents(keywords, args.docs, args.words, args.seed)
+    ngrams = [document_ngrams(words) for words in documents]
+    index = FuzzyIndex(keywords)
+
+    reference, reference_seconds = run(index, ngrams, "fuzzywuzzy")
+    batched, batched_seconds = run(index, ngrams, "rapidfuzz")
+
+    mismatches = sum(
+        a != b
+        for doc_a, doc_b in zip(reference, batched)
+        for a, b in zip(doc_a, doc_b)
+    )
+
+    results = {
+        "keywords": len(keywords),
+        "documents": len(documents),
+        "ngrams": sum(len(doc) for doc in ngrams),
+        "matches": sum(match is not None for doc in reference for match in doc),
+        "workers": args.workers,
+        "fuzzywuzzy_seconds": round(reference_seconds, 4),
+        "rapidfuzz_seconds": round(batched_seconds, 4),
+        "speedup": round(reference_seconds / batched_seconds, 1) if batched_seconds else None,
+        "mismatches": mismatches,
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:>20}: {value}")
+
+    if mismatches:
+        raise SystemExit("rapidfuzz results differ from the fuzzywuzzy reference")
+
+
+if __name__ == "__main__":
+    main()
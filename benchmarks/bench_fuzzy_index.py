@@ -0,0 +1,96 @@
+"""
+Benchmark the fuzzy matching stage of extract_skills.
+
+Compares the original full scan (``process.extractBests`` over every
+dictionary key for each n-gram) with the FuzzyIndex candidate pruning, checks
+that both return the same match for every n-gram and reports the speedup.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fuzzy_index --docs 20 --extra-aliases 2000
+"""
+import argparse
+import json
+import logging
+import time
+
+from fuzzywuzzy import process
+
+from benchmarks.corpus import make_aliases, make_documents
+from fuzzy_index import FuzzyIndex
+from skill_extractor import load_skill_dictionary
+
+
+def document_ngrams(words):
+    """Distinct 1-3 word n-grams scored by extract_skills"""
+    ngrams = list(words)
+    ngrams.extend(f"{words[i]} {words[i+1]}" for i in range(len(words) - 1))
+    ngrams.extend(f"{words[i]} {words[i+1]} {words[i+2]}" for i in range(len(words) - 2))
+    return [ngram for ngram in dict.fromkeys(ngrams) if len(ngram) >= 3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=10, help="number of documents")
+    parser.add_argument("--words", type=int, default=300, help="words per document")
+    parser.add_argument("--extra-aliases", type=int, default=0,
+                        help="synthetic aliases added to the dictionary")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    # extractBests warns for queries that process to an empty string
+    logging.disable(logging.WARNING)
+
+    keywords = list(load_skill_dictionary().keys())
+    keywords += make_aliases(load_skill_dictionary(), args.extra_aliases, args.seed)
+    documents = make_documents(keywords, args.docs, args.words, args.seed)
+    ngrams = [document_ngrams(words) for words in documents]
+
+    start = time.perf_counter()
+    index = FuzzyIndex(keywords)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [[index.best_match(ngram, score_cutoff=90) for ngram in doc] for doc in ngrams]
+    indexed_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    full_scan = []
+    for doc in ngrams:
+        results = []
+        for ngram in doc:
+            matches = process.extractBests(ngram, keywords, score_cutoff=90, limit=1)
+            results.append(matches[0] if matches else None)
+        full_scan.append(results)
+    full_scan_seconds = time.perf_counter() - start
+
+    mismatches = sum(
+        a != b
+        for doc_a, doc_b in zip(full_scan, indexed)
+        for a, b in zip(doc_a, doc_b)
+    )
+
+    results = {
+        "keywords": len(keywords),
+        "documents": len(documents),
+        "ngrams": sum(len(doc) for doc in ngrams),
+        "index_build_seconds": round(build_seconds, 4),
+        "full_scan_seconds": round(full_scan_seconds, 4),
+        "indexed_seconds": round(indexed_seconds, 4),
+        "speedup": round(full_scan_seconds / indexed_seconds, 1) if indexed_seconds else None,
+        "mismatches": mismatches,
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:>20}: {value}")
+
+    if mismatches:
+        raise SystemExit("indexed results differ from the full scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark the spaCy pipeline modes used by preprocessing.
+
+Runs preprocess_tokens over the same synthetic documents once per mode, each
+mode in its own process, and reports documents per second and the peak
+resident memory of the process. Fails if any mode produces different tokens
+from the full pipeline.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_nlp_modes --docs 200 --modes full lean blank
+"""
+import argparse
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.corpus import make_documents
+
+# Same as nlp_model.NLP_MODES; importing nlp_model here would read
+# JD_NLP_MODE before the workers pick their mode
+NLP_MODES = ("full", "lean", "blank", "fast")
+
+
+def run_worker(mode, docs, words, seed):
+    """Measure one mode inside the current process and print JSON"""
+    os.environ["JD_NLP_MODE"] = mode
+
+    start = time.perf_counter()
+    from preprocessing import preprocess_tokens
+    from skill_extractor import load_skill_dictionary
+    # The fast mode loads its tokenizer rules on first use
+    preprocess_tokens("warm up")
+    load_seconds = time.perf_counter() - start
+
+    keywords = list(load_skill_dictionary().keys())
+    documents = [" ".join(words) for words in make_documents(keywords, docs, words, seed)]
+
+    digest = hashlib.sha256()
+    start = time.perf_counter()
+    for text in documents:
+        digest.update(" ".join(preprocess_tokens(text)).encode("utf-8") + b"\n")
+    seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "mode": mode,
+        "load_seconds": round(load_seconds, 3),
+        "docs_per_second": round(len(documents) / seconds, 1) if seconds else None,
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "output_sha256": digest.hexdigest(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=100, help="number of documents")
+    parser.add_argument("--words", type=int, default=300, help="words per document")
+    parser.add_argument("--modes", nargs="+", default=list(NLP_MODES), choices=NLP_MODES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--worker", choices=NLP_MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.docs, args.words, args.seed)
+        return
+
+    results = []
+    for mode in args.modes:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_nlp_modes", "--worker", mode,
+             "--docs", str(args.docs), "--words", str(args.words), "--seed", str(args.seed)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(f"{result['mode']:>6}: {result['docs_per_second']} docs/s, "
+                  f"{result['peak_rss_mb']} MB peak RSS, "
+                  f"{result['load_seconds']} s model load")
+
+    if len({result["output_sha256"] for result in results}) > 1:
+        raise SystemExit("pipeline modes produced different preprocessing output")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark the preprocess -> extract -> categorize pipeline.
+
+Runs the stages over a synthetic corpus from benchmarks.corpus and reports
+per-stage latency percentiles, documents per second, peak memory and how
+extraction cost scales with the size of the skill dictionary. Results can be
+written to JSON and compared against an earlier run.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pipeline --docs 200 -o bench.json
+    python -m benchmarks.bench_pipeline --docs 200 --compare bench.json
+"""
+import argparse
+import json
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.corpus import make_corpus, make_skill_dict
+from knowledge_base import KnowledgeBase
+from nlp_model import nlp_mode
+from preprocessing import preprocess_tokens
+from skill_categorizer import categorize_skills, load_skill_categories
+from skill_extractor import extract_skills_from_words
+
+STAGES = ("preprocess", "extract", "categorize")
+
+
+def percentiles(samples):
+    """Latency summary in milliseconds"""
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(pick(0.50), 3),
+        "p90_ms": round(pick(0.90), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def bench_stages(documents, knowledge_base):
+    """Time every stage of every document"""
+    timings = {stage: [] for stage in STAGES}
+    start = time.perf_counter()
+
+    for text in documents:
+        t0 = time.perf_counter()
+        words = preprocess_tokens(text)
+        t1 = time.perf_counter()
+        skills = extract_skills_from_words(words, knowledge_base)
+        t2 = time.perf_counter()
+        categorize_skills(skills, knowledge_base)
+        t3 = time.perf_counter()
+
+        timings["preprocess"].append(t1 - t0)
+        timings["extract"].append(t2 - t1)
+        timings["categorize"].append(t3 - t2)
+
+    seconds = time.perf_counter() - start
+
+    return {
+        "stages": {stage: percentiles(samples) for stage, samples in timings.items()},
+        "docs_per_second": round(len(documents) / seconds, 1),
+    }
+
+
+def bench_memory(documents, knowledge_base):
+    """Peak Python heap use of the pipeline, in a separate untimed pass"""
+    tracemalloc.start()
+    for text in documents:
+        skills = extract_skills_from_words(preprocess_tokens(text), knowledge_base)
+        categorize_skills(skills, knowledge_base)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(peak_bytes / 1024 / 1024, 2)
+
+
+def bench_scaling(documents, extra_aliases, seed):
+    """Extraction throughput for growing dictionaries"""
+    categories = load_skill_categories()
+    token_lists = [preprocess_tokens(text) for text in documents]
+    results = []
+    for extra in extra_aliases:
+        skill_dict = make_skill_dict(extra, seed)
+
+        start = time.perf_counter()
+        knowledge_base = KnowledgeBase(skill_dict, categories)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for words in token_lists:
+            extract_skills_from_words(words, knowledge_base)
+        seconds = time.perf_counter() - start
+
+        results.append({
+            "aliases": len(skill_dict),
+            "build_seconds": round(build_seconds, 4),
+            "extract_docs_per_second": round(len(token_lists) / seconds, 1),
+        })
+    return results
+
+
+def compare(current, baseline, tolerance):
+    """Throughput and latency regressions beyond tolerance, as messages"""
+    regressions = []
+    if current["docs_per_second"] < baseline["docs_per_second"] * (1 - tolerance):
+        regressions.append(
+            f"docs_per_second {current['docs_per_second']} < baseline {baseline['docs_per_second']}"
+        )
+    for stage in STAGES:
+        now = current["stages"][stage]["p50_ms"]
+        before = baseline["stages"][stage]["p50_ms"]
+        if now > before * (1 + tolerance) and now - before > 0.05:
+            regressions.append(f"{stage} p50 {now} ms > baseline {before} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=100, help="number of documents")
+    parser.add_argument("--words", type=int, default=300, help="words per document")
+    parser.add_argument("--density", type=float, default=0.1, help="share of skill aliases")
+    parser.add_argument("--dict-sizes", type=int, nargs="*", default=[0, 1000, 5000],
+                        metavar="EXTRA", help="synthetic aliases added for the scaling runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="fail on regressions against a JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown against the baseline (default: 0.2)")
+    args = parser.parse_args()
+
+    documents = make_corpus(args.docs, args.words, args.density, args.seed)
+    knowledge_base = KnowledgeBase(make_skill_dict(0), load_skill_categories())
+
+    # Warm up the model and the lexeme cache
+    for text in documents[:5]:
+        preprocess_tokens(text)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "nlp_mode": nlp_mode,
+            "docs": args.docs,
+            "words": args.words,
+            "density": args.density,
+            "seed": args.seed,
+        },
+    }
+    results.update(bench_stages(documents, knowledge_base))
+    results["peak_traced_mb"] = bench_memory(documents, knowledge_base)
+    results["scaling"] = bench_scaling(documents, args.dict_sizes, args.seed)
+    # ru_maxrss is reported in kilobytes on Linux
+    results["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"regression: {message}", file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark the SQLite results store.
+
+Writes synthetic analyze_text results drawn from the skill dictionary (skill
+popularity following a power law, like real postings) through ResultsWriter,
+then times the indexed queries: documents requiring two or three skills of a
+given popularity rank and the top skills of a category over the last week.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_results_store --docs 200000
+    python -m benchmarks.bench_results_store --docs 50000 --rank 0 --json
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from knowledge_base import get_knowledge_base
+from results_store import ResultsStore, ResultsWriter
+
+DAY = 86400
+
+
+def make_results(count, skills_per_doc, seed=0):
+    """
+    Synthetic results over the last 30 days
+
+    Returns:
+        tuple: (created, result) pairs oldest first, skills from most to
+            least popular and the category of every skill
+    """
+    knowledge_base = get_knowledge_base()
+    rng = random.Random(seed)
+    skills = sorted(set(knowledge_base.skill_names))
+    rng.shuffle(skills)
+    weights = [1 / (rank + 1) for rank in range(len(skills))]
+    category_of = {
+        skill: knowledge_base.category_names[knowledge_base.skill_category_ids[i]]
+        for i, skill in enumerate(knowledge_base.skill_names)
+    }
+
+    now = time.time()
+    results = []
+    for i in range(count):
+        chosen = sorted(set(rng.choices(skills, weights, k=skills_per_doc)))
+        categories = {}
+        for skill in chosen:
+            categories.setdefault(category_of[skill], []).append(skill)
+        results.append((now - 30 * DAY * (1 - i / count), {"skills": chosen, "categories": categories}))
+    return results, skills, category_of
+
+
+def best_of(repeats, query):
+    """Fastest of several runs of a query, in milliseconds"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = query()
+        times.append(time.perf_counter() - start)
+    return round(min(times) * 1000, 2), output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=100_000, help="number of stored results")
+    parser.add_argument("--skills-per-doc", type=int, default=12)
+    parser.add_argument("--rank", type=int, default=10,
+                        help="popularity rank of the skills queried together")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    records, skills, category_of = make_results(args.docs, args.skills_per_doc)
+    queried = skills[args.rank:args.rank + 3]
+    category = category_of[queried[0]]
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultsStore(os.path.join(directory, "results.sqlite3"))
+
+        start = time.perf_counter()
+        writer = ResultsWriter(store)
+        for offset, (created, result) in enumerate(records):
+            writer.write(offset, offset, result, created=created)
+        queued_seconds = time.perf_counter() - start
+        writer.close()
+        write_seconds = time.perf_counter() - start
+
+        week_ago = time.time() - 7 * DAY
+        two_ms, two = best_of(args.repeats, lambda: store.documents_with_skills(queried[:2]))
+        three_ms, three = best_of(args.repeats, lambda: store.documents_with_skills(queried, since=week_ago))
+        top_ms, top = best_of(args.repeats, lambda: store.top_skills(category, since=week_ago))
+        size = os.path.getsize(store.path)
+        store.close()
+
+    results = {
+        "documents": args.docs,
+        "write_seconds": round(write_seconds, 2),
+        "documents_per_second": round(args.docs / write_seconds),
+        "queue_seconds": round(queued_seconds, 2),
+        "database_mb": round(size / 1e6, 1),
+        f"with {' & '.join(queried[:2])}": {"ms": two_ms, "documents": len(two)},
+        f"with {' & '.join(queried)}, last week": {"ms": three_ms, "documents": len(three)},
+        f"top skills of {category}, last week": {"ms": top_ms, "top": top[:3]},
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for key, value in results.items():
+            print(f"{key:>40}: {value}")
+
+
+if __name__ == "__main__":
+    main()
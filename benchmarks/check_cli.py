@@ -0,0 +1,81 @@
+"""
+Check that cli.py --skip-errors gets past corrupt JSONL lines.
+
+Runs cli.main on a JSONL file mixing good records with a truncated line,
+plain text, a JSON array and a record whose text is not a string. With
+--skip-errors every line must produce an output record at its offset (the
+bad ones with no skills) and every bad line must be reported on stderr with
+its line number; without it the run must stop with an error.
+
+Run from the repository root:
+
+    python -m benchmarks.check_cli
+    JD_NLP_MODE=fast python -m benchmarks.check_cli
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+
+import cli
+
+LINES = [
+    '{"id": "a", "text": "Python and AWS developer"}',
+    '{"id": "b", "text": "Java and Kuber',
+    'not json at all',
+    '[1, 2, 3]',
+    '{"id": "e", "text": 42}',
+    '',
+    '{"id": "g", "text": "SQL and Docker"}',
+]
+
+# Line numbers of the lines that must be reported
+BAD_LINES = [2, 3, 4, 5]
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.split("\n\n")[0]).parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "postings.jsonl")
+        output = os.path.join(directory, "skills.jsonl")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write("\n".join(LINES) + "\n")
+
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            cli.main([source, "-o", output, "--skip-errors"])
+        with open(output, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                cli.main([source, "-o", output])
+        except ValueError:
+            stopped = True
+        else:
+            stopped = False
+
+    failures = []
+    if [record["offset"] for record in records] != list(range(len(LINES))):
+        failures.append(f"expected one record per line, got offsets {[r['offset'] for r in records]}")
+    for line_number in BAD_LINES:
+        if f": line {line_number}: " not in stderr.getvalue():
+            failures.append(f"line {line_number} was not reported")
+        elif records[line_number - 1]["skills"]:
+            failures.append(f"line {line_number} has skills")
+    if not records or "python" not in records[0]["skills"] or "sql" not in records[-1]["skills"]:
+        failures.append("good lines around the bad ones were not analyzed")
+    if not stopped:
+        failures.append("without --skip-errors the run did not stop")
+
+    print(stderr.getvalue(), end="")
+    print(f"{len(records)} records, {len(failures)} failures")
+    if failures:
+        raise SystemExit("cli.py does not handle corrupt JSONL lines:\n  " + "\n  ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Check preprocessing against a golden corpus and time it against the original.
+
+The golden corpus (benchmarks/golden_preprocess.jsonl) holds job description
+texts with the tokens the original implementation kept: three chained
+re.sub calls followed by spaCy tokenization and filtering. The check runs
+the current preprocess_tokens (in the mode selected with JD_NLP_MODE) and the
+spaCy-free fast path over it, fails on any difference and reports the time
+per document of each.
+
+Run from the repository root:
+
+    python -m benchmarks.check_preprocess
+    JD_NLP_MODE=fast python -m benchmarks.check_preprocess
+    python -m benchmarks.check_preprocess --regenerate   # needs spaCy
+"""
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+from benchmarks.corpus import make_corpus
+from normalizer import get_fast_tokenizer, normalize_text
+
+golden_path = Path(__file__).resolve().parent / "golden_preprocess.jsonl"
+
+# Hand-picked cases for tokenizer rules and the URL/email stripping
+EDGE_CASES = [
+    "CI/CD pipelines, scikit-learn & Node.js (C#/C++), e.g. 5+ years.",
+    "Don't worry, it's $120k/yr; 24/7 on-call, 10GB quotas, UI/UX.NET",
+    "Python,Java 3-5 years \"quoted\" #hashtag co-op 1st 2nd-level e-mail",
+    "U.S. etc. i.e. vs. a.m. Mr. Jan. :) <3 (e.g., foo) I'm we're",
+    "Apply at https://jobs.example.com/123 or send your CV to hr@example.com today",
+    "xhttp://a@b kept?  a@bhttp://c d  http alone, mail:me@x.io\tnext\nline",
+    "Familiar with AWS (EC2/S3), GCP & Azure; Kubernetes/Docker; REST APIs...",
+    "   leading and trailing whitespace   ",
+    "Skills: python/r. java,c. a/b/c. (e.g. x/u.s. :)%p c++/c. r.,",
+    "Emoticons: =(\\... [ =(x ( :)e.g.+ ] =('s [ :(y [ =)z; < :-(d e.g. :(",
+    "",
+]
+
+
+def reference_preprocess(nlp, text):
+    """The original preprocess_text implementation, returning its tokens"""
+    if not text:
+        return []
+    text = text.lower()
+    text = re.sub(r'http\S+', '', text)
+    text = re.sub(r'\S*@\S*\s?', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    excluded_stop_words = {'a', 'an', 'the', 'is', 'was', 'were', 'be', 'been', 'being'}
+    return [
+        token.text for token in nlp(text)
+        if not token.is_punct and not token.is_space
+        and not (token.is_stop and token.text in excluded_stop_words)
+        and not token.like_num
+    ]
+
+
+def regenerate(docs, words, seed):
+    """Rebuild the golden corpus with the reference implementation"""
+    import spacy
+
+    nlp = spacy.blank("en")
+    texts = EDGE_CASES + make_corpus(docs, words, seed=seed)
+    with open(golden_path, "w", encoding="utf-8") as f:
+        for text in texts:
+            record = {"text": text, "tokens": reference_preprocess(nlp, text)}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(f"wrote {len(texts)} documents to {golden_path}")
+
+
+def check(name, preprocess, golden):
+    """Compare one implementation with the golden tokens"""
+    start = time.perf_counter()
+    outputs = [preprocess(record["text"]) for record in golden]
+    seconds = time.perf_counter() - start
+
+    mismatches = [
+        record["text"] for record, tokens in zip(golden, outputs)
+        if tokens != record["tokens"]
+    ]
+    per_doc_ms = seconds / len(golden) * 1000
+    print(f"{name:>16}: {len(mismatches)} mismatches, {per_doc_ms:.3f} ms/doc")
+    for text in mismatches[:5]:
+        print(f"    {text[:100]!r}")
+    return not mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--regenerate", action="store_true",
+                        help="rebuild the golden corpus with the original implementation")
+    parser.add_argument("--docs", type=int, default=30, help="synthetic documents when regenerating")
+    parser.add_argument("--words", type=int, default=150, help="words per synthetic document")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.regenerate:
+        regenerate(args.docs, args.words, args.seed)
+        return
+
+    with open(golden_path, encoding="utf-8") as f:
+        golden = [json.loads(line) for line in f]
+
+    from preprocessing import preprocess_tokens
+
+    tokenizer = get_fast_tokenizer()
+    ok = check("preprocess_tokens", preprocess_tokens, golden)
+    ok &= check("fast", lambda text: tokenizer.preprocess(normalize_text(text)), golden)
+
+    if not ok:
+        raise SystemExit("preprocessing output differs from the golden corpus")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Check that the HTTP service answers malformed requests instead of dropping them.
+
+Starts an ExtractionService on a free local port and sends raw requests that
+used to escape the handler: bodies that are not UTF-8 or not JSON objects,
+invalid Content-Length values, header and request lines over the stream
+limit and requests with more texts than the queue holds. Every one must get
+a complete JSON response with the expected status. None of them reaches the
+worker pool, so no model is loaded.
+
+Run from the repository root:
+
+    python -m benchmarks.check_service
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from service import ExtractionService, MicroBatcher
+
+# Default line limit of asyncio streams
+STREAM_LIMIT = 1 << 16
+
+MAX_QUEUE = 4
+
+
+def post(body, headers=None):
+    """Raw POST /extract request with a correct Content-Length unless overridden"""
+    head = {"Content-Length": str(len(body)), "Connection": "close", **(headers or {})}
+    lines = "".join(f"{name}: {value}\r\n" for name, value in head.items())
+    return f"POST /extract HTTP/1.1\r\n{lines}\r\n".encode("latin-1") + body
+
+
+# (description, raw request, expected status)
+CASES = [
+    ("invalid UTF-8 body", post(b'{"text": "\xff\xfe\xc3("}'), 400),
+    ("binary body", post(bytes(range(256))), 400),
+    ("JSON array body", post(b"[1, 2]"), 400),
+    ("JSON string body", post(b'"abc"'), 400),
+    ("non-numeric Content-Length", post(b"{}", {"Content-Length": "abc"}), 400),
+    ("negative Content-Length", post(b"", {"Content-Length": "-5"}), 400),
+    ("header line over the limit", post(b"{}", {"X-Padding": "a" * (STREAM_LIMIT + 10)}), 431),
+    ("request line over the limit", b"GET /" + b"a" * (STREAM_LIMIT + 10) + b" HTTP/1.1\r\n\r\n", 431),
+    ("more texts than the queue holds", post(json.dumps({"texts": ["x"] * (MAX_QUEUE + 1)}).encode()), 413),
+]
+
+
+async def send(port, request):
+    """Send one raw request and read the whole response"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout=10)
+    finally:
+        writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    if not head:
+        return None, None
+    status = int(head.split()[1])
+    return status, json.loads(body)
+
+
+async def run_checks():
+    executor = ThreadPoolExecutor(max_workers=1)
+    batcher = MicroBatcher(executor, workers=1, max_queue=MAX_QUEUE)
+    service = ExtractionService(batcher, workers=0)
+    server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    failures = []
+    async with server:
+        for description, request, expected in CASES:
+            status, payload = await send(port, request)
+            ok = status == expected and isinstance(payload, dict) and "error" in payload
+            print(f"{description:>32}: {status} {payload}")
+            if not ok:
+                failures.append(f"{description}: expected {expected}, got {status}")
+    executor.shutdown()
+    return failures
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__.split("\n\n")[0]).parse_args()
+    failures = asyncio.run(run_checks())
+    if failures:
+        raise SystemExit("malformed requests not answered:\n  " + "\n  ".join(failures))
+
+
+if __name__ == "__main__":
+    main()
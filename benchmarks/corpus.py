@@ -0,0 +1,121 @@
+"""
+Deterministic synthetic job descriptions for benchmarks.
+
+Documents are built from filler sentences with skill aliases from
+DEFAULT_SKILL_DICT inserted at a controlled density, plus the noise real
+postings carry (URLs, email addresses, numbers, punctuation, casing). The
+same seed always produces the same corpus.
+
+Write a corpus to JSONL (usable with cli.py) from the repository root:
+
+    python -m benchmarks.corpus --docs 1000 --words 400 -o corpus.jsonl
+"""
+import argparse
+import json
+import random
+import string
+import sys
+
+from skill_extractor import DEFAULT_SKILL_DICT
+
+FILLER_WORDS = (
+    "we are looking for a senior engineer with strong experience in building "
+    "scalable services and working closely with product design and data teams "
+    "you will own features end to end mentor others and improve our platform"
+).split()
+
+NOISE = (
+    "apply at https://careers.example.com/jobs/{n}",
+    "send your resume to jobs{n}@example.com",
+    "{n}+ years of experience",
+    "salary: ${n},000 - ${m},000",
+)
+
+
+def make_aliases(skill_dict, count, seed):
+    """Synthetic misspelled aliases to emulate a larger dictionary"""
+    rng = random.Random(seed)
+    keys = list(skill_dict)
+    aliases = []
+    while len(aliases) < count:
+        chars = list(rng.choice(keys))
+        for _ in range(rng.randint(1, 3)):
+            chars.insert(rng.randrange(len(chars) + 1), rng.choice(string.ascii_lowercase))
+        aliases.append("".join(chars))
+    return aliases
+
+
+def make_skill_dict(extra_aliases, seed=0):
+    """DEFAULT_SKILL_DICT grown with synthetic aliases of existing skills"""
+    skill_dict = dict(DEFAULT_SKILL_DICT)
+    rng = random.Random(seed)
+    canonicals = list(DEFAULT_SKILL_DICT.values())
+    for alias in make_aliases(DEFAULT_SKILL_DICT, extra_aliases, seed):
+        skill_dict.setdefault(alias, rng.choice(canonicals))
+    return skill_dict
+
+
+def make_documents(keywords, count, words_per_doc, seed, density=0.1):
+    """Deterministic job-description-like word lists seeded with aliases"""
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(count):
+        words = []
+        while len(words) < words_per_doc:
+            if rng.random() < density:
+                words.extend(rng.choice(keywords).split())
+            else:
+                words.append(rng.choice(FILLER_WORDS))
+        documents.append(words)
+    return documents
+
+
+def make_corpus(count, words_per_doc=300, density=0.1, seed=0, skill_dict=None):
+    """
+    Generate raw job description texts
+
+    Args:
+        count (int): Number of documents
+        words_per_doc (int): Approximate length of each document in words
+        density (float): Probability that a word slot holds a skill alias
+        seed (int): Random seed
+        skill_dict (dict): Aliases to draw from, DEFAULT_SKILL_DICT by default
+
+    Returns:
+        list: Document texts
+    """
+    rng = random.Random(seed)
+    keywords = list(skill_dict or DEFAULT_SKILL_DICT)
+    documents = []
+    for words in make_documents(keywords, count, words_per_doc, seed, density):
+        pieces = []
+        for i, word in enumerate(words):
+            if rng.random() < 0.05:
+                word = word.capitalize()
+            pieces.append(word)
+            if i % 15 == 14:
+                pieces[-1] += rng.choice(".,;")
+            if rng.random() < 0.01:
+                pieces.append(rng.choice(NOISE).format(n=rng.randint(1, 99), m=rng.randint(100, 200)))
+        documents.append(" ".join(pieces))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--docs", type=int, default=100, help="number of documents")
+    parser.add_argument("--words", type=int, default=300, help="words per document")
+    parser.add_argument("--density", type=float, default=0.1, help="share of skill aliases")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="output JSONL file (default: stdout)")
+    args = parser.parse_args()
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    for i, text in enumerate(make_corpus(args.docs, args.words, args.density, args.seed)):
+        out.write(json.dumps({"id": i, "text": text}) + "\n")
+    if out is not sys.stdout:
+        out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Extract and categorize skills from job descriptions without the Streamlit UI.
+
+Inputs can be directories, glob patterns, .txt/.pdf/.docx files, JSONL or CSV
+files with one job description per record, or "-" for stdin. Results are
+written as they are produced, one record per job description, so memory use
+does not grow with the size of the corpus.
+
+Examples:
+
+    python cli.py jds/ -o skills.jsonl --workers 4
+    python cli.py "postings/**/*.pdf" --format csv -o skills.csv
+    python cli.py postings.jsonl -o skills.jsonl --resume-from 120000
+    python cli.py feed.jsonl -o skills.jsonl --dedup-threshold 0.8
+    python cli.py postings.jsonl -o skills.jsonl --store results.sqlite3
+    cat postings.txt | python cli.py - > skills.jsonl
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from collections import deque
+from itertools import islice
+from pathlib import Path
+
+from near_duplicates import NearDuplicateFilter
+from pipeline import analyze_batch
+from result_cache import ResultCache
+from results_store import ResultsStore, ResultsWriter
+
+# Extensions read through utils.get_file_text
+DOCUMENT_EXTENSIONS = (".txt", ".pdf", ".docx")
+
+
+def read_document(path):
+    """
+    Read the text of a .txt, .pdf or .docx file
+
+    Args:
+        path (str): Path of the file
+
+    Returns:
+        str: Extracted text
+    """
+    # Imported on first use so JSONL/CSV runs do not load the PDF/DOCX readers
+    from utils import get_file_text
+    return get_file_text(path)
+
+
+def _document_paths(pattern):
+    """Files matched by a directory, glob pattern or single path, sorted"""
+    if os.path.isdir(pattern):
+        paths = (str(path) for path in Path(pattern).rglob("*") if path.is_file())
+    elif glob.has_magic(pattern):
+        paths = (path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    else:
+        return [pattern]
+    return sorted(path for path in paths if path.lower().endswith(DOCUMENT_EXTENSIONS))
+
+
+def _json_record(line, line_number, text_field, id_field):
+    """
+    (id, loader) pair for one JSONL line
+
+    A line that is not a JSON object with a string text keeps its line
+    number as id and gets a loader raising the error, so that it is
+    reported through run()'s on_error like any unreadable document.
+    """
+    try:
+        record = json.loads(line) if line.strip() else {}
+        if not isinstance(record, dict):
+            raise ValueError(f"expected a JSON object, got {type(record).__name__}")
+        text = record.get(text_field) or ""
+        if not isinstance(text, str):
+            raise ValueError(f"{text_field!r} is not a string")
+    except ValueError as e:
+        error = ValueError(f"line {line_number}: {e}")
+
+        def fail():
+            raise error
+        return line_number, fail
+    return record.get(id_field, line_number), (lambda: text)
+
+
+def iter_documents(inputs, text_field="text", id_field="id", stdin_format="text"):
+    """
+    Iterate over the job descriptions of all inputs
+
+    Files are only read when the returned loader is called, so documents
+    skipped on resume are never opened.
+
+    Args:
+        inputs (list): Directories, glob patterns, files or "-" for stdin
+        text_field (str): JSONL key or CSV column holding the text
+        id_field (str): JSONL key or CSV column holding the document id
+        stdin_format (str): "text" for one document per line, or "jsonl"
+
+    Yields:
+        tuple: (document id, loader returning the text)
+    """
+    for source in inputs:
+        if source == "-":
+            for line_number, line in enumerate(sys.stdin, 1):
+                if stdin_format == "jsonl":
+                    yield _json_record(line, line_number, text_field, id_field)
+                else:
+                    yield line_number, (lambda text=line: text)
+            continue
+
+        lower = source.lower()
+        if lower.endswith(".jsonl"):
+            with open(source, encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    yield _json_record(line, line_number, text_field, id_field)
+        elif lower.endswith(".csv"):
+            with open(source, newline="", encoding="utf-8") as f:
+                for row_number, row in enumerate(csv.DictReader(f), 1):
+                    text = row.get(text_field) or ""
+                    yield row.get(id_field) or row_number, (lambda text=text: text)
+        else:
+            for path in _document_paths(source):
+                yield path, (lambda path=path: read_document(path))
+
+
+class JsonlWriter:
+    """Writes one JSON object per result"""
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, offset, doc_id, result):
+        record = {"offset": offset, "id": doc_id}
+        record.update(result)
+        self.f.write(json.dumps(record) + "\n")
+
+
+class CsvWriter:
+    """Writes one CSV row per result, with skills joined by semicolons"""
+
+    def __init__(self, f, write_header=True):
+        self.writer = csv.writer(f)
+        if write_header:
+            self.writer.writerow(["offset", "id", "skills", "categories"])
+
+    def write(self, offset, doc_id, result):
+        self.writer.writerow([
+            offset,
+            doc_id,
+            ";".join(sorted(result["skills"])),
+            json.dumps(result["categories"]),
+        ])
+
+
+class TeeWriter:
+    """Passes every result to several writers"""
+
+    def __init__(self, *writers):
+        self.writers = writers
+
+    def write(self, offset, doc_id, result):
+        for writer in self.writers:
+            writer.write(offset, doc_id, result)
+
+
+def run(documents, writer, resume_from=0, chunk_size=64, workers=1, on_error=None, cache=None, dedup=None):
+    """
+    Analyze documents and stream the results to a writer
+
+    Args:
+        documents (iterable): (id, loader) pairs from iter_documents
+        writer: JsonlWriter or CsvWriter
+        resume_from (int): Number of leading documents to skip
+        chunk_size (int): Documents per processing chunk
+        workers (int): Number of worker processes
+        on_error (callable): Called with (offset, id, exception) when a
+            document cannot be read; it is then analyzed as empty text
+        cache (ResultCache): Optional result cache
+        dedup (NearDuplicateFilter): Optional filter answering near-duplicate
+            documents with the result of an earlier similar one
+
+    Returns:
+        int: Offset of the next unprocessed document
+    """
+    # Ids of documents handed to the pipeline but not written yet. The
+    # pipeline yields in input order, so they come back first in, first out.
+    in_flight = deque()
+
+    def texts():
+        for offset, (doc_id, load) in enumerate(islice(documents, resume_from, None), resume_from):
+            try:
+                text = load()
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(offset, doc_id, e)
+                text = ""
+            in_flight.append((offset, doc_id))
+            yield text
+
+    analyze = dedup.analyze_batch if dedup is not None else analyze_batch
+    offset = resume_from
+    for result in analyze(texts(), batch_size=chunk_size, n_process=workers, cache=cache):
+        offset, doc_id = in_flight.popleft()
+        writer.write(offset, doc_id, result)
+        offset += 1
+
+    return offset
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        epilog="\n\n".join(__doc__.split("\n\n")[1:]),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("inputs", nargs="+",
+                        help='directories, glob patterns, .txt/.pdf/.docx/.jsonl/.csv files, or "-" for stdin')
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="output format (default: from the output extension, else jsonl)")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=64, help="documents per processing chunk")
+    parser.add_argument("--resume-from", type=int, default=0, metavar="OFFSET",
+                        help="skip the first OFFSET documents and append to the output")
+    parser.add_argument("--text-field", default="text", help="JSONL key or CSV column with the text")
+    parser.add_argument("--id-field", default="id", help="JSONL key or CSV column with the document id")
+    parser.add_argument("--stdin-format", choices=["text", "jsonl"], default="text",
+                        help="stdin holds one document per line as plain text or JSONL")
+    parser.add_argument("--cache-dir",
+                        help="reuse results of identical texts from this persistent cache")
+    parser.add_argument("--skip-errors", action="store_true",
+                        help="report unreadable documents on stderr instead of stopping")
+    parser.add_argument("--dedup-threshold", type=float, metavar="SIMILARITY",
+                        help="reuse the result of an earlier document whose text is at least "
+                             "this similar (0-1, e.g. 0.8) instead of analyzing it again")
+    parser.add_argument("--dedup-audit", type=float, default=0.01, metavar="FRACTION",
+                        help="share of near-duplicates analyzed anyway to measure false merges "
+                             "(default: %(default)s)")
+    parser.add_argument("--store", metavar="PATH",
+                        help="also write the results to this SQLite results store for querying "
+                             "with results_store.py")
+    args = parser.parse_args(argv)
+
+    output_format = args.format
+    if output_format is None:
+        output_format = "csv" if args.output and args.output.lower().endswith(".csv") else "jsonl"
+
+    appending = args.resume_from > 0
+    if args.output:
+        out = open(args.output, "a" if appending else "w", newline="", encoding="utf-8")
+    else:
+        out = sys.stdout
+
+    if output_format == "csv":
+        writer = CsvWriter(out, write_header=not appending)
+    else:
+        writer = JsonlWriter(out)
+
+    store_writer = None
+    if args.store:
+        # Written from a background thread, in batches
+        store_writer = ResultsWriter(ResultsStore(args.store))
+        writer = TeeWriter(writer, store_writer)
+
+    def report_error(offset, doc_id, e):
+        print(f"offset {offset} ({doc_id}): {e}", file=sys.stderr)
+
+    dedup = None
+    if args.dedup_threshold is not None:
+        dedup = NearDuplicateFilter(args.dedup_threshold, audit_fraction=args.dedup_audit)
+
+    documents = iter_documents(args.inputs, args.text_field, args.id_field, args.stdin_format)
+    try:
+        next_offset = run(
+            documents,
+            writer,
+            resume_from=args.resume_from,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            on_error=report_error if args.skip_errors else None,
+            cache=ResultCache(directory=args.cache_dir) if args.cache_dir else None,
+            dedup=dedup,
+        )
+    except KeyboardInterrupt:
+        out.flush()
+        print("Interrupted; rerun with --resume-from set to the offset after the "
+              "last written record to continue.", file=sys.stderr)
+        raise SystemExit(130)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if store_writer is not None:
+            # Everything written to the output is committed to the store too
+            store_writer.close()
+            store_writer.store.close()
+
+    print(f"Processed up to offset {next_offset}", file=sys.stderr)
+    if dedup is not None:
+        stats = dedup.stats()
+        print(f"Near-duplicates: skipped {stats['skipped']} of {stats['documents']} documents "
+              f"(skip ratio {stats['skip_ratio']:.1%}), {stats['false_merges']} false merges "
+              f"in {stats['audited']} audited (rate {stats['false_merge_rate']:.1%})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,521 @@
+"""
+Skill frequency and co-occurrence analytics over a corpus of job descriptions.
+
+Extraction results are streamed into a sparse document x skill matrix in CSR
+form (plain NumPy arrays) from which skill and category frequencies, skill
+co-occurrence, PMI and related skills are computed with vectorized
+operations. The co-occurrence matrix of a large vocabulary is sparse and
+needs SciPy; related skills are computed without it. Matrices are saved as
+.npz files for reuse, e.g. by the Streamlit app (set JD_CORPUS_MATRIX to
+the file).
+
+Examples:
+
+    python cli.py postings.jsonl -o skills.jsonl --workers 4
+    python corpus_analytics.py build skills.jsonl -o corpus.npz
+    python corpus_analytics.py report corpus.npz --top 20 --related python
+"""
+import argparse
+import csv
+import json
+from array import array
+from functools import cached_property
+
+import numpy as np
+
+from knowledge_base import get_knowledge_base
+
+# Documents expanded to a dense block at a time for per-document counts;
+# block counts stay far below 2**24, so float32 matrix products are exact
+BLOCK_ROWS = 4096
+
+# Vocabularies up to this size get a dense co-occurrence matrix (32 MB);
+# larger ones a scipy.sparse matrix holding only the pairs seen together
+DENSE_COOCCURRENCE_SKILLS = 2048
+
+
+class SkillMatrix:
+    """
+    Document x skill incidence matrix in CSR form.
+
+    The skills of document d are ``indices[indptr[d]:indptr[d + 1]]``, sorted
+    and without duplicates. Skill ids index skill_names; skill_category_ids
+    gives the category id (into category_names) of every skill.
+    """
+
+    def __init__(self, indptr, indices, skill_names, category_names, skill_category_ids,
+                 version=None, cooccurrence=None):
+        """
+        Wrap CSR arrays
+
+        Args:
+            indptr (ndarray): Row offsets, one more than the number of documents
+            indices (ndarray): Skill ids of all documents, row after row
+            skill_names (sequence): Name of every skill id
+            category_names (sequence): Name of every category id
+            skill_category_ids (ndarray): Category id of every skill id
+            version (str): Knowledge base version the ids were assigned from
+            cooccurrence: Precomputed co-occurrence counts, if saved, as an
+                ndarray or a scipy.sparse matrix
+        """
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices)
+        self.skill_names = tuple(skill_names)
+        self.category_names = tuple(category_names)
+        self.skill_category_ids = np.asarray(skill_category_ids, dtype=np.intp)
+        self.version = version
+        self.skill_ids = {name: i for i, name in enumerate(self.skill_names)}
+        if cooccurrence is not None:
+            self.__dict__["cooccurrence"] = cooccurrence if hasattr(cooccurrence, "tocsr") else np.asarray(cooccurrence)
+
+    @property
+    def n_documents(self):
+        return len(self.indptr) - 1
+
+    @property
+    def n_skills(self):
+        return len(self.skill_names)
+
+    def row(self, document):
+        """Skill ids of one document"""
+        return self.indices[self.indptr[document]:self.indptr[document + 1]]
+
+    def _blocks(self):
+        """
+        Split the documents into blocks of BLOCK_ROWS
+
+        Yields:
+            tuple: (start, stop, rows, skills) where rows and skills are the
+                row within the block and the skill id of every entry
+        """
+        for start in range(0, self.n_documents, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, self.n_documents)
+            rows = np.repeat(np.arange(stop - start), np.diff(self.indptr[start:stop + 1]))
+            yield start, stop, rows, self.indices[self.indptr[start]:self.indptr[stop]]
+
+    def skill_frequency(self):
+        """
+        Number of documents mentioning each skill
+
+        Returns:
+            ndarray: Count per skill id
+        """
+        return np.bincount(self.indices, minlength=self.n_skills)
+
+    def category_frequency(self):
+        """
+        Number of documents mentioning at least one skill of each category
+
+        Returns:
+            ndarray: Count per category id
+        """
+        n_categories = len(self.category_names)
+        counts = np.zeros(n_categories, dtype=np.int64)
+        for start, stop, rows, skills in self._blocks():
+            block = np.zeros((stop - start, n_categories), dtype=bool)
+            block[rows, self.skill_category_ids[skills]] = True
+            counts += block.sum(axis=0)
+        return counts
+
+    def category_counts(self):
+        """
+        Number of skills of each category in every document
+
+        Returns:
+            ndarray: Counts of shape (documents, categories)
+        """
+        n_categories = len(self.category_names)
+        counts = np.zeros((self.n_documents, n_categories), dtype=np.int32)
+        for start, stop, rows, skills in self._blocks():
+            block = np.bincount(rows * n_categories + self.skill_category_ids[skills],
+                                minlength=(stop - start) * n_categories)
+            counts[start:stop] = block.reshape(stop - start, n_categories)
+        return counts
+
+    def category_shares(self):
+        """
+        Share of all skill mentions falling into each category
+
+        Returns:
+            ndarray: Fraction per category id, summing to 1 (all zero for an
+                empty corpus)
+        """
+        counts = np.bincount(self.skill_category_ids[self.indices], minlength=len(self.category_names))
+        total = counts.sum()
+        return counts / total if total else counts.astype(np.float64)
+
+    @cached_property
+    def cooccurrence(self):
+        """
+        Number of documents mentioning each pair of skills
+
+        Up to DENSE_COOCCURRENCE_SKILLS skills the counts are a dense array.
+        Beyond that they are computed as the sparse product X.T @ X of the
+        document x skill matrix, which needs SciPy; most pairs of a large
+        vocabulary never occur together.
+
+        Returns:
+            ndarray or csr_matrix: Symmetric n_skills x n_skills counts; the
+                diagonal holds skill_frequency()
+        """
+        n_skills = self.n_skills
+        if n_skills > DENSE_COOCCURRENCE_SKILLS:
+            incidence = self.to_scipy().astype(np.int64)
+            return (incidence.T @ incidence).tocsr()
+
+        counts = np.zeros((n_skills, n_skills), dtype=np.int64)
+        for start, stop, rows, skills in self._blocks():
+            block = np.zeros((stop - start, n_skills), dtype=np.float32)
+            block[rows, skills] = 1
+            counts += (block.T @ block).astype(np.int64)
+        return counts
+
+    def cooccurrence_row(self, skill_id):
+        """
+        Number of documents mentioning one skill together with each skill
+
+        Read from cooccurrence if it was computed, otherwise counted from
+        the documents mentioning the skill only.
+
+        Args:
+            skill_id (int): Skill id
+
+        Returns:
+            ndarray: Count per skill id; the entry of skill_id itself is its
+                frequency
+        """
+        if "cooccurrence" in self.__dict__:
+            cooccurrence = self.cooccurrence
+            if isinstance(cooccurrence, np.ndarray):
+                return cooccurrence[skill_id]
+            return cooccurrence[skill_id].toarray().ravel()
+
+        documents = np.searchsorted(self.indptr, np.flatnonzero(self.indices == skill_id), side="right") - 1
+        starts = self.indptr[documents]
+        lengths = self.indptr[documents + 1] - starts
+        # Positions of every entry of those documents
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.bincount(self.indices[positions], minlength=self.n_skills)
+
+    def pmi(self, min_count=1):
+        """
+        Pointwise mutual information of every pair of skills
+
+        ``log(P(a, b) / (P(a) P(b)))`` with probabilities estimated per
+        document. Pairs seen together in fewer than min_count documents are
+        NaN, or left out when cooccurrence is sparse.
+
+        Args:
+            min_count (int): Smallest co-occurrence count scored
+
+        Returns:
+            ndarray or csr_matrix: n_skills x n_skills PMI values, sparse
+                like cooccurrence
+        """
+        cooccurrence = self.cooccurrence
+        frequency = self.skill_frequency().astype(np.float64)
+        if not isinstance(cooccurrence, np.ndarray):
+            from scipy.sparse import csr_matrix
+
+            pairs = cooccurrence.tocoo()
+            keep = pairs.data >= max(min_count, 1)
+            rows, columns = pairs.row[keep], pairs.col[keep]
+            scores = np.log(pairs.data[keep] * float(self.n_documents) / (frequency[rows] * frequency[columns]))
+            return csr_matrix((scores, (rows, columns)), shape=cooccurrence.shape)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.log(cooccurrence * float(self.n_documents) / np.outer(frequency, frequency))
+        scores[cooccurrence < max(min_count, 1)] = np.nan
+        return scores
+
+    def top_skills(self, k=10):
+        """
+        Most frequent skills
+
+        Returns:
+            list: (skill, documents) pairs, most frequent first
+        """
+        frequency = self.skill_frequency()
+        order = np.argsort(-frequency, kind="stable")[:k]
+        return [(self.skill_names[i], int(frequency[i])) for i in order if frequency[i]]
+
+    def top_related(self, skill, k=10, by="pmi", min_count=5):
+        """
+        Skills most associated with one skill
+
+        Args:
+            skill (str): Canonical skill name
+            k (int): Number of skills returned
+            by (str): "pmi" or "count" (raw co-occurrence)
+            min_count (int): Smallest co-occurrence count considered
+
+        Returns:
+            list: (skill, pmi, co-occurrence count) tuples, best first
+        """
+        if by not in ("pmi", "count"):
+            raise ValueError(f"Unknown ranking {by!r}, expected 'pmi' or 'count'")
+        i = self.skill_ids[skill]
+
+        counts = self.cooccurrence_row(i)
+        frequency = self.skill_frequency().astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pmi = np.log(counts * float(self.n_documents) / (frequency[i] * frequency))
+        scores = (pmi if by == "pmi" else counts.astype(np.float64)).copy()
+        scores[counts < max(min_count, 1)] = np.nan
+        scores[i] = np.nan
+
+        candidates = np.flatnonzero(~np.isnan(scores))
+        order = candidates[np.argsort(-scores[candidates], kind="stable")][:k]
+        return [(self.skill_names[j], float(pmi[j]), int(counts[j])) for j in order]
+
+    def to_scipy(self):
+        """
+        The matrix as a scipy.sparse.csr_matrix (requires SciPy)
+
+        Returns:
+            csr_matrix: n_documents x n_skills matrix of ones
+        """
+        from scipy.sparse import csr_matrix
+
+        data = np.ones(len(self.indices), dtype=np.int8)
+        return csr_matrix((data, self.indices, self.indptr), shape=(self.n_documents, self.n_skills))
+
+    def save(self, path):
+        """
+        Write the matrix to an .npz file
+
+        The co-occurrence counts are stored as well once computed, so that
+        loading the file gives instant co-occurrence and PMI views. Sparse
+        counts are stored as their CSR arrays.
+
+        Args:
+            path (str): Output file
+        """
+        arrays = {
+            "indptr": self.indptr,
+            "indices": self.indices,
+            "skill_names": np.array(self.skill_names, dtype=str),
+            "category_names": np.array(self.category_names, dtype=str),
+            "skill_category_ids": self.skill_category_ids,
+            "version": np.array(self.version or ""),
+        }
+        if "cooccurrence" in self.__dict__:
+            cooccurrence = self.cooccurrence
+            if isinstance(cooccurrence, np.ndarray):
+                arrays["cooccurrence"] = cooccurrence
+            else:
+                arrays["cooccurrence_indptr"] = cooccurrence.indptr
+                arrays["cooccurrence_indices"] = cooccurrence.indices
+                arrays["cooccurrence_data"] = cooccurrence.data
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a matrix written by save
+
+        Args:
+            path (str): .npz file
+
+        Returns:
+            SkillMatrix: Loaded matrix; sparse co-occurrence counts are only
+                read if SciPy is installed
+        """
+        with np.load(path) as f:
+            cooccurrence = f["cooccurrence"] if "cooccurrence" in f.files else None
+            if "cooccurrence_data" in f.files:
+                try:
+                    from scipy.sparse import csr_matrix
+                except ImportError:
+                    pass
+                else:
+                    n_skills = len(f["skill_names"])
+                    cooccurrence = csr_matrix(
+                        (f["cooccurrence_data"], f["cooccurrence_indices"], f["cooccurrence_indptr"]),
+                        shape=(n_skills, n_skills),
+                    )
+            return cls(
+                f["indptr"],
+                f["indices"],
+                f["skill_names"].tolist(),
+                f["category_names"].tolist(),
+                f["skill_category_ids"],
+                version=str(f["version"]) or None,
+                cooccurrence=cooccurrence,
+            )
+
+
+class SkillMatrixBuilder:
+    """
+    Accumulates per-document skills into a SkillMatrix.
+
+    Skills are numbered with the ids of the knowledge base; names it does
+    not know, e.g. from results produced with an older dictionary, get new
+    ids in the "Uncategorized" category.
+    """
+
+    def __init__(self, knowledge_base=None):
+        if knowledge_base is None:
+            knowledge_base = get_knowledge_base()
+        self.version = knowledge_base.version
+        self.skill_names = list(knowledge_base.skill_names)
+        self.skill_ids = dict(knowledge_base.skill_ids)
+        self.category_names = knowledge_base.category_names
+        self.skill_category_ids = array("H", knowledge_base.skill_category_ids)
+        self._uncategorized = knowledge_base.category_ids["Uncategorized"]
+        self.indptr = array("q", [0])
+        self.indices = array("I")
+
+    def add_ids(self, skill_ids):
+        """
+        Add a document by its skill ids, e.g. from extract_skill_ids
+
+        Args:
+            skill_ids (iterable): Ids from the builder's knowledge base
+        """
+        self.indices.extend(sorted(set(skill_ids)))
+        self.indptr.append(len(self.indices))
+
+    def add_skills(self, skills):
+        """
+        Add a document by its canonical skill names
+
+        Args:
+            skills (iterable): Skill names, e.g. analyze_text()["skills"]
+        """
+        ids = []
+        for name in skills:
+            i = self.skill_ids.get(name)
+            if i is None:
+                i = self.skill_ids[name] = len(self.skill_names)
+                self.skill_names.append(name)
+                self.skill_category_ids.append(self._uncategorized)
+            ids.append(i)
+        self.add_ids(ids)
+
+    def build(self):
+        """
+        Returns:
+            SkillMatrix: Matrix of all documents added so far
+        """
+        dtype = np.uint16 if len(self.skill_names) <= 1 << 16 else np.uint32
+        # Copies, so that more documents can still be added afterwards
+        return SkillMatrix(
+            np.array(self.indptr, dtype=np.int64),
+            np.array(self.indices, dtype=dtype),
+            self.skill_names,
+            self.category_names,
+            np.array(self.skill_category_ids, dtype=np.intp),
+            version=self.version,
+        )
+
+
+def build_skill_matrix(texts, batch_size=64, n_process=1, cache=None):
+    """
+    Analyze job descriptions and collect their skills into a SkillMatrix
+
+    Args:
+        texts (iterable): Raw job description texts
+        batch_size (int): Number of texts per chunk
+        n_process (int): Number of worker processes
+        cache (ResultCache): Optional result cache
+
+    Returns:
+        SkillMatrix: One row per text, in input order
+    """
+    from pipeline import analyze_batch
+
+    builder = SkillMatrixBuilder()
+    for result in analyze_batch(texts, batch_size=batch_size, n_process=n_process, cache=cache):
+        builder.add_skills(result["skills"])
+    return builder.build()
+
+
+def read_result_skills(path):
+    """
+    Stream the skills of each record of a cli.py output file
+
+    Args:
+        path (str): JSONL or CSV file written by cli.py
+
+    Yields:
+        list: Skill names of each record, in file order
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield [skill for skill in row["skills"].split(";") if skill]
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)["skills"]
+
+
+def _print_report(matrix, top, related, min_count):
+    print(f"{matrix.n_documents} documents, {matrix.n_skills} skills, "
+          f"{len(matrix.indices)} skill mentions")
+
+    print(f"\nTop {top} skills (documents):")
+    for skill, documents in matrix.top_skills(top):
+        share = documents / matrix.n_documents
+        print(f"  {skill:<32} {documents:>10}  {share:6.1%}")
+
+    print("\nCategories (documents, share of mentions):")
+    frequency = matrix.category_frequency()
+    shares = matrix.category_shares()
+    for i in np.argsort(-shares, kind="stable"):
+        if frequency[i]:
+            print(f"  {matrix.category_names[i]:<32} {frequency[i]:>10}  {shares[i]:6.1%}")
+
+    for skill in related:
+        if skill not in matrix.skill_ids:
+            print(f"\nUnknown skill {skill!r}")
+            continue
+        print(f"\nSkills related to {skill} (PMI, documents together):")
+        for other, pmi, count in matrix.top_related(skill, top, min_count=min_count):
+            print(f"  {other:<32} {pmi:6.2f} {count:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        epilog="\n\n".join(__doc__.split("\n\n")[1:]),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="build a matrix from cli.py results")
+    build.add_argument("results", nargs="+", help="JSONL or CSV files written by cli.py")
+    build.add_argument("-o", "--output", required=True, help="output .npz file")
+    build.add_argument("--no-cooccurrence", action="store_true",
+                       help="do not precompute co-occurrence counts")
+
+    report = commands.add_parser("report", help="print frequency and co-occurrence views")
+    report.add_argument("matrix", help=".npz file written by build")
+    report.add_argument("--top", type=int, default=20, help="entries per list")
+    report.add_argument("--related", nargs="*", default=[], metavar="SKILL",
+                        help="list the skills most associated with these skills")
+    report.add_argument("--min-count", type=int, default=5,
+                        help="smallest co-occurrence count for related skills")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        builder = SkillMatrixBuilder()
+        for path in args.results:
+            for skills in read_result_skills(path):
+                builder.add_skills(skills)
+        matrix = builder.build()
+        if not args.no_cooccurrence:
+            # Computed once here and saved with the matrix
+            try:
+                matrix.cooccurrence
+            except ImportError:
+                print("SciPy is not installed; saving without co-occurrence counts")
+        matrix.save(args.output)
+        print(f"Wrote {matrix.n_documents} documents x {matrix.n_skills} skills to {args.output}")
+    else:
+        _print_report(SkillMatrix.load(args.matrix), args.top, args.related, args.min_count)
+
+
+if __name__ == "__main__":
+    main()
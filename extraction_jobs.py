@@ -0,0 +1,159 @@
+"""
+Background extraction for interactive front ends.
+
+An ExtractionJob analyzes one text on a worker thread and publishes its
+progress and the skills found so far, so a UI can show both while the
+analysis runs instead of blocking until the end. Long texts are matched
+window by window (see streaming), which gives the same result as
+analyze_text and a progress measure: the share of the text read.
+
+ExtractionJobs is a pool shared by all users of a process. Jobs for a text
+that is already being analyzed are shared rather than started again.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import tracing
+from knowledge_base import get_knowledge_base
+from pipeline import analyze_text
+from result_cache import cache_key
+from skill_ids import categorize_skill_ids, skill_names
+from streaming import iter_skill_ids_stream
+
+# Texts shorter than this are analyzed in one go, without progress
+PROGRESS_MIN_CHARS = 20_000
+
+# Raw words per window of a long text; results do not depend on it
+PROGRESS_WINDOW_WORDS = 1000
+
+# Characters read at a time, less than a window so that progress moves
+# with every window
+PROGRESS_PIECE_CHARS = 1 << 12
+
+# Jobs running at once; more wait in the pool's queue
+MAX_WORKERS = 2
+
+
+class ExtractionJob:
+    """
+    Analysis of one text on a background thread.
+
+    progress goes from 0 to 1. Once done is set, exactly one of result (an
+    analyze_text result) and error is set, and trace holds the stage timings.
+    """
+
+    def __init__(self, text, knowledge_base):
+        self.text = text
+        self.knowledge_base = knowledge_base
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.trace = None
+        # Replaced, never mutated, so readers on other threads see a
+        # consistent set
+        self._skill_ids = frozenset()
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the job to finish
+
+        Returns:
+            bool: True if it finished within the timeout
+        """
+        return self._done.wait(timeout)
+
+    def partial_result(self):
+        """
+        Skills found so far
+
+        Returns:
+            dict: analyze_text-style result of the part of the text read so
+                far, the final result once done
+        """
+        if self.result is not None:
+            return self.result
+        skill_ids = sorted(self._skill_ids)
+        return {
+            "skills": skill_names(skill_ids, self.knowledge_base),
+            "categories": categorize_skill_ids(skill_ids, self.knowledge_base),
+        }
+
+    def _pieces(self):
+        """The text in small pieces, advancing progress as they are read"""
+        text = self.text
+        for start in range(0, len(text), PROGRESS_PIECE_CHARS):
+            self.progress = start / len(text)
+            yield text[start:start + PROGRESS_PIECE_CHARS]
+
+    def run(self, cache=None):
+        """Analyze the text on the current thread"""
+        try:
+            with tracing() as trace:
+                result = cache.get(self.text) if cache is not None else None
+                if result is None and len(self.text) >= PROGRESS_MIN_CHARS:
+                    for new_ids in iter_skill_ids_stream(self._pieces(), PROGRESS_WINDOW_WORDS, self.knowledge_base):
+                        if new_ids:
+                            self._skill_ids = self._skill_ids | new_ids
+                    result = self.partial_result()
+                    if cache is not None:
+                        cache.put(self.text, result)
+                elif result is None:
+                    result = analyze_text(self.text, cache=cache)
+            self.trace = trace.as_dict()
+            self.result = result
+            self.progress = 1.0
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+
+class ExtractionJobs:
+    """Thread pool running ExtractionJobs, shared by every session of a process"""
+
+    def __init__(self, max_workers=MAX_WORKERS, cache=None):
+        """
+        Args:
+            max_workers (int): Jobs running at once
+            cache (ResultCache): Optional result cache consulted and filled by the jobs
+        """
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extraction")
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def submit(self, text):
+        """
+        Start analyzing a text in the background
+
+        Args:
+            text (str): Raw job description text
+
+        Returns:
+            ExtractionJob: The new job, or the running job of the same text
+        """
+        knowledge_base = get_knowledge_base()
+        key = cache_key(text or "", knowledge_base.version)
+        with self._lock:
+            job = self._running.get(key)
+            if job is not None:
+                return job
+            job = ExtractionJob(text or "", knowledge_base)
+            self._running[key] = job
+        self._executor.submit(self._run, key, job)
+        return job
+
+    def _run(self, key, job):
+        try:
+            job.run(self.cache)
+        finally:
+            with self._lock:
+                del self._running[key]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,286 @@
+import os
+
+from fuzzywuzzy import fuzz, utils
+
+from instrumentation import current_trace
+
+# Fuzzy matching backend, configurable through the environment:
+# "fuzzywuzzy" scores the n-grams one at a time and is the reference,
+# "rapidfuzz" scores all n-grams of a document in batched score matrices
+FUZZY_BACKENDS = ("fuzzywuzzy", "rapidfuzz")
+fuzzy_backend = os.environ.get("JD_FUZZY_BACKEND", "fuzzywuzzy")
+
+# Threads scoring one matrix with the rapidfuzz backend, -1 for all cores
+fuzzy_workers = int(os.environ.get("JD_FUZZY_WORKERS", "-1"))
+
+# Queries per score matrix
+MATRIX_QUERIES = 1024
+
+# Blocks are split while they would score more than this many times the
+# (query, key) pairs sharing a bigram
+MATRIX_WASTE = 8
+
+# Matrices smaller than this are scored on the calling thread
+PARALLEL_MIN_CELLS = 1 << 16
+
+# rapidfuzz scores without fuzzywuzzy's intermediate rounding, and its
+# partial_ratio finds the optimal alignment fuzzywuzzy can miss, so a
+# fuzzywuzzy score is at most 1.5 above the rapidfuzz one. Keys within this
+# margin of the cutoff are rescored with fuzzywuzzy to decide the match.
+RESCORE_MARGIN = 2
+
+
+def process_query(query):
+    """
+    Normalize a query string exactly like fuzzywuzzy's extract functions do
+
+    Args:
+        query (str): Raw n-gram from the job description
+
+    Returns:
+        str: Processed query passed to the scorer
+    """
+    return utils.full_process(utils.full_process(query), force_ascii=True)
+
+
+def process_choice(choice):
+    """
+    Normalize a dictionary key exactly like fuzzywuzzy's extract functions do
+
+    Args:
+        choice (str): Skill dictionary key
+
+    Returns:
+        str: Processed choice passed to the scorer
+    """
+    return utils.full_process(choice, force_ascii=True)
+
+
+def _bigrams(processed):
+    """
+    Character bigrams of a processed string padded with a space on each side
+
+    Padding makes the bigram set of a string cover the bigrams of every
+    reordering of its tokens, which is what the token-based scorers compare.
+    """
+    padded = f" {processed} "
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class FuzzyIndex:
+    """
+    Candidate index for fuzzy skill matching.
+
+    ``process.extractBests(ngram, keys, score_cutoff=90, limit=1)`` scores
+    every dictionary key with ``fuzz.WRatio``. For WRatio to reach 90 the two
+    processed strings must either have similar lengths (ratio < 1.5) and a
+    Levenshtein similarity of at least ~0.9, or differ in length by at most
+    8x with the shorter one contained in the longer. Both cases imply that the
+    strings share a padded character bigram (or, for one-character strings,
+    a character), so keys sharing none of them are never scored. Candidates
+    are scored in dictionary order with the same scorer and tie-breaking, so
+    the result is identical to the full scan.
+    """
+
+    def __init__(self, keywords):
+        """
+        Build the index
+
+        Args:
+            keywords (list): Skill dictionary keys, in dictionary order
+        """
+        self.keywords = list(keywords)
+        self.processed = [process_choice(keyword) for keyword in self.keywords]
+
+        # Bigram -> ids of keys containing it
+        self.postings = {}
+        # Character -> ids of keys containing it, for one-character queries
+        self.char_postings = {}
+        # Ids of one-character keys, which can be contained in any query
+        self.single_char_ids = []
+
+        for i, processed in enumerate(self.processed):
+            if not processed:
+                continue
+            if len(processed) == 1:
+                self.single_char_ids.append(i)
+            for gram in _bigrams(processed):
+                self.postings.setdefault(gram, []).append(i)
+            for char in set(processed):
+                self.char_postings.setdefault(char, []).append(i)
+
+    def _sharing_ids(self, processed_query):
+        """Ids of the keys sharing a padded bigram (or character) with a non-empty query"""
+        ids = set(self.single_char_ids)
+        if len(processed_query) == 1:
+            ids.update(self.char_postings.get(processed_query, ()))
+        for gram in _bigrams(processed_query):
+            ids.update(self.postings.get(gram, ()))
+        return ids
+
+    def candidates(self, processed_query):
+        """
+        Ids of the keys that could score at least 90 against a query
+
+        Args:
+            processed_query (str): Query normalized with process_query
+
+        Returns:
+            list: Candidate key ids in dictionary order
+        """
+        if not processed_query:
+            return []
+
+        ids = self._sharing_ids(processed_query)
+
+        query_length = len(processed_query)
+        candidates = []
+        for i in sorted(ids):
+            processed = self.processed[i]
+            if query_length <= len(processed):
+                shorter, longer = processed_query, processed
+            else:
+                shorter, longer = processed, processed_query
+
+            length_ratio = len(longer) / len(shorter)
+            if length_ratio > 8:
+                continue
+            # Past 1.5x only a perfect partial_ratio reaches the cutoff
+            if length_ratio >= 1.5 and len(shorter) < 200 and shorter not in longer:
+                continue
+            candidates.append(i)
+
+        return candidates
+
+    def best_match(self, query, score_cutoff=90):
+        """
+        Find the best matching key for a query
+
+        Equivalent to ``process.extractBests(query, keywords,
+        score_cutoff=score_cutoff, limit=1)``. The candidate pruning is only
+        exact for cutoffs of 90 and above.
+
+        Args:
+            query (str): Raw n-gram from the job description
+            score_cutoff (int): Minimum WRatio score of a match
+
+        Returns:
+            tuple: (key, score) of the best match, or None if nothing reaches the cutoff
+        """
+        if score_cutoff < 90:
+            raise ValueError("FuzzyIndex only supports score cutoffs of 90 and above")
+
+        processed_query = process_query(query)
+
+        candidates = self.candidates(processed_query)
+
+        trace = current_trace()
+        if trace is not None:
+            trace.count("fuzzy_queries")
+            trace.count("fuzzy_candidates", len(candidates))
+
+        best = None
+        best_score = score_cutoff - 1
+        for i in candidates:
+            score = fuzz.WRatio(processed_query, self.processed[i], full_process=False)
+            # Strictly greater keeps the first key among equal scores
+            if score > best_score:
+                best = i
+                best_score = score
+
+        if best is None:
+            return None
+        return self.keywords[best], best_score
+
+    def best_matches(self, queries, score_cutoff=90, backend=None):
+        """
+        Find the best matching key for each of a batch of queries
+
+        Args:
+            queries (list): Raw n-grams from the job description
+            score_cutoff (int): Minimum WRatio score of a match
+            backend (str): One of FUZZY_BACKENDS, fuzzy_backend by default
+
+        Returns:
+            list: best_match(query, score_cutoff) for every query, in order
+        """
+        if backend is None:
+            backend = fuzzy_backend
+        if backend == "fuzzywuzzy":
+            return [self.best_match(query, score_cutoff=score_cutoff) for query in queries]
+        if backend != "rapidfuzz":
+            raise ValueError(f"Unknown fuzzy backend {backend!r}, expected one of {FUZZY_BACKENDS}")
+        if score_cutoff < 90:
+            raise ValueError("FuzzyIndex only supports score cutoffs of 90 and above")
+
+        processed_queries = [process_query(query) for query in queries]
+        # Filtering the keys sharing a bigram down to the candidates costs
+        # more in Python than scoring them all in C
+        id_sets = [
+            self._sharing_ids(processed_query) if processed_query else set()
+            for processed_query in processed_queries
+        ]
+
+        trace = current_trace()
+        if trace is not None:
+            trace.count("fuzzy_queries", len(queries))
+
+        # Queries sharing nothing with any key cannot match
+        scored = [i for i, ids in enumerate(id_sets) if ids]
+        results = [None] * len(queries)
+        for start in range(0, len(scored), MATRIX_QUERIES):
+            self._score_block(scored[start:start + MATRIX_QUERIES], processed_queries,
+                              id_sets, score_cutoff, results)
+        return results
+
+    def _score_block(self, block, processed_queries, id_sets, score_cutoff, results):
+        """
+        Score a block of queries against the union of their keys in one matrix
+
+        A query is also scored against the keys of the other queries of its
+        block, which score below the cutoff like the index guarantees, so
+        the result is the same.
+        """
+        import numpy as np
+        from rapidfuzz import fuzz as rapid_fuzz, process as rapid_process
+
+        columns = sorted(set().union(*(id_sets[i] for i in block)))
+        pairs = sum(len(id_sets[i]) for i in block)
+        if len(block) > 1 and len(block) * len(columns) > MATRIX_WASTE * pairs:
+            middle = len(block) // 2
+            self._score_block(block[:middle], processed_queries, id_sets, score_cutoff, results)
+            self._score_block(block[middle:], processed_queries, id_sets, score_cutoff, results)
+            return
+
+        trace = current_trace()
+        if trace is not None:
+            trace.count("fuzzy_matrix_cells", len(block) * len(columns))
+
+        # cdist runs the C scorer without the GIL, on fuzzy_workers threads
+        # for large matrices
+        scores = rapid_process.cdist(
+            [processed_queries[i] for i in block],
+            [self.processed[j] for j in columns],
+            scorer=rapid_fuzz.WRatio,
+            processor=None,
+            score_cutoff=score_cutoff - RESCORE_MARGIN,
+            workers=fuzzy_workers if len(block) * len(columns) >= PARALLEL_MIN_CELLS else 1,
+        )
+
+        # Most n-grams match nothing; the few near hits are rescored with the
+        # reference scorer, in dictionary order with the same tie-breaking
+        rows, cols = np.nonzero(scores)
+        near = {}
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            near.setdefault(row, []).append(columns[col])
+        for row, keys in near.items():
+            processed_query = processed_queries[block[row]]
+            best = None
+            best_score = score_cutoff - 1
+            for i in keys:
+                score = fuzz.WRatio(processed_query, self.processed[i], full_process=False)
+                if score > best_score:
+                    best = i
+                    best_score = score
+            if best is not None:
+                results[block[row]] = (self.keywords[best], best_score)
@@ -0,0 +1,369 @@
+"""
+Incremental re-extraction after skill dictionary edits.
+
+Documents are preprocessed once and their token streams stored together with
+the dictionary aliases they matched. When skill_dictionary.json changes, an
+update compares the dictionary with the one the store was matched against
+and re-matches only the documents the changed aliases can affect, from the
+stored tokens and without spaCy:
+
+- remapped aliases (same alias, new canonical skill) need no re-matching,
+  since skills are looked up from the stored aliases when results are read
+- documents that matched a removed alias are re-matched
+- every stored token stream is scanned against the added aliases alone, and
+  only documents with a hit are re-matched
+
+Edits of skill_categories.json touch no document at all: categories are
+assigned when results are read.
+
+Examples:
+
+    python incremental.py add store.sqlite3 postings.jsonl
+    python incremental.py update store.sqlite3
+    python incremental.py export store.sqlite3 -o skills.jsonl
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from array import array
+from functools import lru_cache
+from itertools import islice
+
+from knowledge_base import KnowledgeBase, get_knowledge_base
+from preprocessing import preprocess_tokens_batch
+from skill_extractor import match_aliases
+from skill_ids import categorize_skill_ids, skill_names
+
+# Parameters per SQL statement are limited, so alias lookups are split
+SQL_BATCH = 500
+
+# Distinct n-grams remembered while scanning for added aliases
+PROBE_CACHE_SIZE = 1 << 20
+
+
+def dictionary_hash(skill_dict):
+    """
+    Identity of a skill dictionary including its key order
+
+    Key order matters because fuzzy matching keeps the first of equally
+    scored keys.
+
+    Args:
+        skill_dict (dict): Mapping of aliases to canonical skill names
+
+    Returns:
+        str: Hex digest
+    """
+    content = json.dumps(list(skill_dict.items()))
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+def dictionary_diff(old, new):
+    """
+    Compare two skill dictionaries
+
+    Args:
+        old (dict): Dictionary the documents were matched with
+        new (dict): Current dictionary
+
+    Returns:
+        dict: "added" and "removed" alias lists, "remapped" aliases whose
+            canonical skill changed, and "reordered", True if aliases present
+            in both appear in a different order
+    """
+    kept_old = [alias for alias in old if alias in new]
+    kept_new = [alias for alias in new if alias in old]
+    return {
+        "added": [alias for alias in new if alias not in old],
+        "removed": [alias for alias in old if alias not in new],
+        "remapped": [alias for alias in kept_new if old[alias] != new[alias]],
+        "reordered": kept_old != kept_new,
+    }
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class IncrementalStore:
+    """
+    SQLite store of preprocessed documents and the aliases they matched.
+
+    Each document keeps its token stream, so re-matching after a dictionary
+    change skips text cleaning and spaCy, and an alias -> document index, so
+    the documents affected by a removed alias are found without a scan.
+    """
+
+    def __init__(self, path):
+        """
+        Open or create the store
+
+        Args:
+            path (str): SQLite database file
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " offset INTEGER PRIMARY KEY, doc_id TEXT NOT NULL,"
+                " tokens TEXT NOT NULL, aliases TEXT NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS hits (alias TEXT NOT NULL, offset INTEGER NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS hits_alias ON hits (alias)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def _meta(self, key):
+        row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_meta(self, key, value):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value))
+        )
+
+    def _check_dictionary(self, knowledge_base):
+        """
+        Make sure the store was matched against this knowledge base
+
+        Returns:
+            bool: True if the store has no dictionary recorded yet
+        """
+        stored = self._meta("dictionary_hash")
+        if stored is not None and stored != dictionary_hash(knowledge_base.skill_dict):
+            raise ValueError(
+                f"The skill dictionary changed since {self.path} was last matched; run update() first"
+            )
+        return stored is None
+
+    def _write_matches(self, rows):
+        """Store (offset, aliases) pairs, replacing earlier matches"""
+        self._connection.executemany(
+            "UPDATE documents SET aliases = ? WHERE offset = ?",
+            [(json.dumps(sorted(aliases)), offset) for offset, aliases in rows],
+        )
+        self._connection.executemany(
+            "DELETE FROM hits WHERE offset = ?", [(offset,) for offset, _ in rows]
+        )
+        self._connection.executemany(
+            "INSERT INTO hits VALUES (?, ?)",
+            [(alias, offset) for offset, aliases in rows for alias in aliases],
+        )
+
+    def add(self, documents, batch_size=64, n_process=1, knowledge_base=None):
+        """
+        Preprocess, match and store documents
+
+        Args:
+            documents (iterable): (document id, text) pairs
+            batch_size (int): Documents preprocessed and written at a time
+            n_process (int): Number of spaCy worker processes
+            knowledge_base (KnowledgeBase): Snapshot to match against, the
+                process-wide one by default
+
+        Returns:
+            int: Number of documents added
+        """
+        if knowledge_base is None:
+            knowledge_base = get_knowledge_base()
+        # The dictionary is recorded with the first chunk; afterwards it is
+        # the one already stored
+        record_dictionary = self._check_dictionary(knowledge_base)
+
+        added = 0
+        offset = self._connection.execute(
+            "SELECT COALESCE(MAX(offset) + 1, 0) FROM documents"
+        ).fetchone()[0]
+
+        for chunk in _chunks(documents, batch_size):
+            token_lists = preprocess_tokens_batch(
+                [text for _, text in chunk], batch_size=batch_size, n_process=n_process
+            )
+            rows = []
+            matches = []
+            for (doc_id, _), words in zip(chunk, token_lists):
+                rows.append((offset, json.dumps(doc_id), " ".join(words), "[]"))
+                matches.append((offset, match_aliases(words, knowledge_base)))
+                offset += 1
+            with self._connection:
+                self._connection.executemany("INSERT INTO documents VALUES (?, ?, ?, ?)", rows)
+                self._write_matches(matches)
+                if record_dictionary:
+                    self._set_meta("skill_dict", list(knowledge_base.skill_dict.items()))
+                    self._set_meta("dictionary_hash", dictionary_hash(knowledge_base.skill_dict))
+            record_dictionary = False
+            added += len(rows)
+
+        return added
+
+    def _offsets_with_aliases(self, aliases):
+        offsets = set()
+        for chunk in _chunks(aliases, SQL_BATCH):
+            placeholders = ", ".join("?" * len(chunk))
+            offsets.update(offset for (offset,) in self._connection.execute(
+                f"SELECT DISTINCT offset FROM hits WHERE alias IN ({placeholders})", chunk
+            ))
+        return offsets
+
+    def update(self, knowledge_base=None, batch_size=256):
+        """
+        Bring the stored matches up to date with the current dictionary
+
+        Args:
+            knowledge_base (KnowledgeBase): Snapshot to match against, the
+                process-wide one by default
+            batch_size (int): Documents re-matched and written at a time
+
+        Returns:
+            dict: Alias changes, the number of documents scanned for added
+                aliases and re-matched, and the time taken
+        """
+        start = time.perf_counter()
+        if knowledge_base is None:
+            knowledge_base = get_knowledge_base()
+
+        stored = self._meta("skill_dict")
+        old = dict(stored) if stored is not None else dict(knowledge_base.skill_dict)
+        new = knowledge_base.skill_dict
+        diff = dictionary_diff(old, new)
+
+        scanned = 0
+        if diff["reordered"]:
+            # Ties between fuzzy matches may be decided differently
+            affected = {offset for (offset,) in self._connection.execute("SELECT offset FROM documents")}
+        else:
+            affected = self._offsets_with_aliases(diff["removed"])
+            if diff["added"]:
+                # Match every token stream against the added aliases only
+                probe = KnowledgeBase({alias: new[alias] for alias in diff["added"]}, {})
+                # N-grams repeat across documents, so score each distinct one once
+                probe.fuzzy_index.best_match = lru_cache(maxsize=PROBE_CACHE_SIZE)(
+                    probe.fuzzy_index.best_match
+                )
+                for offset, tokens in self._connection.execute("SELECT offset, tokens FROM documents"):
+                    scanned += 1
+                    if offset not in affected and match_aliases(tokens.split(" ") if tokens else [], probe):
+                        affected.add(offset)
+
+        with self._connection:
+            for chunk in _chunks(sorted(affected), batch_size):
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self._connection.execute(
+                    f"SELECT offset, tokens FROM documents WHERE offset IN ({placeholders})", chunk
+                ).fetchall()
+                self._write_matches([
+                    (offset, match_aliases(tokens.split(" ") if tokens else [], knowledge_base))
+                    for offset, tokens in rows
+                ])
+            self._set_meta("skill_dict", list(new.items()))
+            self._set_meta("dictionary_hash", dictionary_hash(new))
+
+        return {
+            "added": len(diff["added"]),
+            "removed": len(diff["removed"]),
+            "remapped": len(diff["remapped"]),
+            "reordered": diff["reordered"],
+            "documents": len(self),
+            "scanned": scanned,
+            "rematched": len(affected),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+
+    def results(self, knowledge_base=None):
+        """
+        Read the results of all documents with the current categories
+
+        Args:
+            knowledge_base (KnowledgeBase): Snapshot to categorize with, the
+                process-wide one by default; its dictionary must be the one
+                of the last add() or update()
+
+        Yields:
+            tuple: (offset, document id, analyze_text-style result), in offset order
+        """
+        if knowledge_base is None:
+            knowledge_base = get_knowledge_base()
+        self._check_dictionary(knowledge_base)
+
+        alias_ids = knowledge_base.alias_ids
+        for offset, doc_id, aliases in self._connection.execute(
+            "SELECT offset, doc_id, aliases FROM documents ORDER BY offset"
+        ):
+            ids = array(knowledge_base.id_typecode, sorted({alias_ids[alias] for alias in json.loads(aliases)}))
+            yield offset, json.loads(doc_id), {
+                "skills": skill_names(ids, knowledge_base),
+                "categories": categorize_skill_ids(ids, knowledge_base),
+            }
+
+    def close(self):
+        self._connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        epilog="\n\n".join(__doc__.split("\n\n")[-2:]),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="preprocess, match and store documents")
+    add.add_argument("store", help="SQLite store file")
+    add.add_argument("inputs", nargs="+",
+                     help='directories, glob patterns, .txt/.pdf/.docx/.jsonl/.csv files, or "-" for stdin')
+    add.add_argument("--chunk-size", type=int, default=64, help="documents per processing chunk")
+    add.add_argument("--workers", type=int, default=1, help="number of spaCy worker processes")
+    add.add_argument("--text-field", default="text", help="JSONL key or CSV column with the text")
+    add.add_argument("--id-field", default="id", help="JSONL key or CSV column with the document id")
+
+    update = commands.add_parser("update", help="re-match after skill dictionary changes")
+    update.add_argument("store", help="SQLite store file")
+
+    export = commands.add_parser("export", help="write the current results as JSONL")
+    export.add_argument("store", help="SQLite store file")
+    export.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args()
+
+    store = IncrementalStore(args.store)
+    try:
+        if args.command == "add":
+            from cli import iter_documents
+
+            documents = ((doc_id, load()) for doc_id, load in
+                         iter_documents(args.inputs, args.text_field, args.id_field))
+            added = store.add(documents, batch_size=args.chunk_size, n_process=args.workers)
+            print(f"Added {added} documents ({len(store)} stored)", file=sys.stderr)
+        elif args.command == "update":
+            print(json.dumps(store.update(), indent=2))
+        else:
+            from cli import JsonlWriter
+
+            out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+            try:
+                writer = JsonlWriter(out)
+                for offset, doc_id, result in store.results():
+                    writer.write(offset, doc_id, result)
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
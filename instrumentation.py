@@ -0,0 +1,185 @@
+import cProfile
+import contextvars
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Trace:
+    """
+    Timings and counters recorded while analyzing one document.
+
+    Stage times are wall-clock seconds summed per stage name; counters are
+    integers such as the number of n-grams or fuzzy candidates scored.
+    """
+
+    def __init__(self, label=None):
+        self.label = label
+        self.stages = {}
+        self.counters = {}
+        self.total = 0.0
+        self.profile = None
+
+    @contextmanager
+    def stage(self, name):
+        """Add the wall time of the block to a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, n=1):
+        """Increase a counter"""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def as_dict(self):
+        """
+        Plain representation for logging or JSON output
+
+        Returns:
+            dict: Label, total and stage times in milliseconds, and counters
+        """
+        return {
+            "label": self.label,
+            "total_ms": round(self.total * 1000, 3),
+            "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+            "counters": dict(self.counters),
+        }
+
+
+class _NullStage:
+    """Stage context used when no trace is active"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+# Trace of the document being analyzed in the current thread or task
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+_callbacks = []
+_callbacks_lock = threading.Lock()
+
+
+def current_trace():
+    """
+    Get the active trace
+
+    Returns:
+        Trace: Trace of the current document, or None when not tracing
+    """
+    return _current_trace.get()
+
+
+def stage(name):
+    """
+    Time a block as a stage of the active trace
+
+    Costs one context variable lookup when nothing is being traced.
+
+    Args:
+        name (str): Stage name
+
+    Returns:
+        Context manager timing the block
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return _NULL_STAGE
+    return trace.stage(name)
+
+
+def count(name, n=1):
+    """
+    Increase a counter of the active trace, if any
+
+    Args:
+        name (str): Counter name
+        n (int): Amount to add
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.count(name, n)
+
+
+def add_trace_callback(callback):
+    """
+    Register a function called with every finished Trace
+
+    Registering a callback turns tracing on for every document analyzed by
+    pipeline.analyze_text, e.g. to ship per-stage timings to a log.
+
+    Args:
+        callback (callable): Called with the finished Trace
+    """
+    with _callbacks_lock:
+        _callbacks.append(callback)
+
+
+def remove_trace_callback(callback):
+    """Unregister a callback added with add_trace_callback"""
+    with _callbacks_lock:
+        _callbacks.remove(callback)
+
+
+def tracing_enabled():
+    """
+    Whether documents should be traced without an explicit tracing() block
+
+    Returns:
+        bool: True when a callback is registered or JD_PROFILE_DIR is set
+    """
+    return bool(_callbacks) or bool(os.environ.get("JD_PROFILE_DIR"))
+
+
+@contextmanager
+def tracing(label=None, profile=None, profile_dir=None):
+    """
+    Record a Trace for the work done inside the block
+
+    Args:
+        label (str): Name stored on the trace, e.g. a document id
+        profile (bool): Also run cProfile; defaults to True when
+            JD_PROFILE_DIR is set
+        profile_dir (str): Directory for the .prof dump, JD_PROFILE_DIR by default
+
+    Yields:
+        Trace: Trace being recorded; complete once the block exits
+    """
+    profile_dir = profile_dir or os.environ.get("JD_PROFILE_DIR")
+    if profile is None:
+        profile = bool(profile_dir)
+
+    trace = Trace(label)
+    token = _current_trace.set(trace)
+    profiler = cProfile.Profile() if profile else None
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield trace
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        trace.total = time.perf_counter() - start
+        _current_trace.reset(token)
+
+        if profiler is not None:
+            trace.profile = pstats.Stats(profiler)
+            if profile_dir:
+                os.makedirs(profile_dir, exist_ok=True)
+                name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(trace):x}.prof"
+                trace.profile.dump_stats(os.path.join(profile_dir, name))
+
+        with _callbacks_lock:
+            callbacks = list(_callbacks)
+        for callback in callbacks:
+            callback(trace)
@@ -0,0 +1,529 @@
+"""
+Compile the skill dictionary and categories into a binary knowledge base.
+
+The artifact holds everything KnowledgeBase builds from the JSON files (the
+string table, the alias trie, the fuzzy bigram postings and the category
+table) as flat arrays and open-addressing hash tables. MappedKnowledgeBase
+opens it read-only with mmap and looks entries up in place, so a worker
+starts without parsing or compiling anything and all workers on a machine
+share one copy of the pages.
+
+get_knowledge_base() uses the artifact automatically while the JSON files it
+was built from are unchanged; after editing them, rebuild it or it is
+ignored. JD_KB_ARTIFACT overrides its location.
+
+Examples:
+    python kb_artifact.py
+    python kb_artifact.py -o /srv/skills/knowledge_base.bin
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+import zlib
+from array import array
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from pathlib import Path
+
+from fuzzy_index import FuzzyIndex
+from skill_matcher import SkillMatcher
+
+MAGIC = b"JDSKB\x00\x00\x01"
+FORMAT_VERSION = 1
+
+default_artifact_path = Path(__file__).resolve().parent / "data" / "knowledge_base.bin"
+
+# Empty hash table slot / trie node without an alias
+EMPTY = 0xFFFFFFFF
+
+# Recent lookups remembered per hash table
+LOOKUP_CACHE_SIZE = 1 << 16
+
+
+def artifact_path():
+    """
+    Location of the artifact, JD_KB_ARTIFACT or data/knowledge_base.bin
+
+    Returns:
+        Path: Artifact file, which may not exist
+    """
+    return Path(os.environ.get("JD_KB_ARTIFACT") or default_artifact_path)
+
+
+def source_hashes(*paths):
+    """
+    Content hashes of the JSON files an artifact is built from
+
+    Args:
+        *paths (Path): Source files
+
+    Returns:
+        list: sha256 hex digest of each file, or None if it cannot be read
+    """
+    hashes = []
+    for path in paths:
+        try:
+            hashes.append(hashlib.sha256(Path(path).read_bytes()).hexdigest())
+        except OSError:
+            hashes.append(None)
+    return hashes
+
+
+class _ArtifactWriter:
+    """Collects interned strings and named sections before writing them out"""
+
+    def __init__(self):
+        self.string_ids = {}
+        self.blob = bytearray()
+        self.string_offsets = array("I", [0])
+        self.sections = {}
+
+    def string(self, text):
+        """Intern a string and return its id"""
+        string_id = self.string_ids.get(text)
+        if string_id is None:
+            string_id = self.string_ids[text] = len(self.string_ids)
+            self.blob += text.encode("utf-8")
+            self.string_offsets.append(len(self.blob))
+        return string_id
+
+    def add(self, name, values):
+        self.sections[name] = values
+
+    def hash_table(self, name, entries):
+        """
+        Add an open-addressing hash table
+
+        Args:
+            name (str): Section name prefix
+            entries (list): (seed, key, value) triples, unique by (seed, key);
+                the seed lets one table hold keys of many trie nodes
+        """
+        size = 8
+        while size < 2 * len(entries):
+            size *= 2
+        mask = size - 1
+
+        seeds = array("I", [0]) * size
+        keys = array("I", [EMPTY]) * size
+        values = array("I", [0]) * size
+        for seed, key, value in entries:
+            slot = zlib.crc32(key.encode("utf-8"), seed) & mask
+            while keys[slot] != EMPTY:
+                slot = (slot + 1) & mask
+            seeds[slot] = seed
+            keys[slot] = self.string(key)
+            values[slot] = value
+
+        self.add(f"{name}_seeds", seeds)
+        self.add(f"{name}_keys", keys)
+        self.add(f"{name}_values", values)
+
+    def write(self, path, header):
+        """Write the header and all sections, 8-byte aligned"""
+        self.add("string_offsets", self.string_offsets)
+        self.add("string_blob", array("B", self.blob))
+
+        layout = {}
+        offset = 0
+        for name, values in self.sections.items():
+            offset = (offset + 7) & ~7
+            size = len(values) * values.itemsize
+            layout[name] = [offset, size, values.typecode]
+            offset += size
+        header = dict(header, byteorder=sys.byteorder, sections=layout)
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        data_start = (len(MAGIC) + 4 + len(header_bytes) + 7) & ~7
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write next to the target and rename, so that workers mapping the old
+        # file never see a half-written one
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(header_bytes).to_bytes(4, "little"))
+            f.write(header_bytes)
+            for name, values in self.sections.items():
+                f.write(b"\x00" * (data_start + layout[name][0] - f.tell()))
+                values.tofile(f)
+        os.replace(temp_path, path)
+
+
+def build_artifact(knowledge_base, path, sources=None):
+    """
+    Write a knowledge base to a binary artifact
+
+    Args:
+        knowledge_base (KnowledgeBase): Snapshot to compile
+        path (Path): Artifact file to write
+        sources (list): source_hashes of the JSON files it was loaded from,
+            checked by get_knowledge_base before using the artifact
+    """
+    writer = _ArtifactWriter()
+
+    # Skills, in id order, with their category ids
+    writer.add("skill_names", array("I", (writer.string(name) for name in knowledge_base.skill_names)))
+    writer.add("skill_category_ids", array("H", knowledge_base.skill_category_ids))
+    writer.hash_table("skill_table", [(0, name, i) for i, name in enumerate(knowledge_base.skill_names)])
+
+    # Aliases in dictionary order, which is also the fuzzy index key order
+    fuzzy_index = knowledge_base.fuzzy_index
+    writer.add("alias_names", array("I", (writer.string(alias) for alias in fuzzy_index.keywords)))
+    writer.add("alias_processed", array("I", (writer.string(text) for text in fuzzy_index.processed)))
+    writer.add("alias_skill_ids", array("I", (knowledge_base.alias_ids[alias] for alias in fuzzy_index.keywords)))
+    writer.hash_table("alias_table", [(0, alias, i) for i, alias in enumerate(fuzzy_index.keywords)])
+
+    # Categories with their member lists, and the lowercase reverse mapping
+    writer.add("category_names", array("I", (writer.string(name) for name in knowledge_base.category_names)))
+    member_starts = array("I", [0])
+    members = array("I")
+    for name in knowledge_base.category_names:
+        members.extend(writer.string(skill) for skill in knowledge_base.skill_categories.get(name, ()))
+        member_starts.append(len(members))
+    writer.add("category_member_starts", member_starts)
+    writer.add("category_members", members)
+    reverse_keys = list(knowledge_base.skill_to_category)
+    writer.add("reverse_keys", array("I", (writer.string(key) for key in reverse_keys)))
+    writer.hash_table("reverse_table", [
+        (0, key, knowledge_base.category_ids[knowledge_base.skill_to_category[key]])
+        for key in reverse_keys
+    ])
+
+    # Alias trie: node 0 is the root, edges are keyed by (parent node, token)
+    alias_ids = {alias: i for i, alias in enumerate(fuzzy_index.keywords)}
+    node_aliases = array("I")
+    edges = []
+    # Breadth-first; a node's id is its position in this growing list
+    nodes = [knowledge_base.matcher.root]
+    for node_id, node in enumerate(nodes):
+        hit = node.get(None)
+        node_aliases.append(EMPTY if hit is None else alias_ids[hit[0]])
+        for token, child in node.items():
+            if token is not None:
+                edges.append((node_id, token, len(nodes)))
+                nodes.append(child)
+    writer.add("node_aliases", node_aliases)
+    writer.hash_table("edge_table", edges)
+
+    # Fuzzy postings, all lists stored back to back
+    posting_starts = array("I", [0])
+    postings = array("I")
+    for name, table in (("bigram_table", fuzzy_index.postings), ("char_table", fuzzy_index.char_postings)):
+        entries = []
+        for key, ids in table.items():
+            entries.append((0, key, len(posting_starts) - 1))
+            postings.extend(ids)
+            posting_starts.append(len(postings))
+        writer.hash_table(name, entries)
+    writer.add("posting_starts", posting_starts)
+    writer.add("postings", postings)
+    writer.add("single_char_ids", array("I", fuzzy_index.single_char_ids))
+
+    writer.write(path, {
+        "format_version": FORMAT_VERSION,
+        "version": knowledge_base.version,
+        "sources": sources,
+        "id_typecode": knowledge_base.id_typecode,
+        "max_length": knowledge_base.matcher.max_length,
+        # Leading entries of category_names that come from the categories
+        # file, the rest is the implicit "Uncategorized"
+        "source_categories": len(knowledge_base.skill_categories),
+    })
+
+
+class _StringTable:
+    """Strings of an artifact, decoded on access"""
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def bytes(self, string_id):
+        return self.blob[self.offsets[string_id]:self.offsets[string_id + 1]]
+
+    def __getitem__(self, string_id):
+        return str(self.bytes(string_id), "utf-8")
+
+
+class _HashTable:
+    """Read side of _ArtifactWriter.hash_table"""
+
+    def __init__(self, strings, seeds, keys, values):
+        self.strings = strings
+        self.seeds = seeds
+        self.keys = keys
+        self.values = values
+        self.mask = len(keys) - 1
+        # Words repeat across documents, so remember recent lookups, misses
+        # included, rather than probing the table every time
+        self.lookup = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self.lookup)
+
+    def lookup(self, key, seed=0):
+        """
+        Value stored for a key
+
+        Returns:
+            int: The value, or None if the key is not in the table
+        """
+        if not isinstance(key, str):
+            return None
+        data = key.encode("utf-8")
+        keys = self.keys
+        offsets = self.strings.offsets
+        blob = self.strings.blob
+        slot = zlib.crc32(data, seed) & self.mask
+        while True:
+            string_id = keys[slot]
+            if string_id == EMPTY:
+                return None
+            if self.seeds[slot] == seed and blob[offsets[string_id]:offsets[string_id + 1]] == data:
+                return self.values[slot]
+            slot = (slot + 1) & self.mask
+
+
+class _StringList(Sequence):
+    """Read-only list of strings given by their ids"""
+
+    def __init__(self, strings, string_ids):
+        self.strings = strings
+        self.string_ids = string_ids
+        # Strings decoded so far; FuzzyIndex reads the same keys for many
+        # queries, and only the keys it touches end up in private memory
+        self.decoded = {}
+
+    def __len__(self):
+        return len(self.string_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.strings[i] for i in self.string_ids[index]]
+        text = self.decoded.get(index)
+        if text is None:
+            text = self.decoded[index] = self.strings[self.string_ids[index]]
+        return text
+
+
+class _LookupMapping(Mapping):
+    """Read-only mapping over a key list and a lookup function"""
+
+    def __init__(self, keys, lookup):
+        self.keys_list = keys
+        self.lookup = lookup
+
+    def __getitem__(self, key):
+        value = self.lookup(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return iter(self.keys_list)
+
+    def __len__(self):
+        return len(self.keys_list)
+
+
+class _PostingLists:
+    """Key -> id list view with the dict.get interface FuzzyIndex uses"""
+
+    def __init__(self, table, starts, postings):
+        self.table = table
+        self.starts = starts
+        self.postings = postings
+
+    def get(self, key, default=None):
+        i = self.table.lookup(key)
+        if i is None:
+            return default
+        return self.postings[self.starts[i]:self.starts[i + 1]]
+
+
+class _TrieNode:
+    """Trie node with the dict.get interface SkillMatcher.find uses"""
+
+    __slots__ = ("knowledge_base", "node_id")
+
+    def __init__(self, knowledge_base, node_id):
+        self.knowledge_base = knowledge_base
+        self.node_id = node_id
+
+    def get(self, token):
+        knowledge_base = self.knowledge_base
+        if token is None:
+            alias_id = knowledge_base._node_aliases[self.node_id]
+            if alias_id == EMPTY:
+                return None
+            skill_id = knowledge_base._alias_skill_ids[alias_id]
+            return knowledge_base.fuzzy_index.keywords[alias_id], knowledge_base.skill_names[skill_id]
+
+        child = knowledge_base._edges.lookup(token, self.node_id)
+        if child is None:
+            return None
+        return _TrieNode(knowledge_base, child)
+
+
+class _MappedSkillMatcher(SkillMatcher):
+    """SkillMatcher walking the trie stored in an artifact"""
+
+    def __init__(self, knowledge_base, max_length):
+        self.root = _TrieNode(knowledge_base, 0)
+        self.max_length = max_length
+
+
+class _MappedFuzzyIndex(FuzzyIndex):
+    """FuzzyIndex reading its keys and postings from an artifact"""
+
+    def __init__(self, keywords, processed, postings, char_postings, single_char_ids):
+        self.keywords = keywords
+        self.processed = processed
+        self.postings = postings
+        self.char_postings = char_postings
+        self.single_char_ids = single_char_ids
+
+
+class MappedKnowledgeBase:
+    """
+    KnowledgeBase read in place from an artifact written by build_artifact.
+
+    Has the same attributes as KnowledgeBase and gives the same results.
+    Mappings and sequences are read-only views decoding entries on access,
+    the matcher and fuzzy index run the same code over the mapped tables.
+    """
+
+    def __init__(self, path):
+        """
+        Map an artifact
+
+        Args:
+            path (Path): Artifact file
+
+        Raises:
+            ValueError: If the file is not an artifact this version can read,
+                or is truncated or corrupt
+        """
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read(memoryview(self._mmap), path)
+        except (KeyError, TypeError, IndexError) as e:
+            # A header or section that does not hold what the checks below
+            # expect
+            raise ValueError(f"{path} is corrupt, rebuild it") from e
+
+    def _read(self, buffer, path):
+        """Decode the header and wrap the sections of a mapped artifact"""
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a knowledge base artifact")
+        header_length = int.from_bytes(buffer[len(MAGIC):len(MAGIC) + 4], "little")
+        header_start = len(MAGIC) + 4
+        header = json.loads(bytes(buffer[header_start:header_start + header_length]))
+        if header["format_version"] != FORMAT_VERSION or header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was built by an incompatible version, rebuild it")
+
+        data_start = (header_start + header_length + 7) & ~7
+        sections = {
+            name: buffer[data_start + offset:data_start + offset + size].cast(typecode)
+            for name, (offset, size, typecode) in header["sections"].items()
+        }
+
+        self.version = header["version"]
+        self.sources = header["sources"]
+        self.id_typecode = header["id_typecode"]
+
+        strings = _StringTable(sections["string_offsets"], sections["string_blob"])
+
+        def table(name):
+            return _HashTable(strings, sections[f"{name}_seeds"], sections[f"{name}_keys"],
+                              sections[f"{name}_values"])
+
+        self.skill_names = _StringList(strings, sections["skill_names"])
+        self.skill_category_ids = sections["skill_category_ids"]
+        self.skill_ids = _LookupMapping(self.skill_names, table("skill_table").lookup)
+
+        self._alias_skill_ids = sections["alias_skill_ids"]
+        alias_names = _StringList(strings, sections["alias_names"])
+        alias_table = table("alias_table")
+
+        def alias_skill_id(alias):
+            alias_id = alias_table.lookup(alias)
+            return None if alias_id is None else self._alias_skill_ids[alias_id]
+
+        def canonical(alias):
+            skill_id = alias_skill_id(alias)
+            return None if skill_id is None else self.skill_names[skill_id]
+
+        self.alias_ids = _LookupMapping(alias_names, alias_skill_id)
+        self.skill_dict = _LookupMapping(alias_names, canonical)
+
+        # Categories are few, so their names are decoded up front
+        self.category_names = tuple(_StringList(strings, sections["category_names"]))
+        self.category_ids = {name: i for i, name in enumerate(self.category_names)}
+        member_starts = sections["category_member_starts"]
+        members = sections["category_members"]
+
+        def category_members(category):
+            i = self.category_ids.get(category)
+            if i is None or i >= header["source_categories"]:
+                return None
+            return tuple(strings[j] for j in members[member_starts[i]:member_starts[i + 1]])
+
+        self.skill_categories = _LookupMapping(
+            self.category_names[:header["source_categories"]], category_members
+        )
+        reverse_table = table("reverse_table")
+
+        def skill_category(skill):
+            i = reverse_table.lookup(skill)
+            return None if i is None else self.category_names[i]
+
+        self.skill_to_category = _LookupMapping(_StringList(strings, sections["reverse_keys"]), skill_category)
+
+        self._node_aliases = sections["node_aliases"]
+        self._edges = table("edge_table")
+        self.matcher = _MappedSkillMatcher(self, header["max_length"])
+
+        posting_starts = sections["posting_starts"]
+        postings = sections["postings"]
+        self.fuzzy_index = _MappedFuzzyIndex(
+            alias_names,
+            _StringList(strings, sections["alias_processed"]),
+            _PostingLists(table("bigram_table"), posting_starts, postings),
+            _PostingLists(table("char_table"), posting_starts, postings),
+            sections["single_char_ids"],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        epilog="\n\n".join(__doc__.split("\n\n")[-2:]),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("-o", "--output", type=Path, default=None,
+                        help="artifact file (default: JD_KB_ARTIFACT or data/knowledge_base.bin)")
+    args = parser.parse_args()
+
+    from knowledge_base import KnowledgeBase, write_default_file
+    from skill_categorizer import DEFAULT_SKILL_CATEGORIES, load_skill_categories, skill_categories_path
+    from skill_extractor import DEFAULT_SKILL_DICT, load_skill_dictionary, skill_dict_path
+
+    write_default_file(skill_dict_path, DEFAULT_SKILL_DICT)
+    write_default_file(skill_categories_path, DEFAULT_SKILL_CATEGORIES)
+    # Hash the sources before loading so that a concurrent edit makes the
+    # artifact look stale rather than current
+    sources = source_hashes(skill_dict_path, skill_categories_path)
+    knowledge_base = KnowledgeBase(load_skill_dictionary(), load_skill_categories())
+
+    output = args.output or artifact_path()
+    build_artifact(knowledge_base, output, sources)
+    print(f"Wrote {output} ({output.stat().st_size} bytes, {len(knowledge_base.skill_dict)} aliases, "
+          f"{len(knowledge_base.skill_names)} skills, version {knowledge_base.version})")
+
+
+if __name__ == "__main__":
+    main()
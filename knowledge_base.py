@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import threading
+from array import array
+from types import MappingProxyType
+
+from fuzzy_index import FuzzyIndex
+from kb_artifact import MappedKnowledgeBase, artifact_path, build_artifact, source_hashes
+from skill_matcher import SkillMatcher
+
+
+class KnowledgeBase:
+    """
+    Read-only snapshot of the skill dictionary, the skill categories and
+    everything compiled from them.
+
+    A snapshot is never modified after it is built; a reload builds a new one
+    and swaps it in, so a snapshot can be shared freely between threads and
+    callers holding an old one keep a consistent view.
+    """
+
+    def __init__(self, skill_dict, skill_categories):
+        """
+        Build the snapshot
+
+        Args:
+            skill_dict (dict): Mapping of lowercase aliases to canonical skill names
+            skill_categories (dict): Mapping of categories to lists of skills
+        """
+        self.skill_dict = MappingProxyType(dict(skill_dict))
+        self.skill_categories = MappingProxyType(
+            {category: tuple(skills) for category, skills in skill_categories.items()}
+        )
+
+        # Reverse mapping of lowercase skills to categories
+        skill_to_category = {}
+        for category, skills in self.skill_categories.items():
+            for skill in skills:
+                skill_to_category[skill.lower()] = category
+        self.skill_to_category = MappingProxyType(skill_to_category)
+
+        # Interned ids: skills are numbered in sorted order of their canonical
+        # names, categories in file order with "Uncategorized" always present
+        self.skill_names = tuple(sorted(set(self.skill_dict.values())))
+        self.skill_ids = MappingProxyType({name: i for i, name in enumerate(self.skill_names)})
+        self.alias_ids = MappingProxyType(
+            {alias: self.skill_ids[canonical] for alias, canonical in self.skill_dict.items()}
+        )
+        category_names = list(self.skill_categories)
+        if "Uncategorized" not in self.skill_categories:
+            category_names.append("Uncategorized")
+        self.category_names = tuple(category_names)
+        self.category_ids = MappingProxyType({name: i for i, name in enumerate(self.category_names)})
+        # Typecode of id arrays: two bytes per id unless there are too many skills
+        self.id_typecode = "H" if len(self.skill_names) <= 1 << 16 else "I"
+        # Category id of every skill id
+        self.skill_category_ids = array("H", (
+            self.category_ids[skill_to_category.get(name.lower(), "Uncategorized")]
+            for name in self.skill_names
+        ))
+
+        self.matcher = SkillMatcher(self.skill_dict)
+        self.fuzzy_index = FuzzyIndex(self.skill_dict.keys())
+
+        # Content hash identifying this dictionary and category set
+        content = json.dumps([skill_dict, skill_categories], sort_keys=True)
+        self.version = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+def _file_signature(path):
+    """
+    Cheap change marker for a source file
+
+    Returns:
+        tuple: (mtime_ns, size) of the file, or None if it does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def write_default_file(path, data):
+    """
+    Create a missing data file with its default content
+
+    Failures are ignored so that read-only installs keep working with the
+    built-in defaults.
+
+    Args:
+        path (Path): JSON file to create
+        data (dict): Default content
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "x") as f:
+            json.dump(data, f, indent=4)
+    except OSError:
+        pass
+
+
+_lock = threading.Lock()
+# (signature, knowledge_base) of the loaded snapshot, replaced as one tuple so
+# readers never see a snapshot paired with another snapshot's signature
+_current = (None, None)
+
+
+def get_knowledge_base():
+    """
+    Get the process-wide knowledge base
+
+    The JSON files are parsed once per process. Later calls only stat them
+    and rebuild the snapshot when their modification time or size changed.
+    If an artifact built from the current files exists (see kb_artifact), it
+    is mapped instead of parsing and compiling the JSON.
+
+    Returns:
+        KnowledgeBase: Current snapshot
+    """
+    global _current
+
+    # Imported here because both modules use this one for their lookups
+    from skill_categorizer import DEFAULT_SKILL_CATEGORIES, load_skill_categories, skill_categories_path
+    from skill_extractor import DEFAULT_SKILL_DICT, load_skill_dictionary, skill_dict_path
+
+    signature = (_file_signature(skill_dict_path), _file_signature(skill_categories_path))
+    current_signature, knowledge_base = _current
+    if knowledge_base is not None and current_signature == signature:
+        return knowledge_base
+
+    with _lock:
+        # Another thread may have reloaded while we waited for the lock
+        current_signature, knowledge_base = _current
+        if None in signature:
+            # Write the default files on first use rather than at import
+            write_default_file(skill_dict_path, DEFAULT_SKILL_DICT)
+            write_default_file(skill_categories_path, DEFAULT_SKILL_CATEGORIES)
+            signature = (_file_signature(skill_dict_path), _file_signature(skill_categories_path))
+        if knowledge_base is None or current_signature != signature:
+            knowledge_base = _open_artifact(skill_dict_path, skill_categories_path)
+            if knowledge_base is None:
+                knowledge_base = KnowledgeBase(load_skill_dictionary(), load_skill_categories())
+            _current = (signature, knowledge_base)
+        return knowledge_base
+
+
+def _open_artifact(skill_dict_path, skill_categories_path):
+    """
+    Map the prebuilt artifact if it was built from the current JSON files
+
+    An artifact that cannot be read is rebuilt from the JSON files.
+
+    Returns:
+        MappedKnowledgeBase: The artifact, None if it is missing, stale or
+            cannot be opened, or the KnowledgeBase it was rebuilt from
+    """
+    path = artifact_path()
+    if not path.exists():
+        return None
+    try:
+        knowledge_base = MappedKnowledgeBase(path)
+    except OSError:
+        return None
+    except ValueError:
+        # Corrupt or from another format version
+        return _rebuild_artifact(path, skill_dict_path, skill_categories_path)
+    if knowledge_base.sources != source_hashes(skill_dict_path, skill_categories_path):
+        return None
+    return knowledge_base
+
+
+def _rebuild_artifact(path, skill_dict_path, skill_categories_path):
+    """
+    Replace an unreadable artifact with one built from the JSON files
+
+    Returns:
+        KnowledgeBase: Snapshot loaded from the JSON files, whether or not
+            the artifact could be written
+    """
+    from skill_categorizer import load_skill_categories
+    from skill_extractor import load_skill_dictionary
+
+    # Hashed before loading, as in kb_artifact.main
+    sources = source_hashes(skill_dict_path, skill_categories_path)
+    knowledge_base = KnowledgeBase(load_skill_dictionary(), load_skill_categories())
+    try:
+        build_artifact(knowledge_base, path, sources)
+    except OSError:
+        pass
+    return knowledge_base
@@ -0,0 +1,292 @@
+"""
+Near-duplicate detection in front of the pipeline.
+
+Scraped feeds carry the same job description many times with small edits
+(location, date, a recruiter footer), which the exact-text result cache
+misses. NearDuplicateFilter gives every document a MinHash signature over
+word shingles of its normalized text, finds earlier documents with similar
+signatures through banded locality-sensitive hashing, and reuses the result
+of the first document of such a cluster (its representative) instead of
+running spaCy and fuzzy matching again.
+
+A reused result can differ from what the document itself would give, e.g.
+when the edit added a skill. Set audit_fraction to analyze a sample of the
+skipped documents anyway and report how often that happens.
+"""
+import zlib
+from collections import OrderedDict, deque
+
+from normalizer import normalize_text
+from pipeline import analyze_batch
+
+# Words per shingle
+SHINGLE_WORDS = 5
+
+# MinHash permutations per signature
+NUM_PERM = 128
+
+# Representatives kept for matching, about 5 KB each with their result;
+# cross-posts tend to arrive close together, so older ones are forgotten
+MAX_REPRESENTATIVES = 20_000
+
+# Smallest prime above 2**32, so that (a * x + b) % _PRIME fits in 64 bits
+_PRIME = (1 << 32) + 15
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """
+    Hashes of the word shingles of a text
+
+    Shingles are taken from the output of preprocessing's cleaning step
+    (normalize_text); tokenizing with spaCy first would cost what the
+    deduplication is meant to save.
+
+    Args:
+        text (str): Raw job description text
+        size (int): Words per shingle
+
+    Returns:
+        set: crc32 of every run of size words, or of all words for shorter texts
+    """
+    words = normalize_text(text).split(' ')
+    if len(words) <= size:
+        return {zlib.crc32(' '.join(words).encode("utf-8"))}
+    return {
+        zlib.crc32(' '.join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+class MinHasher:
+    """MinHash signatures under num_perm random universal hash functions"""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_hashes):
+        """
+        Signature of a shingle set
+
+        Args:
+            shingle_hashes (set): 32-bit shingle hashes
+
+        Returns:
+            numpy.ndarray: num_perm minimum hash values
+        """
+        import numpy as np
+
+        hashes = np.fromiter(shingle_hashes, dtype=np.uint64, count=len(shingle_hashes))
+        return ((np.outer(hashes, self.a) + self.b) % _PRIME).min(axis=0).astype(np.uint32)
+
+
+def lsh_params(threshold, num_perm=NUM_PERM):
+    """
+    Bands and rows per band for a Jaccard similarity threshold
+
+    Picks the split minimizing the probability mass of false candidates
+    below the threshold plus missed pairs above it.
+
+    Returns:
+        tuple: (bands, rows)
+    """
+    import numpy as np
+
+    # Midpoints of 200 equal steps below and above the threshold
+    low = (np.arange(200) + 0.5) / 200 * threshold
+    high = threshold + (np.arange(200) + 0.5) / 200 * (1 - threshold)
+    best = None
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        false_positives = (1 - (1 - low ** rows) ** bands).mean() * threshold
+        false_negatives = ((1 - high ** rows) ** bands).mean() * (1 - threshold)
+        error = false_positives + false_negatives
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    """
+    LSH index of representative signatures.
+
+    Each signature is split into bands; signatures sharing any band are
+    candidates, and a candidate matches if the share of equal signature
+    values (an estimate of the Jaccard similarity of the shingle sets) is at
+    least the threshold.
+    """
+
+    def __init__(self, threshold, num_perm=NUM_PERM, max_representatives=MAX_REPRESENTATIVES):
+        self.threshold = threshold
+        self.max_representatives = max_representatives
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        # Band hash -> keys of the representatives with that band
+        self.buckets = [{} for _ in range(self.bands)]
+        # Key -> (signature, value), oldest first
+        self.entries = OrderedDict()
+        self.next_key = 0
+
+    def _band_hashes(self, signature):
+        rows = self.rows
+        return [hash(signature[i * rows:(i + 1) * rows].tobytes()) for i in range(self.bands)]
+
+    def find(self, signature):
+        """
+        Value of the most similar representative at or above the threshold
+
+        Returns:
+            object: The value given to add, or None
+        """
+        candidates = set()
+        for bucket, band in zip(self.buckets, self._band_hashes(signature)):
+            candidates.update(bucket.get(band, ()))
+
+        best = None
+        best_similarity = self.threshold
+        for key in candidates:
+            other, value = self.entries[key]
+            similarity = (other == signature).mean()
+            if similarity >= best_similarity:
+                best = value
+                best_similarity = similarity
+        return best
+
+    def add(self, signature, value):
+        """Add a representative, forgetting the oldest one when full"""
+        key = self.next_key
+        self.next_key += 1
+        self.entries[key] = (signature, value)
+        for bucket, band in zip(self.buckets, self._band_hashes(signature)):
+            bucket.setdefault(band, []).append(key)
+
+        if len(self.entries) > self.max_representatives:
+            old_key, (old_signature, _) = self.entries.popitem(last=False)
+            for bucket, band in zip(self.buckets, self._band_hashes(old_signature)):
+                keys = bucket[band]
+                keys.remove(old_key)
+                if not keys:
+                    del bucket[band]
+
+
+class NearDuplicateFilter:
+    """
+    Skip near-duplicate documents in bulk runs.
+
+    Keeps statistics over all calls: documents seen, representatives
+    analyzed, duplicates skipped and, among the audited duplicates, false
+    merges (reused results differing from the document's own).
+    """
+
+    def __init__(self, threshold=0.9, audit_fraction=0.0, num_perm=NUM_PERM,
+                 max_representatives=MAX_REPRESENTATIVES):
+        """
+        Args:
+            threshold (float): Minimum estimated Jaccard similarity of the
+                shingle sets for a document to reuse a result
+            audit_fraction (float): Share of near-duplicates analyzed anyway
+                to measure the false-merge rate; their own result is returned
+            num_perm (int): MinHash permutations per signature
+            max_representatives (int): Representatives kept for matching
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        if not 0 <= audit_fraction <= 1:
+            raise ValueError("audit_fraction must be in [0, 1]")
+        self.audit_fraction = audit_fraction
+        self.hasher = MinHasher(num_perm)
+        self.index = NearDuplicateIndex(threshold, num_perm, max_representatives)
+
+        self.documents = 0
+        self.representatives = 0
+        self.skipped = 0
+        self.audited = 0
+        self.false_merges = 0
+
+    @property
+    def skip_ratio(self):
+        """Share of documents whose extraction was skipped"""
+        return self.skipped / self.documents if self.documents else 0.0
+
+    @property
+    def false_merge_rate(self):
+        """Share of audited near-duplicates whose own result differs"""
+        return self.false_merges / self.audited if self.audited else 0.0
+
+    def stats(self):
+        """
+        Counters and rates so far
+
+        Returns:
+            dict: documents, representatives, skipped, audited, false_merges,
+                skip_ratio and false_merge_rate
+        """
+        return {
+            "documents": self.documents,
+            "representatives": self.representatives,
+            "skipped": self.skipped,
+            "audited": self.audited,
+            "false_merges": self.false_merges,
+            "skip_ratio": round(self.skip_ratio, 4),
+            "false_merge_rate": round(self.false_merge_rate, 4),
+        }
+
+    def _audit_next(self):
+        """Whether the next near-duplicate is audited, spread evenly"""
+        duplicates = self.skipped + self.audited + 1
+        return int(duplicates * self.audit_fraction) > self.audited
+
+    def analyze_batch(self, texts, batch_size=64, n_process=1, cache=None):
+        """
+        pipeline.analyze_batch with near-duplicates answered from their representative
+
+        Args:
+            texts (iterable): Raw job description texts
+            batch_size (int): Number of texts per chunk
+            n_process (int): Number of worker processes
+            cache (ResultCache): Optional result cache
+
+        Yields:
+            dict: analyze_text result for each text, in input order
+        """
+        # One entry per text read, in input order: (own, representative).
+        # own is a one-item list receiving the text's result if it is
+        # analyzed, representative the list of the representative whose
+        # result it reuses or is audited against.
+        pending = deque()
+
+        def analyzed_texts():
+            for text in texts:
+                self.documents += 1
+                signature = self.hasher.signature(shingles(text or ""))
+                representative = self.index.find(signature)
+                if representative is None:
+                    own = [None]
+                    self.index.add(signature, own)
+                    self.representatives += 1
+                    pending.append((own, None))
+                    yield text
+                elif self._audit_next():
+                    self.audited += 1
+                    pending.append(([None], representative))
+                    yield text
+                else:
+                    self.skipped += 1
+                    pending.append((None, representative))
+
+        def flush_skipped():
+            # Representatives are analyzed before their duplicates and
+            # results come back in order, so their results are known here
+            while pending and pending[0][0] is None:
+                yield pending.popleft()[1][0]
+
+        for result in analyze_batch(analyzed_texts(), batch_size=batch_size, n_process=n_process, cache=cache):
+            yield from flush_skipped()
+            own, representative = pending.popleft()
+            own[0] = result
+            if representative is not None and result != representative[0]:
+                self.false_merges += 1
+            yield result
+        yield from flush_skipped()
@@ -0,0 +1,82 @@
+import os
+import threading
+
+# Pipeline modes:
+#   full  - en_core_web_sm with every component (tagger, parser, NER, ...)
+#   lean  - en_core_web_sm with all components excluded, tokenizer only
+#   blank - blank English tokenizer, no trained model needed at all
+#   fast  - no spaCy at all; normalizer.FastTokenizer replays spaCy's
+#           tokenizer rules in pure Python
+# Preprocessing only reads lexical token attributes (text, is_punct, is_space,
+# is_stop, like_num), which the tokenizer and vocabulary provide on their own,
+# so all modes produce the same extraction output.
+NLP_MODES = ("full", "lean", "blank", "fast")
+
+# Components of en_core_web_sm that the lean mode leaves out
+LEAN_EXCLUDE = ["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "ner"]
+
+def load_nlp(mode="full"):
+    """
+    Load the spaCy pipeline used for preprocessing
+    
+    Args:
+        mode (str): One of NLP_MODES
+        
+    Returns:
+        Language: Loaded spaCy pipeline, or None in fast mode
+    """
+    if mode not in NLP_MODES:
+        raise ValueError(f"Unknown NLP mode {mode!r}, expected one of {', '.join(NLP_MODES)}")
+    
+    if mode == "fast":
+        return None
+    
+    import spacy
+    
+    if mode == "blank":
+        return spacy.blank("en")
+    
+    exclude = LEAN_EXCLUDE if mode == "lean" else []
+    try:
+        return spacy.load("en_core_web_sm", exclude=exclude)
+    except OSError:
+        if os.environ.get("JD_NLP_DOWNLOAD", "1") == "0":
+            raise OSError(
+                "en_core_web_sm is not installed and JD_NLP_DOWNLOAD=0 forbids downloading it; "
+                "install it with `python -m spacy download en_core_web_sm` "
+                "or set JD_NLP_MODE=blank or fast"
+            ) from None
+        # If the model is not installed, download and load it
+        from spacy.cli import download
+        download("en_core_web_sm")
+        return spacy.load("en_core_web_sm", exclude=exclude)
+
+# Mode of the shared model, configurable through the environment
+nlp_mode = os.environ.get("JD_NLP_MODE", "full")
+
+# Shared model, loaded by the first get_nlp() call rather than at import so
+# that importing the package stays fast and never touches the network
+_nlp = None
+_loaded = False
+_load_lock = threading.Lock()
+
+def get_nlp():
+    """
+    Get the spaCy model shared by the whole process, loading it on first use
+    
+    Returns:
+        Language: Pipeline for nlp_mode, or None in fast mode
+    """
+    global _nlp, _loaded
+    if not _loaded:
+        with _load_lock:
+            if not _loaded:
+                _nlp = load_nlp(nlp_mode)
+                _loaded = True
+    return _nlp
+
+def __getattr__(name):
+    # Keep `nlp_model.nlp` working for existing callers; it loads the model
+    if name == "nlp":
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,524 @@
+import json
+import re
+import unicodedata
+from functools import lru_cache
+from itertools import compress
+from pathlib import Path
+
+# Tokenizer rules exported from spaCy's English tokenizer (see export_tokenizer_rules)
+tokenizer_rules_path = Path(__file__).resolve().parent / "data" / "tokenizer_rules.json"
+
+# Stop words dropped during preprocessing; all other stop words are kept since
+# they can be part of technical terms (e.g., "of" in "Internet of Things")
+EXCLUDED_STOP_WORDS = frozenset({'a', 'an', 'the', 'is', 'was', 'were', 'be', 'been', 'being'})
+
+_NUM_WORDS = frozenset({
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight",
+    "nine", "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen",
+    "sixteen", "seventeen", "eighteen", "nineteen", "twenty", "thirty", "forty",
+    "fifty", "sixty", "seventy", "eighty", "ninety", "hundred", "thousand",
+    "million", "billion", "trillion", "quadrillion", "quintillion", "sextillion",
+    "septillion", "octillion", "nonillion", "decillion", "gajillion", "bazillion",
+    "first", "second", "third", "fourth", "fifth", "sixth", "seventh", "eighth",
+    "ninth", "tenth", "eleventh", "twelfth", "thirteenth", "fourteenth",
+    "fifteenth", "sixteenth", "seventeenth", "eighteenth", "nineteenth",
+    "twentieth", "thirtieth", "fortieth", "fiftieth", "sixtieth", "seventieth",
+    "eightieth", "ninetieth", "hundredth", "thousandth", "millionth", "billionth",
+    "trillionth", "quadrillionth", "quintillionth", "sextillionth", "septillionth",
+    "octillionth", "nonillionth", "decillionth", "gajillionth", "bazillionth",
+})
+
+
+def normalize_text(text):
+    """
+    Lowercase text, strip URLs and email addresses and collapse whitespace
+
+    Equivalent to the former chain of ``re.sub(r'http\\S+', '')``,
+    ``re.sub(r'\\S*@\\S*\\s?', '')`` and ``re.sub(r'\\s+', ' ')`` on the
+    lowercased text, except that leading and trailing whitespace is dropped.
+    Both patterns only ever remove (the tail of) a whitespace-delimited word,
+    so the text is handled as words in one pass; the email pattern in
+    particular was retried at every character of the text.
+
+    Args:
+        text (str): Raw job description text
+
+    Returns:
+        str: Normalized text with single spaces between words
+    """
+    if not text:
+        return ""
+
+    text = text.lower()
+    has_url = 'http' in text
+    has_email = '@' in text
+    if not has_url and not has_email:
+        return ' '.join(text.split())
+
+    words = []
+    for word in text.split():
+        if has_url:
+            # "http" followed by at least one more character starts a URL
+            # running to the end of the word
+            start = word.find('http')
+            if start != -1 and start + 4 < len(word):
+                word = word[:start]
+        # Any remaining word with an "@" is an email address
+        if word and '@' not in word:
+            words.append(word)
+    return ' '.join(words)
+
+
+_word_re = re.compile(r"\S+")
+
+
+def normalize_words(text):
+    """
+    Words of normalize_text(text) with their position in the raw text
+
+    ``' '.join(word for word, _, _ in normalize_words(text))`` equals
+    ``normalize_text(text)``, so tokens of the normalized text can be traced
+    back to the characters of the raw text they came from.
+
+    Args:
+        text (str): Raw job description text
+
+    Returns:
+        list: (word, start, end) for every normalized word, with the offsets
+            of the whole raw word it was cut from
+    """
+    words = []
+    for match in _word_re.finditer(text):
+        word = normalize_word(match.group())
+        if word:
+            words.append((word, match.start(), match.end()))
+    return words
+
+
+def normalize_word(word):
+    """
+    Normalize one whitespace-free word of raw text like normalize_text does
+
+    Args:
+        word (str): Raw word
+
+    Returns:
+        str: Lowercased word without a trailing URL, or "" if nothing of it
+            is kept
+    """
+    word = word.lower()
+    start = word.find('http')
+    if start != -1 and start + 4 < len(word):
+        word = word[:start]
+    if '@' in word:
+        return ""
+    return word
+
+
+def is_punct(token):
+    """Same as spaCy's is_punct: every character is Unicode punctuation"""
+    return all(unicodedata.category(char).startswith("P") for char in token)
+
+
+def like_num(token):
+    """Same as spaCy's English like_num lexical attribute"""
+    if token.startswith(("+", "-", "±", "~")):
+        token = token[1:]
+    token = token.replace(",", "").replace(".", "")
+    if token.isdigit():
+        return True
+    if token.count("/") == 1:
+        num, denom = token.split("/")
+        if num.isdigit() and denom.isdigit():
+            return True
+    token = token.lower()
+    if token in _NUM_WORDS:
+        return True
+    if token.endswith(("st", "nd", "rd", "th")) and token[:-2].isdigit():
+        return True
+    return False
+
+
+def keep_token(token):
+    """
+    Whether preprocessing keeps a token
+
+    Drops punctuation, whitespace, numbers and EXCLUDED_STOP_WORDS, like the
+    spaCy-based filter in preprocessing.doc_tokens.
+    """
+    return not (
+        is_punct(token)
+        or token.isspace()
+        or token in EXCLUDED_STOP_WORDS
+        or like_num(token)
+    )
+
+
+class FastTokenizer:
+    """
+    Pure-Python port of spaCy's rule-based tokenizer.
+
+    Uses the prefix, suffix, infix and URL patterns and the special cases of
+    spaCy's English tokenizer, loaded from data/tokenizer_rules.json, and
+    applies them with the same algorithm as spacy.tokenizer.Tokenizer,
+    including its second pass that finds special cases among the tokens left
+    by affix and infix splits (e.g. "r." in "python/r."). Words are tokenized
+    once and cached, as spaCy does; only words whose tokens could continue a
+    special case across the space between them are tokenized together.
+    """
+
+    def __init__(self, rules):
+        """
+        Compile the tokenizer
+
+        Args:
+            rules (dict): Rules as written by export_tokenizer_rules
+        """
+        self.prefix_search = re.compile(rules["prefix"]).search
+        self.suffix_search = re.compile(rules["suffix"]).search
+        self.infix_finditer = re.compile(rules["infix"]).finditer
+        self.url_match = re.compile(rules["url_match"]).match if rules.get("url_match") else None
+        self.specials = {key: tuple(value) for key, value in rules["specials"].items()}
+        # spaCy matches special cases that contain affixes against the tokens
+        # they are split into without special cases
+        self.special_patterns = {
+            self._split_word(key, {})
+            for key in self.specials
+            if key.strip() and (
+                self._affix_length(self.prefix_search, key)
+                or self._affix_length(self.suffix_search, key)
+                or next(self.infix_finditer(key), None) is not None
+            )
+        }
+        self.special_pattern_lengths = sorted({len(pattern) for pattern in self.special_patterns}, reverse=True)
+        # Neighbouring tokens of the patterns; a match can only span a space
+        # between two words if their tokens there form one of these pairs
+        self.special_pattern_pairs = {
+            pair for pattern in self.special_patterns for pair in zip(pattern, pattern[1:])
+        }
+        self.special_pattern_seconds = {second for _, second in self.special_pattern_pairs}
+        self.split_word = lru_cache(maxsize=100_000)(self._split_word_with_specials)
+        self.tokenize_word = lru_cache(maxsize=100_000)(self._tokenize_word)
+        self.may_continue_special = lru_cache(maxsize=100_000)(self._may_continue_special)
+        self.kept_tokens = lru_cache(maxsize=100_000)(self._kept_tokens)
+        self.kept_token_positions = lru_cache(maxsize=100_000)(self._kept_token_positions)
+
+    def _affix_length(self, search, string):
+        match = search(string)
+        return match.end() - match.start() if match is not None else 0
+
+    def _split_word_with_specials(self, string):
+        """Tokens of one space-free word before the special case pass"""
+        return self._split_word(string, self.specials)
+
+    def _tokenize_word(self, string):
+        """Tokens of one space-free word, as a tuple"""
+        return self._apply_special_cases([self.split_word(string)])[0]
+
+    def _may_continue_special(self, string):
+        """Whether a special case match may continue into a word from the word before it"""
+        return self.split_word(string)[0] in self.special_pattern_seconds
+
+    def _apply_special_cases(self, word_tokens):
+        """
+        Merge runs of tokens spelling a special case, like spaCy's
+        Tokenizer._apply_special_cases
+
+        Longer matches win, then earlier ones. Matches spanning the space
+        between two words are never applied, as their text is no special
+        case, but still block the matches they overlap, as in spaCy.
+
+        Args:
+            word_tokens (list): Tokens of consecutive words, a tuple per word
+
+        Returns:
+            list: Tokens of every word after merging
+        """
+        tokens = tuple(token for word in word_tokens for token in word)
+        matches = [
+            (start, start + length)
+            for length in self.special_pattern_lengths
+            for start in range(len(tokens) - length + 1)
+            if tokens[start:start + length] in self.special_patterns
+        ]
+        if not matches:
+            return word_tokens
+
+        word_ends = []
+        end = 0
+        for word in word_tokens:
+            end += len(word)
+            word_ends.append(end)
+        word_of = [i for i, word in enumerate(word_tokens) for _ in word]
+
+        seen = set()
+        replaced = {}
+        for start, end in matches:
+            if start not in seen and end - 1 not in seen and word_of[start] == word_of[end - 1]:
+                replaced[start] = end
+            seen.update(range(start, end))
+        if not replaced:
+            return word_tokens
+
+        merged_words = []
+        i = 0
+        for word_end in word_ends:
+            merged = []
+            while i < word_end:
+                end = replaced.get(i)
+                if end is None:
+                    merged.append(tokens[i])
+                    i += 1
+                else:
+                    merged.extend(self.specials["".join(tokens[i:end])])
+                    i = end
+            merged_words.append(tuple(merged))
+        return merged_words
+
+    def _tokenize_words(self, words):
+        """
+        Tokens of the words of a text that cannot be tokenized on their own
+
+        Words are tokenized on their own and cached, except for runs of
+        words whose special case matches may span the spaces between them.
+
+        Args:
+            words (list): Space-free words of the text, in order
+
+        Returns:
+            dict: Tokens of every word of such a run as a tuple, by index
+        """
+        # Few words start with a token that continues a pattern, so check those first
+        candidates = compress(range(1, len(words)), map(self.may_continue_special, words[1:]))
+        pairs = self.special_pattern_pairs
+        split_word = self.split_word
+        joined = [
+            i for i in candidates
+            if (split_word(words[i - 1])[-1], split_word(words[i])[0]) in pairs
+        ]
+        if not joined:
+            return {}
+
+        together = {}
+        start = end = joined[0] - 1
+        for i in joined + [None]:
+            if i != end + 1:
+                run = range(start, end + 1)
+                together.update(zip(run, self._apply_special_cases([split_word(words[j]) for j in run])))
+                if i is None:
+                    break
+                start = i - 1
+            end = i
+        return together
+
+    def _split_word(self, string, specials):
+        """Tokens of one space-free word from affixes, infixes and the given special cases"""
+        if string in specials:
+            return specials[string]
+
+        prefixes = []
+        suffixes = []
+        last_size = 0
+        while string and len(string) != last_size:
+            if string in specials:
+                break
+            last_size = len(string)
+
+            pre_len = self._affix_length(self.prefix_search, string)
+            if pre_len:
+                prefix = string[:pre_len]
+                minus_pre = string[pre_len:]
+                if minus_pre and minus_pre in specials:
+                    string = minus_pre
+                    prefixes.append(prefix)
+                    break
+
+            suf_len = self._affix_length(self.suffix_search, string[pre_len:])
+            if suf_len:
+                suffix = string[-suf_len:]
+                minus_suf = string[:-suf_len]
+                if minus_suf and minus_suf in specials:
+                    string = minus_suf
+                    suffixes.append(suffix)
+                    break
+
+            if pre_len and suf_len and pre_len + suf_len <= len(string):
+                string = string[pre_len:-suf_len]
+                prefixes.append(prefix)
+                suffixes.append(suffix)
+            elif pre_len:
+                string = minus_pre
+                prefixes.append(prefix)
+            elif suf_len:
+                string = minus_suf
+                suffixes.append(suffix)
+
+            if string and string in specials:
+                break
+
+        tokens = []
+        for prefix in prefixes:
+            tokens.extend(specials.get(prefix, (prefix,)))
+
+        if string:
+            if string in specials:
+                tokens.extend(specials[string])
+            elif self.url_match is not None and self.url_match(string):
+                tokens.append(string)
+            else:
+                start = 0
+                for match in self.infix_finditer(string):
+                    infix_start, infix_end = match.start(), match.end()
+                    if infix_start == 0:
+                        continue
+                    if infix_start != start:
+                        tokens.append(string[start:infix_start])
+                    if infix_start != infix_end:
+                        tokens.append(string[infix_start:infix_end])
+                    start = infix_end
+                if string[start:]:
+                    tokens.append(string[start:])
+
+        for suffix in reversed(suffixes):
+            tokens.extend(specials.get(suffix, (suffix,)))
+
+        return tuple(tokens)
+
+    def _kept_tokens(self, word):
+        """Tokens of one word that pass keep_token"""
+        return tuple(token for token in self.tokenize_word(word) if keep_token(token))
+
+    def _kept_token_positions(self, word, tokens=None):
+        """(token, start, end) of the tokens of one word that pass keep_token"""
+        positions = []
+        end = 0
+        for token in self.tokenize_word(word) if tokens is None else tokens:
+            # Tokens split the word without gaps; find only guards against
+            # special cases that do not
+            start = word.find(token, end)
+            if start == -1:
+                start = end
+            end = start + len(token)
+            if keep_token(token):
+                positions.append((token, start, end))
+        return tuple(positions)
+
+    def tokenize(self, text):
+        """
+        Tokenize text with single spaces between words
+
+        Args:
+            text (str): Output of normalize_text
+
+        Returns:
+            list: Token strings
+        """
+        words = [word for word in text.split(' ') if word]
+        together = self._tokenize_words(words)
+        tokens = []
+        for i, word in enumerate(words):
+            tokens.extend(together.get(i) or self.tokenize_word(word))
+        return tokens
+
+    def preprocess(self, text):
+        """
+        Tokenize normalized text and drop the tokens preprocessing filters out
+
+        Args:
+            text (str): Output of normalize_text
+
+        Returns:
+            list: Kept tokens, in document order
+        """
+        kept_tokens = self.kept_tokens
+        words = [word for word in text.split(' ') if word]
+        together = self._tokenize_words(words)
+        if not together:
+            return [token for word in words for token in kept_tokens(word)]
+        tokens = []
+        for i, word in enumerate(words):
+            if i in together:
+                tokens.extend(token for token in together[i] if keep_token(token))
+            else:
+                tokens.extend(kept_tokens(word))
+        return tokens
+
+    def preprocess_with_offsets(self, words):
+        """
+        Like preprocess, also giving the raw text offsets of every token
+
+        Args:
+            words (list): Output of normalize_words
+
+        Returns:
+            tuple: (tokens, offsets), offsets holding a (start, end) pair of
+                raw text positions for every token
+        """
+        tokens = []
+        offsets = []
+        kept_token_positions = self.kept_token_positions
+        together = self._tokenize_words([word for word, _, _ in words])
+        for i, (word, word_start, word_end) in enumerate(words):
+            if i in together:
+                positions = self._kept_token_positions(word, together[i])
+            else:
+                positions = kept_token_positions(word)
+            for token, start, end in positions:
+                tokens.append(token)
+                # Lowercasing can lengthen a word, never past its raw end
+                offsets.append((min(word_start + start, word_end), min(word_start + end, word_end)))
+        return tokens, offsets
+
+
+_fast_tokenizer = None
+
+
+def get_fast_tokenizer():
+    """
+    Get the shared FastTokenizer, loading the rules on first use
+
+    Returns:
+        FastTokenizer: Tokenizer compiled from data/tokenizer_rules.json
+    """
+    global _fast_tokenizer
+    if _fast_tokenizer is None:
+        with open(tokenizer_rules_path, 'r') as f:
+            _fast_tokenizer = FastTokenizer(json.load(f))
+    return _fast_tokenizer
+
+
+def export_tokenizer_rules(nlp, path=tokenizer_rules_path):
+    """
+    Write the rules of a spaCy tokenizer for FastTokenizer
+
+    Only lowercase special cases are kept since the text is lowercased
+    before tokenization.
+
+    Args:
+        nlp (Language): spaCy pipeline whose tokenizer is exported
+        path (str): Output JSON file
+    """
+    from spacy.attrs import ORTH
+
+    tokenizer = nlp.tokenizer
+    rules = {
+        "spacy_version": __import__("spacy").__version__,
+        "prefix": tokenizer.prefix_search.__self__.pattern,
+        "suffix": tokenizer.suffix_search.__self__.pattern,
+        "infix": tokenizer.infix_finditer.__self__.pattern,
+        "url_match": tokenizer.url_match.__self__.pattern if tokenizer.url_match else None,
+        "specials": {
+            key: [attrs[ORTH] for attrs in value]
+            for key, value in sorted(tokenizer.rules.items())
+            if key == key.lower()
+        },
+    }
+    with open(path, 'w') as f:
+        json.dump(rules, f, indent=1, ensure_ascii=False)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    import spacy
+
+    export_tokenizer_rules(spacy.blank("en"))
@@ -0,0 +1,231 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import fuzzy_index
+from instrumentation import count, current_trace, stage, tracing, tracing_enabled
+from knowledge_base import get_knowledge_base
+from nlp_model import get_nlp
+from preprocessing import preprocess_tokens, preprocess_tokens_batch
+from skill_extractor import extract_skill_ids
+from skill_ids import categorize_skill_ids, skill_names
+from streaming import analyze_text_stream
+
+# Texts longer than this are analyzed in windows, see streaming
+STREAM_MIN_CHARS = 100_000
+
+
+def warm_up():
+    """
+    Load the model and build the knowledge base ahead of the first document
+
+    Importing the pipeline loads nothing; without this call the first
+    analyzed document pays for loading the spaCy model (or the fast
+    tokenizer rules), reading the data files and compiling the matchers.
+    """
+    get_nlp()
+    get_knowledge_base()
+    _match_words(preprocess_tokens("warm up"))
+
+
+def init_worker():
+    """
+    Prepare a worker process of a pool running the pipeline
+
+    The pool's processes already occupy the cores, so fuzzy scoring runs on
+    one thread in each unless JD_FUZZY_WORKERS is set. Then warms up.
+    """
+    if "JD_FUZZY_WORKERS" not in os.environ:
+        fuzzy_index.fuzzy_workers = 1
+    warm_up()
+
+
+def analyze_text(text, cache=None):
+    """
+    Run preprocessing, skill extraction and categorization on a job description
+
+    The text is parsed by spaCy once; the cleaned tokens are handed straight
+    to the matcher instead of being joined into a string and split again.
+    Texts over STREAM_MIN_CHARS are processed in windows of words with the
+    same result (see streaming), so memory stays bounded.
+    Stage timings go to the active instrumentation trace, and each document
+    gets its own trace when trace callbacks or profiling are enabled.
+
+    Args:
+        text (str): Raw job description text
+        cache (ResultCache): Optional cache consulted before and filled after
+            the analysis
+
+    Returns:
+        dict: "skills" (list of extracted skills) and "categories" (dict of
+            categories to lists of skills)
+    """
+    if current_trace() is None and tracing_enabled():
+        with tracing():
+            return _analyze_text(text, cache)
+    return _analyze_text(text, cache)
+
+
+def _analyze_text(text, cache):
+    if cache is not None:
+        with stage("cache_lookup"):
+            result = cache.get(text)
+        if result is not None:
+            count("cache_hits")
+            return result
+        count("cache_misses")
+
+    if text and len(text) > STREAM_MIN_CHARS:
+        result = analyze_text_stream(text)
+    else:
+        result = _match_words(preprocess_tokens(text))
+
+    if cache is not None:
+        cache.put(text, result)
+    return result
+
+
+def _analyze_chunk(texts):
+    """
+    Analyze a list of texts in the current process with one nlp.pipe stream
+
+    Texts over STREAM_MIN_CHARS are left out of the stream and analyzed in
+    windows instead.
+
+    Returns:
+        list: analyze_text-style results, in input order
+    """
+    short_texts = [text for text in texts if not (text and len(text) > STREAM_MIN_CHARS)]
+    parsed = preprocess_tokens_batch(short_texts, batch_size=len(short_texts) or 1)
+
+    results = []
+    for text in texts:
+        if text and len(text) > STREAM_MIN_CHARS:
+            results.append(analyze_text_stream(text))
+            continue
+        words = next(parsed)
+        # spaCy parses the chunk as a whole, so per-document traces only
+        # cover matching and categorization
+        if tracing_enabled():
+            with tracing():
+                results.append(_match_words(words))
+        else:
+            results.append(_match_words(words))
+    return results
+
+
+def _match_words(words):
+    """Extract and categorize the skills in preprocessed words"""
+    knowledge_base = get_knowledge_base()
+    skill_ids = extract_skill_ids(words, knowledge_base)
+    with stage("categorize"):
+        categorized_skills = categorize_skill_ids(skill_ids, knowledge_base)
+    return {
+        "skills": skill_names(skill_ids, knowledge_base),
+        "categories": categorized_skills,
+    }
+
+
+def _chunks(texts, size):
+    """Split an iterable into lists of at most size items"""
+    iterator = iter(texts)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _analyze_chunk_cached(chunk, cache, analyze):
+    """
+    Analyze only the texts of a chunk that miss the cache
+
+    Args:
+        chunk (list): Raw texts
+        cache (ResultCache): Result cache, or None
+        analyze (callable): Maps a list of texts to their results
+
+    Returns:
+        callable: Returns the results of the whole chunk in input order once
+            the misses are analyzed
+    """
+    if cache is None:
+        pending = analyze(chunk)
+        return lambda: _result(pending)
+
+    results = [cache.get(text) for text in chunk]
+    misses = [text for text, result in zip(chunk, results) if result is None]
+    pending = analyze(misses) if misses else []
+
+    def finish():
+        computed = iter(_result(pending))
+        for i, text in enumerate(chunk):
+            if results[i] is None:
+                results[i] = next(computed)
+                cache.put(text, results[i])
+        return results
+
+    return finish
+
+
+def _result(pending):
+    """Value of a future, or the value itself for in-process work"""
+    return pending.result() if hasattr(pending, "result") else pending
+
+
+def analyze_batch(texts, batch_size=64, n_process=1, cache=None):
+    """
+    Analyze a stream of job descriptions
+
+    Texts are read lazily and processed in chunks of batch_size. With
+    n_process > 1 the chunks are spread over a pool of worker processes that
+    each run the whole pipeline (spaCy, matching and categorization), with at
+    most two chunks per worker in flight so memory stays bounded.
+
+    Args:
+        texts (iterable): Raw job description texts
+        batch_size (int): Number of texts per chunk
+        n_process (int): Number of worker processes
+        cache (ResultCache): Optional cache; only texts missing from it are
+            sent through the pipeline
+
+    Yields:
+        dict: analyze_text result for each text, in input order
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if n_process < 1:
+        raise ValueError("n_process must be at least 1")
+
+    if n_process == 1:
+        for chunk in _chunks(texts, batch_size):
+            yield from _analyze_chunk_cached(chunk, cache, _analyze_chunk)()
+        return
+
+    with ProcessPoolExecutor(max_workers=n_process, initializer=init_worker) as executor:
+        submit = lambda chunk: executor.submit(_analyze_chunk, chunk)
+        pending = deque()
+        for chunk in _chunks(texts, batch_size):
+            pending.append(_analyze_chunk_cached(chunk, cache, submit))
+            if len(pending) >= 2 * n_process:
+                yield from pending.popleft()()
+        while pending:
+            yield from pending.popleft()()
+
+
+def extract_skills_batch(texts, batch_size=64, n_process=1, cache=None):
+    """
+    Extract skills from a stream of job descriptions
+
+    Args:
+        texts (iterable): Raw job description texts
+        batch_size (int): Number of texts per chunk
+        n_process (int): Number of worker processes
+        cache (ResultCache): Optional result cache
+
+    Yields:
+        list: Extracted skills of each text, in input order
+    """
+    for result in analyze_batch(texts, batch_size=batch_size, n_process=n_process, cache=cache):
+        yield result["skills"]
@@ -1,57 +1,177 @@
-import re
-import spacy
 import os
 
-# Load spaCy NLP model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    # If the model is not installed, download and load it
-    import spacy.cli
-    spacy.cli.download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+from instrumentation import stage
+from nlp_model import get_nlp
+from normalizer import EXCLUDED_STOP_WORDS, get_fast_tokenizer, normalize_text, normalize_words
 
-def preprocess_text(text):
+def clean_text(text):
     """
-    Clean and preprocess job description text for analysis
+    Normalize raw job description text before tokenization
     
     Args:
         text (str): Raw job description text
         
     Returns:
-        str: Cleaned and preprocessed text
+        str: Lowercased text without URLs, email addresses or repeated whitespace
     """
-    if not text:
-        return ""
+    # Lowercase, strip URLs and emails and collapse whitespace in one pass
+    return normalize_text(text)
+
+def doc_tokens(doc):
+    """
+    Collect the tokens of a parsed document that are kept for analysis
     
-    # Convert to lowercase
-    text = text.lower()
+    Args:
+        doc (Doc): spaCy document parsed from the output of clean_text
+        
+    Returns:
+        list: Cleaned lowercase tokens, in document order
+    """
+    return [token.text for token in doc if keep_doc_token(token)]
+
+def keep_doc_token(token):
+    """
+    Whether a spaCy token is kept for analysis
     
-    # Remove URLs
-    text = re.sub(r'http\S+', '', text)
+    Args:
+        token (Token): Token of a document parsed from the output of clean_text
+        
+    Returns:
+        bool: False for punctuation, whitespace, numbers and EXCLUDED_STOP_WORDS
+    """
+    # Exclude punctuation and specific stop words
+    # Keep some stop words that might be part of technical terms (e.g., "of" in "Internet of Things")
+    return (not token.is_punct and                     # Skip punctuation
+            not token.is_space and                     # Skip whitespace
+            not (token.is_stop and token.text in EXCLUDED_STOP_WORDS) and  # Skip only certain stopwords
+            not token.like_num)                        # Skip numbers
+
+def doc_token_offsets(doc, words):
+    """
+    Raw text offsets of the tokens doc_tokens keeps
+    
+    Args:
+        doc (Doc): spaCy document parsed from the words joined with spaces
+        words (list): Output of normalize_words for the raw text
+        
+    Returns:
+        list: (start, end) character positions in the raw text for every
+            token of doc_tokens(doc)
+    """
+    offsets = []
+    word_index = -1
+    # Position of the current word in the parsed text, and where the next starts
+    word_position = next_position = 0
+    
+    for token in doc:
+        if not keep_doc_token(token):
+            continue
+        # Tokens never cross the single spaces between words
+        while token.idx >= next_position:
+            word_index += 1
+            word_position = next_position
+            next_position += len(words[word_index][0]) + 1
+        _, word_start, word_end = words[word_index]
+        start = token.idx - word_position
+        # Lowercasing can lengthen a word, never past its raw end
+        offsets.append((min(word_start + start, word_end), min(word_start + start + len(token.text), word_end)))
+    
+    return offsets
+
+def preprocess_tokens(text):
+    """
+    Clean job description text and return the tokens kept for analysis
+    
+    Args:
+        text (str): Raw job description text
+        
+    Returns:
+        list: Cleaned lowercase tokens, in document order
+    """
+    if not text:
+        return []
     
-    # Remove email addresses
-    text = re.sub(r'\S*@\S*\s?', '', text)
+    with stage("clean"):
+        text = clean_text(text)
     
-    # Replace multiple whitespaces with a single space
-    text = re.sub(r'\s+', ' ', text)
+    nlp = get_nlp()
+    
+    # Without spaCy, tokenize and filter in one pass over the words
+    if nlp is None:
+        with stage("tokenize"):
+            return get_fast_tokenizer().preprocess(text)
     
     # Process with spaCy
-    doc = nlp(text)
+    with stage("parse"):
+        doc = nlp(text)
     
-    # Collect tokens, excluding punctuation and specific stop words
-    # Keep some stop words that might be part of technical terms (e.g., "of" in "Internet of Things")
-    keep_tokens = []
-    excluded_stop_words = {'a', 'an', 'the', 'is', 'was', 'were', 'be', 'been', 'being'}
+    with stage("filter_tokens"):
+        return doc_tokens(doc)
+
+def preprocess_tokens_with_offsets(text):
+    """
+    Like preprocess_tokens, also giving where each token is in the raw text
     
-    for token in doc:
-        if (not token.is_punct and                     # Skip punctuation
-            not token.is_space and                     # Skip whitespace
-            not (token.is_stop and token.text in excluded_stop_words) and  # Skip only certain stopwords
-            not token.like_num):                       # Skip numbers
-            keep_tokens.append(token.text)
+    Args:
+        text (str): Raw job description text
+        
+    Returns:
+        tuple: (tokens, offsets) where tokens equals preprocess_tokens(text)
+            and offsets holds a (start, end) pair of character positions in
+            text for every token
+    """
+    if not text:
+        return [], []
     
-    # Join tokens back into text
-    processed_text = ' '.join(keep_tokens)
+    with stage("clean"):
+        words = normalize_words(text)
+    
+    nlp = get_nlp()
+    
+    if nlp is None:
+        with stage("tokenize"):
+            return get_fast_tokenizer().preprocess_with_offsets(words)
+    
+    # Same text as clean_text(text), which normalize_words splits up
+    with stage("parse"):
+        doc = nlp(' '.join(word for word, _, _ in words))
+    
+    with stage("filter_tokens"):
+        return doc_tokens(doc), doc_token_offsets(doc, words)
+
+def preprocess_tokens_batch(texts, batch_size=64, n_process=1):
+    """
+    Clean a stream of job descriptions, parsing them with nlp.pipe
+    
+    Args:
+        texts (iterable): Raw job description texts
+        batch_size (int): Number of texts spaCy processes at a time
+        n_process (int): Number of spaCy worker processes
+        
+    Yields:
+        list: Cleaned lowercase tokens of each text, in input order
+    """
+    cleaned = (clean_text(text) for text in texts)
+    
+    nlp = get_nlp()
+    if nlp is None:
+        tokenizer = get_fast_tokenizer()
+        for text in cleaned:
+            yield tokenizer.preprocess(text)
+        return
+    
+    for doc in nlp.pipe(cleaned, batch_size=batch_size, n_process=n_process):
+        yield doc_tokens(doc)
+
+def preprocess_text(text):
+    """
+    Clean and preprocess job description text for analysis
     
-    return processed_text
+    Args:
+        text (str): Raw job description text
+        
+    Returns:
+        str: Cleaned and preprocessed text
+    """
+    # Join tokens back into text
+    return ' '.join(preprocess_tokens(text))
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from knowledge_base import get_knowledge_base
+
+
+def cache_key(text, version):
+    """
+    Content address of an analysis result
+
+    Args:
+        text (str): Raw job description text
+        version (str): KnowledgeBase.version the result was computed with
+
+    Returns:
+        str: Hex digest identifying the text and knowledge base version
+    """
+    digest = hashlib.sha256(text.encode("utf-8", "surrogatepass"))
+    return f"{version}:{digest.hexdigest()}"
+
+
+class DiskStore:
+    """
+    Persistent SQLite tier of the result cache.
+
+    Entries are evicted least recently used first once the stored values
+    exceed max_bytes. Entries of other knowledge base versions are dropped
+    when the store first sees a new version.
+
+    The size of the stored values is tracked as they are written, so the
+    table is only scanned when it is over the limit. Access times of hits
+    are buffered and written with the next put, every TOUCH_BATCH hits or
+    on close, so that a hit costs no write of its own.
+    """
+
+    # Hits whose access times are buffered before they are written
+    TOUCH_BATCH = 256
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        """
+        Open or create the store
+
+        Args:
+            directory (str): Directory holding the cache database
+            max_bytes (int): Size limit of the stored values
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "results.sqlite3")
+        self.max_bytes = max_bytes
+        self.version = None
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, version TEXT NOT NULL, value TEXT NOT NULL,"
+                " size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)"
+            )
+        self._total = self._stored_bytes()
+
+    def _stored_bytes(self):
+        return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def _check_version(self, version):
+        if version != self.version:
+            with self._connection:
+                self._connection.execute("DELETE FROM results WHERE version != ?", (version,))
+            self._total = self._stored_bytes()
+            self.version = version
+
+    def _flush_touched(self):
+        """Write the buffered access times; the caller commits"""
+        if self._touched:
+            self._connection.executemany(
+                "UPDATE results SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def get(self, key, version):
+        with self._lock:
+            self._check_version(version)
+            row = self._connection.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.TOUCH_BATCH:
+                with self._connection:
+                    self._flush_touched()
+            return json.loads(row[0])
+
+    def put(self, key, version, result):
+        value = json.dumps(result)
+        with self._lock:
+            self._check_version(version)
+            with self._connection:
+                self._flush_touched()
+                replaced = self._connection.execute(
+                    "SELECT size FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                    (key, version, value, len(value), time.time()),
+                )
+                self._total += len(value) - (replaced[0] if replaced else 0)
+                if self._total > self.max_bytes:
+                    self._evict()
+
+    def _evict(self):
+        # Other processes sharing the directory write too, so recount first
+        total = self._stored_bytes()
+        # Drop the least recently used entries until the store fits again
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM results ORDER BY accessed"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._connection.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+        self._total = total
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM results")
+            self._touched.clear()
+            self._total = 0
+
+    def close(self):
+        with self._lock:
+            with self._connection:
+                self._flush_touched()
+            self._connection.close()
+
+
+class ResultCache:
+    """
+    Two-tier cache of analysis results keyed by the raw text and the
+    knowledge base version.
+
+    The in-memory tier is a bounded LRU. The optional disk tier survives
+    restarts and is shared by every process pointing at the same directory.
+    Editing skill_dictionary.json or skill_categories.json changes the
+    knowledge base version, so results computed with the old files are never
+    returned again.
+    """
+
+    def __init__(self, max_entries=1024, directory=None, max_disk_bytes=256 * 1024 * 1024):
+        """
+        Create the cache
+
+        Args:
+            max_entries (int): Size of the in-memory LRU tier
+            directory (str): Directory of the persistent tier, or None for memory only
+            max_disk_bytes (int): Size limit of the persistent tier
+        """
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.disk = DiskStore(directory, max_disk_bytes) if directory else None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, text):
+        """
+        Key of a text under the current knowledge base
+
+        Returns:
+            tuple: (key, version)
+        """
+        version = get_knowledge_base().version
+        return cache_key(text or "", version), version
+
+    def get(self, text):
+        """
+        Look up the cached result for a text
+
+        Args:
+            text (str): Raw job description text
+
+        Returns:
+            dict: Cached analyze_text result, or None
+        """
+        key, version = self.key(text)
+        with self._lock:
+            result = self.memory.get(key)
+            if result is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return result
+
+        if self.disk is not None:
+            result = self.disk.get(key, version)
+            if result is not None:
+                self._remember(key, result)
+                with self._lock:
+                    self.hits += 1
+                return result
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, text, result):
+        """
+        Store the result for a text
+
+        Args:
+            text (str): Raw job description text
+            result (dict): analyze_text result
+        """
+        key, version = self.key(text)
+        self._remember(key, result)
+        if self.disk is not None:
+            self.disk.put(key, version, result)
+
+    def _remember(self, key, result):
+        with self._lock:
+            self.memory[key] = result
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+# Process-wide cache used by the Streamlit app. Set JD_RESULT_CACHE_DIR to add
+# the persistent tier.
+default_cache = ResultCache(directory=os.environ.get("JD_RESULT_CACHE_DIR") or None)
@@ -0,0 +1,382 @@
+"""
+Persistent store of analysis results with indexed skill queries.
+
+Every stored document keeps its result, and every skill it mentions is a row
+of document_skills carrying the skill, its category and the time the
+document was stored, indexed so that questions over many results are
+answered from the index instead of by reprocessing text:
+
+- documents_with_skills(["kafka", "spark"]): postings requiring all of them
+- top_skills(category="Cloud & DevOps", since=a week ago): the most
+  requested skills of a category in a period
+
+The database runs in WAL mode, so readers (the app, a query from the shell)
+never wait for a bulk run writing to it. ResultsWriter batches writes on a
+background thread so that the pipeline producing results never waits for
+SQLite either.
+
+Examples:
+
+    python cli.py postings.jsonl -o skills.jsonl --store results.sqlite3
+    python results_store.py with-skills results.sqlite3 kafka spark
+    python results_store.py top-skills results.sqlite3 --category "Cloud & DevOps" --days 7
+"""
+import argparse
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+# Results written per transaction by ResultsWriter
+WRITE_BATCH = 512
+
+# Results queued for writing before ResultsWriter.write blocks
+MAX_PENDING = 8192
+
+# Parameters per SQL statement are limited, so name lookups are split
+SQL_BATCH = 500
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS categories (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS skills (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS documents ("
+    " id INTEGER PRIMARY KEY, doc_id TEXT NOT NULL, offset INTEGER,"
+    " created REAL NOT NULL, result TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS documents_doc_id ON documents (doc_id)",
+    # One row per skill of a document. Category and time are copied from the
+    # document so that the queries below are answered by one index each.
+    "CREATE TABLE IF NOT EXISTS document_skills ("
+    " skill INTEGER NOT NULL, document INTEGER NOT NULL, category INTEGER,"
+    " created REAL NOT NULL, PRIMARY KEY (skill, document)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS document_skills_category"
+    " ON document_skills (category, created, skill)",
+    "CREATE INDEX IF NOT EXISTS document_skills_created ON document_skills (created, skill)",
+)
+
+
+class ResultsStore:
+    """
+    SQLite store of analyze_text results.
+
+    Safe to share between threads; statements are serialized by a lock.
+    Several processes can read while one writes.
+    """
+
+    def __init__(self, path):
+        """
+        Open or create the store
+
+        Args:
+            path (str): SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Transactions are begun explicitly, see add()
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        # Durable at every checkpoint rather than every commit, which WAL
+        # keeps consistent across crashes
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in SCHEMA:
+                    self._connection.execute(statement)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        self._load_names()
+
+    def _load_names(self):
+        """Read the skill and category ids, including those added by other connections"""
+        self._skill_ids = dict(self._connection.execute("SELECT name, id FROM skills"))
+        self._category_ids = dict(self._connection.execute("SELECT name, id FROM categories"))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def _intern(self, table, ids, names):
+        """Ids of names in a name table, inserting the new ones"""
+        new = [name for name in dict.fromkeys(names) if name not in ids]
+        if new:
+            self._connection.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)",
+                                         [(name,) for name in new])
+            # Another process may have inserted some of them first
+            for start in range(0, len(new), SQL_BATCH):
+                chunk = new[start:start + SQL_BATCH]
+                placeholders = ", ".join("?" * len(chunk))
+                ids.update(self._connection.execute(
+                    f"SELECT name, id FROM {table} WHERE name IN ({placeholders})", chunk
+                ))
+
+    def add(self, records):
+        """
+        Store results in one transaction
+
+        Args:
+            records (list): (document id, result, offset, created) tuples,
+                result being an analyze_text result, offset the position of
+                the document in its input or None and created a Unix time
+
+        Returns:
+            list: Store ids of the documents, in order
+        """
+        if not records:
+            return []
+
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so the ids read below
+            # stay free until the commit
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                ids = self._add(records)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                # Names interned by the rolled back transaction are gone
+                self._load_names()
+                raise
+        return ids
+
+    def _add(self, records):
+        self._intern("skills", self._skill_ids,
+                     (skill for _, result, _, _ in records for skill in result["skills"]))
+        self._intern("categories", self._category_ids,
+                     (category for _, result, _, _ in records for category in result["categories"]))
+
+        first_id = self._connection.execute("SELECT COALESCE(MAX(id) + 1, 0) FROM documents").fetchone()[0]
+        ids = list(range(first_id, first_id + len(records)))
+        documents = []
+        document_skills = []
+        for document, (doc_id, result, offset, created) in zip(ids, records):
+            documents.append((document, json.dumps(doc_id), offset, created, json.dumps(result)))
+            category_of = {
+                skill: self._category_ids[category]
+                for category, skills in result["categories"].items()
+                for skill in skills
+            }
+            document_skills.extend(
+                (self._skill_ids[skill], document, category_of.get(skill), created)
+                for skill in dict.fromkeys(result["skills"])
+            )
+        self._connection.executemany("INSERT INTO documents VALUES (?, ?, ?, ?, ?)", documents)
+        self._connection.executemany("INSERT INTO document_skills VALUES (?, ?, ?, ?)", document_skills)
+        return ids
+
+    def documents_with_skills(self, skills, since=None, limit=None):
+        """
+        Documents mentioning all of the given skills
+
+        Args:
+            skills (list): Canonical skill names
+            since (float): Only documents stored at or after this Unix time
+            limit (int): Maximum number of documents
+
+        Returns:
+            list: Document ids, oldest first; result() gives their results
+        """
+        skills = list(dict.fromkeys(skills))
+        if not skills:
+            return []
+
+        with self._lock:
+            skill_ids = [self._skill_ids.get(skill) for skill in skills]
+            if None in skill_ids:
+                # Possibly added since by another writer
+                self._load_names()
+                skill_ids = [self._skill_ids.get(skill) for skill in skills]
+                if None in skill_ids:
+                    return []
+            # Start from the rarest skill and probe the primary key for the others
+            skill_ids.sort(key=lambda skill: self._connection.execute(
+                "SELECT COUNT(*) FROM document_skills WHERE skill = ?", (skill,)
+            ).fetchone()[0])
+
+            conditions = [
+                "EXISTS (SELECT 1 FROM document_skills AS other"
+                " WHERE other.skill = ? AND other.document = first.document)"
+            ] * (len(skill_ids) - 1)
+            parameters = [skill_ids[0], *skill_ids[1:]]
+            if since is not None:
+                conditions.append("first.created >= ?")
+                parameters.append(since)
+            sql = ("SELECT d.doc_id FROM document_skills AS first"
+                   " JOIN documents AS d ON d.id = first.document WHERE first.skill = ?")
+            for condition in conditions:
+                sql += f" AND {condition}"
+            sql += " ORDER BY first.document"
+            if limit is not None:
+                sql += " LIMIT ?"
+                parameters.append(limit)
+            rows = self._connection.execute(sql, parameters).fetchall()
+        return [json.loads(doc_id) for (doc_id,) in rows]
+
+    def result(self, doc_id):
+        """
+        Stored result of a document
+
+        Args:
+            doc_id: Document id given to add()
+
+        Returns:
+            dict: The analyze_text result, the latest one if the id was
+                stored several times, or None
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT result FROM documents WHERE doc_id = ? ORDER BY id DESC LIMIT 1", (json.dumps(doc_id),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def top_skills(self, category=None, since=None, limit=10):
+        """
+        Skills mentioned by the most documents
+
+        Args:
+            category (str): Only skills of this category
+            since (float): Only documents stored at or after this Unix time
+            limit (int): Maximum number of skills
+
+        Returns:
+            list: (skill, number of documents) pairs, most frequent first
+        """
+        conditions = []
+        parameters = []
+        with self._lock:
+            if category is not None:
+                category_id = self._category_ids.get(category)
+                if category_id is None:
+                    # Possibly added since by another writer
+                    self._load_names()
+                    category_id = self._category_ids.get(category)
+                    if category_id is None:
+                        return []
+                conditions.append("h.category = ?")
+                parameters.append(category_id)
+            if since is not None:
+                conditions.append("h.created >= ?")
+                parameters.append(since)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            parameters.append(limit)
+            return self._connection.execute(
+                "SELECT s.name, COUNT(*) AS n FROM document_skills AS h JOIN skills AS s ON s.id = h.skill"
+                f" {where} GROUP BY h.skill ORDER BY n DESC, s.name LIMIT ?",
+                parameters,
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_STOP = object()
+
+
+class ResultsWriter:
+    """
+    Write results to a ResultsStore in batches from a background thread.
+
+    write() only queues the result, so the caller keeps extracting while
+    earlier results are committed; it blocks only when max_pending results
+    are waiting. Has the write(offset, doc_id, result) method of the cli
+    writers.
+    """
+
+    def __init__(self, store, batch_size=WRITE_BATCH, max_pending=MAX_PENDING):
+        """
+        Start the writer thread
+
+        Args:
+            store (ResultsStore): Store to write to
+            batch_size (int): Results committed per transaction at most
+            max_pending (int): Queued results before write() blocks
+        """
+        self.store = store
+        self.batch_size = batch_size
+        self.written = 0
+        self._queue = queue.Queue(max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="results-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, offset, doc_id, result, created=None):
+        """Queue a result, stored with the given Unix time or the current one"""
+        if self._error is not None:
+            raise self._error
+        self._queue.put((doc_id, result, offset, time.time() if created is None else created))
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            # Wait for one result, then take whatever else is already queued
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _STOP:
+                batch.pop()
+                stopping = True
+            if batch and self._error is None:
+                try:
+                    self.store.add(batch)
+                    self.written += len(batch)
+                except Exception as e:
+                    # Reported by the next write() or close(); keep draining
+                    # so that writers blocked on a full queue are released
+                    self._error = e
+
+    def close(self):
+        """
+        Write the queued results and stop the thread
+
+        Raises:
+            Exception: The error of a failed write, if any
+        """
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        epilog="\n\n".join(__doc__.split("\n\n")[-2:]),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    with_skills = commands.add_parser("with-skills", help="documents requiring all of the given skills")
+    with_skills.add_argument("store", help="SQLite results store")
+    with_skills.add_argument("skills", nargs="+", help="canonical skill names")
+    with_skills.add_argument("--days", type=float, help="only documents stored in the last DAYS days")
+    with_skills.add_argument("--limit", type=int, help="maximum number of documents")
+
+    top = commands.add_parser("top-skills", help="most requested skills")
+    top.add_argument("store", help="SQLite results store")
+    top.add_argument("--category", help="only skills of this category")
+    top.add_argument("--days", type=float, help="only documents stored in the last DAYS days")
+    top.add_argument("--limit", type=int, default=10, help="number of skills (default: %(default)s)")
+    args = parser.parse_args()
+
+    since = time.time() - args.days * 86400 if args.days is not None else None
+    store = ResultsStore(args.store)
+    try:
+        if args.command == "with-skills":
+            for doc_id in store.documents_with_skills(args.skills, since=since, limit=args.limit):
+                print(json.dumps(doc_id))
+        else:
+            for skill, documents in store.top_skills(args.category, since=since, limit=args.limit):
+                print(f"{documents:>8}  {skill}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
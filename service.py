@@ -0,0 +1,373 @@
+"""
+Long-running HTTP service for skill extraction.
+
+Keeps the spaCy model and the compiled knowledge base warm in a pool of
+worker processes and groups concurrent requests into micro-batches that are
+parsed with one nlp.pipe call. Built on asyncio from the standard library.
+
+Endpoints:
+
+    POST /extract   {"text": "..."} or {"texts": ["...", ...]}
+    GET  /health    status, queue depth and knowledge base version
+
+Run locally from the repository root:
+
+    python service.py --port 8080 --workers 4
+    curl -s localhost:8080/extract -d '{"text": "Python and AWS developer"}'
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from knowledge_base import get_knowledge_base
+from pipeline import analyze_batch, init_worker, warm_up
+from result_cache import ResultCache
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class Overloaded(Exception):
+    """Raised when the request queue is full"""
+
+
+class TooManyTexts(Exception):
+    """Raised when a request holds more texts than the queue can ever take"""
+
+
+def _analyze_texts(texts):
+    """Analyze one micro-batch; runs in a worker"""
+    return list(analyze_batch(texts, batch_size=max(len(texts), 1)))
+
+
+class MicroBatcher:
+    """
+    Collects concurrent texts into batches for the worker pool.
+
+    A batch is sent once it holds batch_size texts or max_latency seconds
+    after its first text arrived, whichever comes first. At most one batch
+    per worker is in flight. Texts beyond max_queue waiting ones are
+    rejected with Overloaded instead of queueing without bound, and a
+    request of more than max_queue texts with TooManyTexts.
+    """
+
+    def __init__(self, executor, workers, batch_size=32, max_latency=0.01, max_queue=1024,
+                 cache=None):
+        self.executor = executor
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.cache = cache
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.slots = asyncio.Semaphore(workers)
+        self.in_flight = 0
+        self.processed = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, texts):
+        """
+        Analyze texts as part of the next batches
+
+        Args:
+            texts (list): Raw job description texts
+
+        Returns:
+            list: analyze_text results, in input order
+
+        Raises:
+            TooManyTexts: If there are more texts than the queue holds
+            Overloaded: If the queue cannot take all texts now
+        """
+        if self.queue.maxsize and len(texts) > self.queue.maxsize:
+            raise TooManyTexts()
+        if self.queue.maxsize and self.queue.qsize() + len(texts) > self.queue.maxsize:
+            raise Overloaded()
+
+        loop = asyncio.get_running_loop()
+        results = [self.cache.get(text) if self.cache is not None else None for text in texts]
+        futures = {}
+        for i, text in enumerate(texts):
+            if results[i] is None:
+                future = loop.create_future()
+                self.queue.put_nowait((text, future))
+                futures[i] = future
+
+        for i, future in futures.items():
+            results[i] = await future
+        return results
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.max_latency
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self.slots.acquire()
+            asyncio.get_running_loop().create_task(self._process(batch))
+
+    async def _process(self, batch):
+        self.in_flight += 1
+        try:
+            texts = [text for text, _ in batch]
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(self.executor, _analyze_texts, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (text, future), result in zip(batch, results):
+                if self.cache is not None:
+                    self.cache.put(text, result)
+                if not future.done():
+                    future.set_result(result)
+            self.processed += len(batch)
+        finally:
+            self.in_flight -= 1
+            self.slots.release()
+
+
+class ExtractionService:
+    """HTTP front end of a MicroBatcher"""
+
+    def __init__(self, batcher, workers):
+        self.batcher = batcher
+        self.workers = workers
+        self.started = time.time()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line, headers = await self._read_head(reader)
+                except ValueError:
+                    await self._respond(writer, 431, {"error": "request line or header too long"}, False)
+                    break
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, False)
+                    break
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {"error": "invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.route(method, path.split("?", 1)[0], body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_head(self, reader):
+        """
+        Read the request line and headers of the next request
+
+        Returns:
+            tuple: (request line, headers with lowercase names); the request
+                line is empty once the client closed the connection
+
+        Raises:
+            ValueError: If a line is longer than the stream's limit
+        """
+        request_line = await reader.readline()
+        headers = {}
+        if not request_line:
+            return request_line, headers
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return request_line, headers
+
+    async def route(self, method, path, body):
+        """
+        Handle one request
+
+        Returns:
+            tuple: (HTTP status, JSON-serializable payload)
+        """
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, self.health()
+
+        if path == "/extract":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError:
+                # Also raised for bodies that are not valid UTF-8
+                return 400, {"error": "body must be UTF-8 encoded JSON"}
+            if not isinstance(request, dict):
+                return 400, {"error": 'expected {"text": str} or {"texts": [str, ...]}'}
+
+            single = "text" in request
+            texts = [request["text"]] if single else request.get("texts")
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                return 400, {"error": 'expected {"text": str} or {"texts": [str, ...]}'}
+
+            try:
+                results = await self.batcher.submit(texts)
+            except TooManyTexts:
+                return 413, {"error": f"at most {self.batcher.queue.maxsize} texts per request"}
+            except Overloaded:
+                return 503, {"error": "overloaded, retry later"}
+            except Exception as e:
+                return 500, {"error": str(e)}
+            return 200, results[0] if single else {"results": results}
+
+        return 404, {"error": "not found"}
+
+    def health(self):
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "workers": self.workers,
+            "queued": self.batcher.queue.qsize(),
+            "in_flight_batches": self.batcher.in_flight,
+            "processed": self.batcher.processed,
+            "knowledge_base_version": get_knowledge_base().version,
+        }
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8080, workers=None, batch_size=32, max_latency=0.01,
+                max_queue=1024, cache_entries=4096):
+    """
+    Run the service until cancelled
+
+    Args:
+        host (str): Interface to listen on
+        port (int): Port to listen on
+        workers (int): Worker processes; 0 analyzes in a thread of this process
+        batch_size (int): Largest micro-batch
+        max_latency (float): Longest wait in seconds for a micro-batch to fill
+        max_queue (int): Texts allowed to wait before requests get 503
+        cache_entries (int): Size of the in-memory result cache, 0 to disable
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+    else:
+        executor = ThreadPoolExecutor(max_workers=1, initializer=warm_up)
+    # Start every worker now so the first requests do not pay for model loading
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*[
+        loop.run_in_executor(executor, _analyze_texts, ["warm up"])
+        for _ in range(max(workers, 1))
+    ])
+
+    cache = ResultCache(max_entries=cache_entries) if cache_entries else None
+    batcher = MicroBatcher(executor, max(workers, 1), batch_size, max_latency, max_queue, cache)
+    batcher.start()
+    service = ExtractionService(batcher, workers)
+
+    server = await asyncio.start_server(service.handle_connection, host, port, backlog=1024)
+    print(f"Serving on http://{host}:{port} with {workers} worker(s)", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+        executor.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0],
+        epilog="\n\n".join(__doc__.split("\n\n")[1:]),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count, 0: in-process)")
+    parser.add_argument("--batch-size", type=int, default=32, help="largest micro-batch")
+    parser.add_argument("--max-latency-ms", type=float, default=10,
+                        help="longest wait for a micro-batch to fill")
+    parser.add_argument("--max-queue", type=int, default=1024,
+                        help="texts allowed to wait before requests are rejected with 503")
+    parser.add_argument("--cache-entries", type=int, default=4096,
+                        help="in-memory result cache size, 0 to disable")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(
+            args.host,
+            args.port,
+            args.workers,
+            args.batch_size,
+            args.max_latency_ms / 1000,
+            args.max_queue,
+            args.cache_entries,
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
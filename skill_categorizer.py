@@ -2,9 +2,10 @@ import json
 import os
 from pathlib import Path
 
-# Create data directory if it doesn't exist
-data_dir = Path("data")
-data_dir.mkdir(exist_ok=True)
+from knowledge_base import get_knowledge_base
+
+# Data directory next to this module, independent of the working directory
+data_dir = Path(__file__).resolve().parent / "data"
 
 # Path to skill categories file
 skill_categories_path = data_dir / "skill_categories.json"
@@ -73,11 +74,6 @@ DEFAULT_SKILL_CATEGORIES = {
     "Uncategorized": []  # Will hold skills that don't match any category
 }
 
-# Write default skill categories if the file doesn't exist
-if not skill_categories_path.exists():
-    with open(skill_categories_path, 'w') as f:
-        json.dump(DEFAULT_SKILL_CATEGORIES, f, indent=4)
-
 def load_skill_categories():
     """
     Load the skill categories from the JSON file
@@ -92,12 +88,14 @@ def load_skill_categories():
         # If the file doesn't exist or is invalid, use the default
         return DEFAULT_SKILL_CATEGORIES
 
-def categorize_skills(extracted_skills):
+def categorize_skills(extracted_skills, knowledge_base=None):
     """
     Categorize extracted skills into predefined groups
     
     Args:
         extracted_skills (list): List of extracted skills
+        knowledge_base (KnowledgeBase): Snapshot to categorize with, the
+            process-wide one by default
         
     Returns:
         dict: Dictionary with categories as keys and lists of skills as values
@@ -105,14 +103,11 @@ def categorize_skills(extracted_skills):
     if not extracted_skills:
         return {}
     
-    # Load skill categories
-    skill_categories = load_skill_categories()
-    
-    # Create a reverse mapping of skills to categories
-    skill_to_category = {}
-    for category, skills in skill_categories.items():
-        for skill in skills:
-            skill_to_category[skill.lower()] = category
+    # Get the cached skill categories and their reverse mapping
+    if knowledge_base is None:
+        knowledge_base = get_knowledge_base()
+    skill_categories = knowledge_base.skill_categories
+    skill_to_category = knowledge_base.skill_to_category
     
     # Categorize each skill
     categorized = {category: [] for category in skill_categories.keys()}
@@ -1,23 +1,17 @@
 import json
 import os
 import re
-import spacy
+from array import array
 from pathlib import Path
-from fuzzywuzzy import fuzz, process
 
-# Load spaCy model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    import spacy.cli
-    spacy.cli.download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+from instrumentation import count, stage
+from knowledge_base import get_knowledge_base
+from skill_ids import skill_names
 
-# Create data directory if it doesn't exist
-data_dir = Path("data")
-data_dir.mkdir(exist_ok=True)
+# Data directory next to this module, independent of the working directory
+data_dir = Path(__file__).resolve().parent / "data"
 
-# Check if skill dictionary exists, if not create it
+# Path to skill dictionary file
 skill_dict_path = data_dir / "skill_dictionary.json"
 
 # Default technical skill dictionary
@@ -233,11 +227,6 @@ DEFAULT_SKILL_DICT = {
     "illustrator": "adobe illustrator",
 }
 
-# Write default skill dictionary if it doesn't exist
-if not skill_dict_path.exists():
-    with open(skill_dict_path, 'w') as f:
-        json.dump(DEFAULT_SKILL_DICT, f, indent=4)
-
 def load_skill_dictionary():
     """
     Load the skill dictionary from the JSON file
@@ -265,72 +254,152 @@ def extract_skills(text):
     if not text:
         return []
     
-    # Load skill dictionary
-    skill_dict = load_skill_dictionary()
-    skill_keywords = list(skill_dict.keys())
-    
-    # Process the text with spaCy
-    doc = nlp(text)
+    return extract_skills_from_words(text.lower().split())
+
+def extract_skills_from_words(words, knowledge_base=None):
+    """
+    Extract technical skills from the words of a preprocessed job description
     
-    # Extract skills using exact and fuzzy matching
-    extracted_skills = set()
+    Args:
+        words (list): Lowercase words, e.g. the tokens from preprocess_tokens
+        knowledge_base (KnowledgeBase): Snapshot to match against, the
+            process-wide one by default
+        
+    Returns:
+        list: List of extracted skills, sorted by name
+    """
+    if knowledge_base is None:
+        knowledge_base = get_knowledge_base()
     
-    # Direct matching for multi-word skills
-    for skill in skill_keywords:
-        if len(skill.split()) > 1:  # Check for multi-word skills
-            if skill.lower() in text.lower():
-                extracted_skills.add(skill_dict[skill])
+    return skill_names(extract_skill_ids(words, knowledge_base), knowledge_base)
+
+def extract_skill_ids(words, knowledge_base=None):
+    """
+    Extract the interned ids of the skills in a preprocessed job description
     
-    # Matching for single-word skills and fuzzy matching
-    for token in doc:
-        token_text = token.text.lower()
+    Args:
+        words (list): Lowercase words, e.g. the tokens from preprocess_tokens
+        knowledge_base (KnowledgeBase): Snapshot to match against, the
+            process-wide one by default
         
-        # Direct match for single words
-        if token_text in skill_dict:
-            extracted_skills.add(skill_dict[token_text])
+    Returns:
+        array: Sorted ids into knowledge_base.skill_names
+    """
+    if knowledge_base is None:
+        knowledge_base = get_knowledge_base()
+    
+    alias_ids = knowledge_base.alias_ids
+    extracted_ids = {alias_ids[alias] for alias in match_aliases(words, knowledge_base)}
+    return array(knowledge_base.id_typecode, sorted(extracted_ids))
+
+def match_aliases(words, knowledge_base=None):
+    """
+    Find the dictionary aliases matched in a preprocessed job description
+    
+    Args:
+        words (list): Lowercase words, e.g. the tokens from preprocess_tokens
+        knowledge_base (KnowledgeBase): Snapshot to match against, the
+            process-wide one by default
         
-        # Check for compound terms (e.g., "machine learning")
-        if token.i < len(doc) - 1:
-            bigram = f"{token.text} {doc[token.i + 1].text}".lower()
-            if bigram in skill_dict:
-                extracted_skills.add(skill_dict[bigram])
+    Returns:
+        set: Aliases found exactly, plus the best fuzzy match of every n-gram
+    """
+    return _match(words, knowledge_base, False)[0]
+
+def match_alias_spans(words, knowledge_base=None):
+    """
+    Find where the aliases of match_aliases occur in a preprocessed job description
+    
+    Runs the same single matching pass as match_aliases; the positions of
+    the n-grams are read back from the n-gram list it builds anyway.
+    
+    Args:
+        words (list): Lowercase words, e.g. the tokens from preprocess_tokens
+        knowledge_base (KnowledgeBase): Snapshot to match against, the
+            process-wide one by default
         
-        if token.i < len(doc) - 2:
-            trigram = f"{token.text} {doc[token.i + 1].text} {doc[token.i + 2].text}".lower()
-            if trigram in skill_dict:
-                extracted_skills.add(skill_dict[trigram])
+    Returns:
+        list: (start, end, alias, match_type, score) for every exact hit and
+            every n-gram with a fuzzy match, where start and end are word
+            indices (end exclusive), match_type is "exact" or "fuzzy" and
+            score is the WRatio score (100 for exact hits)
+    """
+    return _match(words, knowledge_base, True)[1]
+
+def _match(words, knowledge_base, with_spans):
+    """
+    Exact and fuzzy matching of the words of a document
     
-    # Fuzzy matching for skills
-    # Get all n-grams of 1-3 words from the text
-    words = text.lower().split()
-    all_ngrams = []
+    Returns:
+        tuple: (matched aliases, spans), spans being None unless with_spans
+    """
+    # Get the cached skill dictionary and the matchers compiled from it
+    if knowledge_base is None:
+        knowledge_base = get_knowledge_base()
+    
+    if not words:
+        return set(), [] if with_spans else None
     
-    # Add single words
-    all_ngrams.extend(words)
+    # Exact matching of single and multi-word skills in one pass over the words
+    with stage("exact_match"):
+        if with_spans:
+            spans = [(start, end, alias, "exact", 100)
+                     for start, end, alias, _ in knowledge_base.matcher.find(words)]
+            matched_aliases = {span[2] for span in spans}
+        else:
+            spans = None
+            matched_aliases = {alias for _, _, alias, _ in knowledge_base.matcher.find(words)}
     
-    # Add bigrams
-    for i in range(len(words) - 1):
-        all_ngrams.append(f"{words[i]} {words[i+1]}")
+    # Fuzzy matching for skills
+    # Get all n-grams of 1-3 words from the text
+    with stage("ngrams"):
+        all_ngrams = []
+        
+        # Add single words
+        all_ngrams.extend(words)
+        
+        # Add bigrams
+        for i in range(len(words) - 1):
+            all_ngrams.append(f"{words[i]} {words[i+1]}")
+        
+        # Add trigrams
+        for i in range(len(words) - 2):
+            all_ngrams.append(f"{words[i]} {words[i+1]} {words[i+2]}")
+        
+        unique_ngrams = list(dict.fromkeys(all_ngrams))
     
-    # Add trigrams
-    for i in range(len(words) - 2):
-        all_ngrams.append(f"{words[i]} {words[i+1]} {words[i+2]}")
+    count("ngrams", len(all_ngrams))
+    count("unique_ngrams", len(unique_ngrams))
     
-    # Perform fuzzy matching
-    for ngram in all_ngrams:
+    # Perform fuzzy matching, scoring each distinct n-gram only once and only
+    # against the keys the index keeps as plausible candidates
+    fuzzy_index = knowledge_base.fuzzy_index
+    fuzzy_matches = {}
+    with stage("fuzzy_match"):
         # Skip very short terms which might cause false positives
-        if len(ngram) < 3:
-            continue
-            
-        # Find closest matches with a high similarity score
-        matches = process.extractBests(
-            ngram, 
-            skill_keywords, 
-            score_cutoff=90,  # Only consider matches with high similarity
-            limit=1
-        )
+        queries = [ngram for ngram in unique_ngrams if len(ngram) >= 3]
         
-        for match, score in matches:
-            extracted_skills.add(skill_dict[match])
+        # Find the closest match of each with a high similarity score, in one
+        # batch so that the rapidfuzz backend can score them together
+        for ngram, match in zip(queries, fuzzy_index.best_matches(queries, score_cutoff=90)):
+            if match is not None:
+                matched_aliases.add(match[0])
+                fuzzy_matches[ngram] = match
+    
+    if with_spans and fuzzy_matches:
+        # all_ngrams holds the unigrams, bigrams and trigrams in word order,
+        # so an n-gram's position in it gives its words
+        n_words = len(words)
+        for i, ngram in enumerate(all_ngrams):
+            match = fuzzy_matches.get(ngram)
+            if match is None:
+                continue
+            if i < n_words:
+                start, length = i, 1
+            elif i < 2 * n_words - 1:
+                start, length = i - n_words, 2
+            else:
+                start, length = i - (2 * n_words - 1), 3
+            spans.append((start, start + length, match[0], "fuzzy", match[1]))
     
-    return list(extracted_skills)
+    return matched_aliases, spans
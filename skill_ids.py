@@ -0,0 +1,156 @@
+from array import array
+
+
+def skill_names(skill_ids, knowledge_base):
+    """
+    Canonical names of interned skills
+
+    Args:
+        skill_ids (array): Skill ids from extract_skill_ids
+        knowledge_base (KnowledgeBase): Snapshot the ids were assigned by
+
+    Returns:
+        list: Skill names, in id order
+    """
+    names = knowledge_base.skill_names
+    return [names[i] for i in skill_ids]
+
+
+def categorize_skill_ids(skill_ids, knowledge_base):
+    """
+    Group interned skills by category
+
+    Gives the same result as skill_categorizer.categorize_skills on the
+    skill names, using the category id precomputed for each skill instead of
+    lowercasing and looking up every name.
+
+    Args:
+        skill_ids (array): Sorted skill ids from extract_skill_ids
+        knowledge_base (KnowledgeBase): Snapshot the ids were assigned by
+
+    Returns:
+        dict: Categories with at least one skill, in category order, mapped
+            to lists of skill names
+    """
+    names = knowledge_base.skill_names
+    category_of = knowledge_base.skill_category_ids
+
+    groups = {}
+    for i in skill_ids:
+        groups.setdefault(category_of[i], []).append(names[i])
+
+    category_names = knowledge_base.category_names
+    return {category_names[c]: groups[c] for c in sorted(groups)}
+
+
+def category_counts(skill_ids, knowledge_base):
+    """
+    Number of skills per category
+
+    Args:
+        skill_ids (array): Skill ids from extract_skill_ids
+        knowledge_base (KnowledgeBase): Snapshot the ids were assigned by
+
+    Returns:
+        numpy.ndarray: Count for every entry of knowledge_base.category_names
+    """
+    import numpy as np
+
+    category_of = np.asarray(knowledge_base.skill_category_ids)
+    ids = np.asarray(skill_ids, dtype=np.intp)
+    return np.bincount(category_of[ids], minlength=len(knowledge_base.category_names))
+
+
+def category_count_matrix(skill_id_arrays, knowledge_base):
+    """
+    Number of skills per category for every document of a batch
+
+    The whole batch is categorized with one take and one bincount instead of
+    a categorize_skills call per document.
+
+    Args:
+        skill_id_arrays (list): Skill ids of each document, e.g. from
+            extract_skill_ids
+        knowledge_base (KnowledgeBase): Snapshot the ids were assigned by
+
+    Returns:
+        numpy.ndarray: Counts of shape (documents, categories), columns in
+            the order of knowledge_base.category_names
+    """
+    import numpy as np
+
+    n_documents = len(skill_id_arrays)
+    n_categories = len(knowledge_base.category_names)
+    lengths = np.fromiter((len(ids) for ids in skill_id_arrays), dtype=np.intp, count=n_documents)
+
+    if all(isinstance(ids, array) and ids.typecode == knowledge_base.id_typecode for ids in skill_id_arrays):
+        # Join the raw buffers instead of converting every array
+        flat = np.frombuffer(b"".join(skill_id_arrays), dtype=knowledge_base.id_typecode)
+    elif n_documents:
+        flat = np.concatenate([np.asarray(ids, dtype=np.intp) for ids in skill_id_arrays])
+    else:
+        flat = np.zeros(0, dtype=np.intp)
+
+    categories = np.asarray(knowledge_base.skill_category_ids, dtype=np.intp).take(flat)
+    rows = np.repeat(np.arange(n_documents), lengths)
+    counts = np.bincount(rows * n_categories + categories, minlength=n_documents * n_categories)
+    return counts.reshape(n_documents, n_categories)
+
+
+def category_count_frame(skill_id_arrays, knowledge_base, index=None):
+    """
+    category_count_matrix as a pandas DataFrame
+
+    Args:
+        skill_id_arrays (list): Skill ids of each document
+        knowledge_base (KnowledgeBase): Snapshot the ids were assigned by
+        index (sequence): Optional row labels, e.g. document ids
+
+    Returns:
+        pandas.DataFrame: One row per document and one column per category
+    """
+    import pandas as pd
+
+    return pd.DataFrame(
+        category_count_matrix(skill_id_arrays, knowledge_base),
+        columns=list(knowledge_base.category_names),
+        index=index,
+    )
+
+
+def to_bitset(skill_ids):
+    """
+    Pack skill ids into an int with one bit per skill
+
+    Bitsets make set operations between documents cheap, e.g.
+    ``(a & b).bit_count()`` skills shared by two documents.
+
+    Args:
+        skill_ids (iterable): Skill ids
+
+    Returns:
+        int: Bitset with bit i set for every skill id i
+    """
+    bits = 0
+    for i in skill_ids:
+        bits |= 1 << i
+    return bits
+
+
+def from_bitset(bits, typecode="H"):
+    """
+    Unpack a bitset made by to_bitset
+
+    Args:
+        bits (int): Bitset of skill ids
+        typecode (str): Typecode of the returned array, see KnowledgeBase.id_typecode
+
+    Returns:
+        array: Sorted skill ids
+    """
+    ids = array(typecode)
+    while bits:
+        low = bits & -bits
+        ids.append(low.bit_length() - 1)
+        bits ^= low
+    return ids
@@ -0,0 +1,90 @@
+# Punctuation stripped from both ends of a token before matching, so that
+# "python," or "(sql)" still hit their aliases. Characters that can be part of
+# a skill name (e.g. "+" in "c++", "#" in "c#") are deliberately left out.
+EDGE_PUNCTUATION = ".,;:!?()[]{}<>\"'`"
+
+
+def normalize_token(token):
+    """
+    Normalize a single word for matching
+
+    Args:
+        token (str): Word from the job description or from a dictionary alias
+
+    Returns:
+        str: Lowercased word without surrounding punctuation
+    """
+    return token.lower().strip(EDGE_PUNCTUATION)
+
+
+class SkillMatcher:
+    """
+    Token trie over the normalized aliases of a skill dictionary.
+
+    Each trie level is a dict keyed by a normalized token; the ``None`` key of
+    a node holds the ``(alias, canonical)`` pair of the alias ending there.
+    Matching only happens on whole tokens, so aliases never fire inside a
+    longer word ("go" in "google", "r" in "rest").
+    """
+
+    def __init__(self, skill_dict):
+        """
+        Compile the matcher
+
+        Args:
+            skill_dict (dict): Mapping of lowercase aliases to canonical skill names
+        """
+        self.root = {}
+        self.max_length = 0
+
+        for alias, canonical in skill_dict.items():
+            tokens = [normalize_token(token) for token in alias.split()]
+            tokens = [token for token in tokens if token]
+            if not tokens:
+                continue
+
+            node = self.root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[None] = (alias, canonical)
+
+            self.max_length = max(self.max_length, len(tokens))
+
+    def find(self, words):
+        """
+        Find every alias occurrence in a sequence of words
+
+        Args:
+            words (list): Words of the document, in order
+
+        Yields:
+            tuple: (start, end, alias, canonical) for each hit, where start and
+                end are word indices (end exclusive)
+        """
+        tokens = [normalize_token(word) for word in words]
+        root = self.root
+        n_tokens = len(tokens)
+
+        for start, token in enumerate(tokens):
+            node = root.get(token)
+            end = start + 1
+            while node is not None:
+                hit = node.get(None)
+                if hit is not None:
+                    yield start, end, hit[0], hit[1]
+                if end == n_tokens:
+                    break
+                node = node.get(tokens[end])
+                end += 1
+
+    def match(self, words):
+        """
+        Collect the canonical skills mentioned in a sequence of words
+
+        Args:
+            words (list): Words of the document, in order
+
+        Returns:
+            set: Canonical names of all matched skills
+        """
+        return {canonical for _, _, _, canonical in self.find(words)}
@@ -0,0 +1,124 @@
+from knowledge_base import get_knowledge_base
+from preprocessing import preprocess_tokens_with_offsets
+from skill_extractor import match_alias_spans
+
+
+class SkillSpan:
+    """
+    One occurrence of a skill in a job description.
+
+    start and end are character offsets into the raw text (end exclusive),
+    so ``text[span.start:span.end]`` is the mention as written, e.g. for
+    highlighting. match_type is "exact" or "fuzzy" and score the WRatio
+    score of the match, 100 for exact ones.
+    """
+
+    __slots__ = ("start", "end", "alias", "match_type", "score")
+
+    def __init__(self, start, end, alias, match_type, score):
+        self.start = start
+        self.end = end
+        self.alias = alias
+        self.match_type = match_type
+        self.score = score
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        return f"SkillSpan({self.start}, {self.end}, {self.alias!r}, {self.match_type!r}, {self.score})"
+
+
+class SkillMention:
+    """
+    Everything found about one skill in a job description.
+
+    count is the number of spans, which never overlap each other. match_type
+    is "exact" if any span is an exact match and score the best span score.
+    """
+
+    __slots__ = ("skill", "category", "match_type", "score", "count", "spans")
+
+    def __init__(self, skill, category, spans):
+        self.skill = skill
+        self.category = category
+        self.spans = spans
+        self.count = len(spans)
+        self.match_type = "exact" if any(span.match_type == "exact" for span in spans) else "fuzzy"
+        self.score = max(span.score for span in spans)
+
+    def to_dict(self):
+        result = {slot: getattr(self, slot) for slot in self.__slots__}
+        result["spans"] = [span.to_dict() for span in self.spans]
+        return result
+
+    def __repr__(self):
+        return (f"SkillMention({self.skill!r}, {self.category!r}, {self.match_type!r}, "
+                f"score={self.score}, count={self.count})")
+
+
+def build_mentions(alias_spans, offsets, knowledge_base):
+    """
+    Group word spans from match_alias_spans into one SkillMention per skill
+
+    Exact and fuzzy matching (and n-grams of different lengths) often find
+    the same mention several times. Per skill, spans are taken exact first,
+    then by score and position, and a span overlapping one already taken is
+    dropped, so count is the number of distinct mentions.
+
+    Args:
+        alias_spans (list): Output of match_alias_spans
+        offsets (list): Raw text (start, end) of every word, as returned by
+            preprocess_tokens_with_offsets
+        knowledge_base (KnowledgeBase): Snapshot the spans were matched against
+
+    Returns:
+        list: SkillMention objects sorted by skill name, the same skills as
+            extract_skills_from_words on the words
+    """
+    alias_ids = knowledge_base.alias_ids
+    by_skill = {}
+    for span in alias_spans:
+        by_skill.setdefault(alias_ids[span[2]], []).append(span)
+
+    names = knowledge_base.skill_names
+    category_of = knowledge_base.skill_category_ids
+    category_names = knowledge_base.category_names
+
+    mentions = []
+    for skill_id in sorted(by_skill):
+        kept = []
+        for start, end, alias, match_type, score in sorted(
+            by_skill[skill_id], key=lambda span: (span[3] != "exact", -span[4], span[0], span[1])
+        ):
+            if all(end <= other[0] or start >= other[1] for other in kept):
+                kept.append((start, end, alias, match_type, score))
+        kept.sort()
+        spans = [
+            SkillSpan(offsets[start][0], offsets[end - 1][1], alias, match_type, score)
+            for start, end, alias, match_type, score in kept
+        ]
+        mentions.append(SkillMention(names[skill_id], category_names[category_of[skill_id]], spans))
+    return mentions
+
+
+def extract_skill_mentions(text, knowledge_base=None):
+    """
+    Extract the skills of a raw job description with where and how they matched
+
+    Preprocessing and matching run once, as for extract_skills_from_words;
+    the offsets and spans are collected along the way.
+
+    Args:
+        text (str): Raw job description text
+        knowledge_base (KnowledgeBase): Snapshot to match against, the
+            process-wide one by default
+
+    Returns:
+        list: SkillMention objects sorted by skill name
+    """
+    if knowledge_base is None:
+        knowledge_base = get_knowledge_base()
+
+    words, offsets = preprocess_tokens_with_offsets(text)
+    return build_mentions(match_alias_spans(words, knowledge_base), offsets, knowledge_base)
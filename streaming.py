@@ -0,0 +1,179 @@
+"""
+Streaming extraction for very long documents.
+
+Whole-document processing holds the full text, its spaCy Doc and an n-gram
+list of about three times the word count in memory at once, and spaCy
+refuses texts over nlp.max_length. Here the text is read in pieces, cut into
+windows of whole words and matched window by window, each window extended
+by the last tokens of the previous one so that aliases and n-grams crossing
+a boundary are still seen. Memory is bounded by the window size and the
+fuzzy match cache, whatever the length of the input.
+
+Every stage the skills depend on is local: tokens and the filters applied to
+them only look at the word they come from, and exact and fuzzy matches only
+at a run of at most max(longest alias, 3) tokens. The union of the window
+results is therefore identical to processing the whole document at once.
+"""
+import copy
+from array import array
+from functools import lru_cache
+
+from knowledge_base import get_knowledge_base
+from normalizer import normalize_word
+from preprocessing import preprocess_tokens_batch
+from skill_extractor import match_aliases
+from skill_ids import categorize_skill_ids, skill_names
+
+# Raw words per window
+WINDOW_WORDS = 5000
+
+# Characters per piece when the input is one string
+CHUNK_CHARS = 1 << 20
+
+# Fuzzy matches remembered across windows
+FUZZY_CACHE_SIZE = 1 << 16
+
+
+def _pieces(text):
+    """The input as an iterable of strings"""
+    if isinstance(text, str):
+        return (text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS))
+    return text
+
+
+def iter_normalized_words(text):
+    """
+    Normalized words of a text, like normalize_text(text).split(' ')
+
+    Args:
+        text (str or iterable): The text, or pieces of it such as the lines
+            of an open file; words may be split between pieces
+
+    Yields:
+        str: Normalized words, in order
+    """
+    partial = ""
+    for piece in _pieces(text):
+        piece = partial + piece
+        words = piece.split()
+        # The last word may continue in the next piece
+        partial = words.pop() if words and not piece[-1].isspace() else ""
+        for word in words:
+            word = normalize_word(word)
+            if word:
+                yield word
+    if partial:
+        word = normalize_word(partial)
+        if word:
+            yield word
+
+
+def iter_token_windows(text, window_words=WINDOW_WORDS):
+    """
+    Preprocessed tokens of a text, one window of words at a time
+
+    Concatenated, the windows are exactly preprocess_tokens(text).
+
+    Args:
+        text (str or iterable): The text, or pieces of it
+        window_words (int): Raw words per window
+
+    Yields:
+        list: Kept tokens of each window
+    """
+    if window_words < 1:
+        raise ValueError("window_words must be at least 1")
+
+    def windows():
+        window = []
+        for word in iter_normalized_words(text):
+            window.append(word)
+            if len(window) == window_words:
+                yield ' '.join(window)
+                window = []
+        if window:
+            yield ' '.join(window)
+
+    # One window at a time, so that spaCy never holds more than one
+    yield from preprocess_tokens_batch(windows(), batch_size=1)
+
+
+def _with_fuzzy_cache(knowledge_base):
+    """Shallow copy of a snapshot whose fuzzy matches are cached across windows"""
+    cached = copy.copy(knowledge_base)
+    cached.fuzzy_index = copy.copy(knowledge_base.fuzzy_index)
+    cached.fuzzy_index.best_match = lru_cache(maxsize=FUZZY_CACHE_SIZE)(knowledge_base.fuzzy_index.best_match)
+    return cached
+
+
+def iter_skill_ids_stream(text, window_words=WINDOW_WORDS, knowledge_base=None):
+    """
+    Skills of a text as they are found, one window at a time
+
+    Args:
+        text (str or iterable): The text, or pieces of it; pieces are read
+            as the windows need them
+        window_words (int): Raw words per window
+        knowledge_base (KnowledgeBase): Snapshot to match against, the
+            process-wide one by default
+
+    Yields:
+        set: Ids into knowledge_base.skill_names first found in each window
+    """
+    if knowledge_base is None:
+        knowledge_base = get_knowledge_base()
+    window_knowledge_base = _with_fuzzy_cache(knowledge_base)
+
+    # A match spans at most this many tokens past its first one
+    overlap = max(knowledge_base.matcher.max_length, 3) - 1
+    alias_ids = knowledge_base.alias_ids
+
+    extracted_ids = set()
+    carry = []
+    for tokens in iter_token_windows(text, window_words):
+        words = carry + tokens
+        new_ids = {alias_ids[alias] for alias in match_aliases(words, window_knowledge_base)} - extracted_ids
+        extracted_ids.update(new_ids)
+        carry = words[-overlap:]
+        yield new_ids
+
+
+def extract_skill_ids_stream(text, window_words=WINDOW_WORDS, knowledge_base=None):
+    """
+    Streaming version of extract_skill_ids(preprocess_tokens(text))
+
+    Args:
+        text (str or iterable): The text, or pieces of it
+        window_words (int): Raw words per window
+        knowledge_base (KnowledgeBase): Snapshot to match against, the
+            process-wide one by default
+
+    Returns:
+        array: Sorted ids into knowledge_base.skill_names
+    """
+    if knowledge_base is None:
+        knowledge_base = get_knowledge_base()
+    extracted_ids = set()
+    for new_ids in iter_skill_ids_stream(text, window_words, knowledge_base):
+        extracted_ids.update(new_ids)
+    return array(knowledge_base.id_typecode, sorted(extracted_ids))
+
+
+def analyze_text_stream(text, window_words=WINDOW_WORDS):
+    """
+    Streaming version of pipeline.analyze_text, with the same result
+
+    Args:
+        text (str or iterable): The text, or pieces of it
+        window_words (int): Raw words per window
+
+    Returns:
+        dict: "skills" (list of extracted skills) and "categories" (dict of
+            categories to lists of skills)
+    """
+    knowledge_base = get_knowledge_base()
+    skill_ids = extract_skill_ids_stream(text, window_words, knowledge_base)
+    return {
+        "skills": skill_names(skill_ids, knowledge_base),
+        "categories": categorize_skill_ids(skill_ids, knowledge_base),
+    }
@@ -1,47 +1,209 @@
-import pandas as pd
 import io
-import PyPDF2
-import docx
-from io import StringIO
-import base64
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
 
-def get_file_text(uploaded_file):
+# PDFs with at least this many pages have their pages extracted in parallel
+PARALLEL_PDF_MIN_PAGES = 32
+
+def _source_name(source, name=None):
     """
-    Extract text from various file formats
-    
+    File name used to pick the reader for a source
+
     Args:
-        uploaded_file: The uploaded file object
-        
+        source: Upload object, path or memory-mapped file
+        name (str): Explicit file name, required for memory-mapped files
+
     Returns:
-        str: Extracted text from the file
+        str: Lowercase file name
+    """
+    if name is None:
+        if isinstance(source, (str, os.PathLike)):
+            name = os.fspath(source)
+        else:
+            name = getattr(source, "name", None)
+    if not name:
+        raise Exception("Cannot determine the file type; pass the file name explicitly.")
+    return str(name).lower()
+
+def _open_binary(source):
+    """
+    Open a source as a seekable binary stream without copying it
+
+    Args:
+        source: Upload object, path or memory-mapped file
+
+    Returns:
+        tuple: (stream, close) where close releases anything opened here
     """
-    file_name = uploaded_file.name.lower()
+    if isinstance(source, (str, os.PathLike)):
+        f = open(source, 'rb')
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be memory-mapped
+            return f, f.close
+
+        def close():
+            mapped.close()
+            f.close()
+        return mapped, close
+
+    if isinstance(source, mmap.mmap):
+        source.seek(0)
+        return source, lambda: None
+
+    if hasattr(source, 'seek') and hasattr(source, 'read'):
+        # Streamlit uploads are BytesIO objects and can be read in place
+        source.seek(0)
+        return source, lambda: None
+
+    return io.BytesIO(source.getvalue()), lambda: None
+
+def _pdf_page_range(source, start, stop):
+    """
+    Extract the text of a range of PDF pages; runs in a worker process
+
+    Args:
+        source: Path or raw bytes of the PDF
+        start (int): First page index
+        stop (int): Page index after the last page
+
+    Returns:
+        list: Text of each page
+    """
+    import PyPDF2
     
+    stream = io.BytesIO(source) if isinstance(source, bytes) else open(source, 'rb')
+    with stream:
+        pdf_reader = PyPDF2.PdfReader(stream)
+        return [pdf_reader.pages[i].extract_text() for i in range(start, stop)]
+
+def iter_pdf_pages(source, workers=1):
+    """
+    Lazily extract the text of each page of a PDF
+
+    With several workers, a PDF of at least PARALLEL_PDF_MIN_PAGES pages is
+    split into one contiguous page range per worker. Every worker parses the
+    whole file again before extracting its range, so this only pays off for
+    long PDFs whose text extraction outweighs parsing, and on machines with
+    cores to spare; it is off unless the caller asks for it.
+
+    Args:
+        source: Upload object, path or memory-mapped file
+        workers (int): Worker processes for large PDFs, 1 to extract every
+            page in this process
+
+    Yields:
+        str: Text of each page, in page order
+    """
+    # Imported on first use to keep startup fast
+    import PyPDF2
+    
+    stream, close = _open_binary(source)
+    try:
+        pdf_reader = PyPDF2.PdfReader(stream)
+        n_pages = len(pdf_reader.pages)
+        workers = min(workers or 1, n_pages)
+
+        if workers <= 1 or n_pages < PARALLEL_PDF_MIN_PAGES:
+            for page in pdf_reader.pages:
+                yield page.extract_text()
+            return
+
+        # Workers reopen the file themselves; in-memory sources are sent as bytes
+        if isinstance(source, (str, os.PathLike)):
+            worker_source = os.fspath(source)
+        else:
+            stream.seek(0)
+            worker_source = bytes(stream.read())
+
+        # One range per worker, as each range costs a parse of the file
+        step = -(-n_pages // workers)
+        ranges = [(start, min(start + step, n_pages)) for start in range(0, n_pages, step)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_pdf_page_range, worker_source, start, stop)
+                       for start, stop in ranges]
+            for future in futures:
+                yield from future.result()
+    finally:
+        close()
+
+def iter_docx_paragraphs(source):
+    """
+    Lazily extract the text of each paragraph of a DOCX file
+
+    Args:
+        source: Upload object, path or memory-mapped file
+
+    Yields:
+        str: Text of each paragraph, in document order
+    """
+    import docx
+    
+    stream, close = _open_binary(source)
+    try:
+        doc = docx.Document(stream)
+        for para in doc.paragraphs:
+            yield para.text
+    finally:
+        close()
+
+def iter_file_text(source, name=None, workers=1):
+    """
+    Lazily extract text from various file formats
+
+    Yields pieces of text each followed by a newline (pages of a PDF,
+    paragraphs of a DOCX file, the whole content of a TXT file), so joining
+    them gives the same text as get_file_text.
+
+    Args:
+        source: Upload object, file path or memory-mapped file
+        name (str): File name, required for memory-mapped files
+        workers (int): Worker processes for large PDFs, see iter_pdf_pages
+
+    Yields:
+        str: Successive pieces of the extracted text
+    """
+    file_name = _source_name(source, name)
+
     if file_name.endswith('.txt'):
         # For txt files
-        return uploaded_file.getvalue().decode('utf-8')
-    
+        stream, close = _open_binary(source)
+        try:
+            yield stream.read().decode('utf-8')
+        finally:
+            close()
+
     elif file_name.endswith('.pdf'):
         # For PDF files
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(uploaded_file.getvalue()))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text
+            for page_text in iter_pdf_pages(source, workers=workers):
+                yield page_text + "\n"
         except Exception as e:
             raise Exception(f"Error reading PDF: {e}")
-    
+
     elif file_name.endswith('.docx'):
         # For DOCX files
         try:
-            doc = docx.Document(io.BytesIO(uploaded_file.getvalue()))
-            text = ""
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-            return text
+            for para_text in iter_docx_paragraphs(source):
+                yield para_text + "\n"
         except Exception as e:
             raise Exception(f"Error reading DOCX: {e}")
-    
+
     else:
         raise Exception("Unsupported file format. Please upload a .txt, .pdf, or .docx file.")
+
+def get_file_text(uploaded_file, name=None, workers=1):
+    """
+    Extract text from various file formats
+
+    Args:
+        uploaded_file: The uploaded file object, a file path or a memory-mapped file
+        name (str): File name, required for memory-mapped files
+        workers (int): Worker processes for large PDFs, see iter_pdf_pages
+
+    Returns:
+        str: Extracted text from the file
+    """
+    return "".join(iter_file_text(uploaded_file, name=name, workers=workers))